@@ -0,0 +1,149 @@
+"""Benchmark of the Bowtie2 log parser
+
+Compares the Bowtie2 parser of utils/parser.py (get_Bowtie_summaries) with
+the line-indexed parser used before, which read fixed line numbers and split
+each line several times. Synthetic MAP files (Bowtie2 alignment summaries of
+single-end and paired-end samples, see synthetic.py) are parsed one file at a
+time by both parsers, and by the new parser as one concatenated log stream of
+all samples. The features of all three runs are checked to be identical.
+
+Per file, the new parser is slower than the line-indexed one, as it validates
+the layout of the whole summary and reads all counts. It is faster on a
+concatenated log stream, where a single pass replaces opening one file per
+sample.
+
+	python benchmarks/bowtie_log_benchmark.py --sizes 1000,10000,100000
+
+date:	2026-10-18
+
+"""
+
+import os
+import sys
+import time
+import json
+import shutil
+import argparse
+import tempfile
+
+import warnings
+warnings.filterwarnings("ignore")
+
+script_dir = os.path.dirname(os.path.abspath(sys.argv[0])) + '/'
+repo_dir = os.path.abspath(script_dir + '..') + '/'
+sys.path.insert(0, repo_dir)
+
+import synthetic
+import utils.utils as utils
+import utils.parser as parser
+
+argsParser = argparse.ArgumentParser(description='Benchmark the Bowtie2 log parser on synthetic samples')
+argsParser.add_argument('--sizes', type=str, default='1000,10000,100000', help='Comma-separated numbers of samples. Default: 1000,10000,100000')
+argsParser.add_argument('--repeats', type=int, default=3, help='Repetitions per size, the fastest run is reported. Default: 3')
+argsParser.add_argument('--workdir', type=str, default=None, help='Directory for the synthetic samples. Samples generated before are reused. By default a temporary directory is used and removed afterwards.')
+argsParser.add_argument('--seed', '-rs', type=int, default=1, help='Seed for drawing the samples. Default: 1')
+argsParser.add_argument('--out', '-o', type=str, default=None, help='Optional JSON file for the results.')
+args = argsParser.parse_args()
+
+def parse_BowtieSE_by_line(lines):
+	lines = lines.split('\n')
+	features = {}
+	features['BowtieSE_no_mapping'] = float(lines[2].split('(')[1].split('%')[0])
+	features['BowtieSE_uniquely'] = float(lines[3].split('(')[1].split('%')[0])
+	features['BowtieSE_multiple'] = float(lines[4].split('(')[1].split('%')[0])
+	features['BowtieSE_overall'] = float(lines[5].split('%')[0])
+	# for mixed Bowtie
+	features['BowtieMI_no_mapping'] = features['BowtieSE_no_mapping']
+	features['BowtieMI_uniquely'] = features['BowtieSE_uniquely']
+	features['BowtieMI_multiple'] = features['BowtieSE_multiple']
+	features['BowtieMI_overall'] = features['BowtieSE_overall']
+	return features
+
+def parse_BowtiePE_by_line(lines):
+	lines = lines.split('\n')
+	features = {}
+	features['BowtiePE_con_no_mapping'] = float(lines[2].split('(')[1].split('%')[0])
+	features['BowtiePE_con_uniquely'] = float(lines[3].split('(')[1].split('%')[0])
+	features['BowtiePE_con_multiple'] = float(lines[4].split('(')[1].split('%')[0])
+	features['BowtiePE_dis_uniquely'] = float(lines[7].split('(')[1].split('%')[0])
+	features['BowtiePE_cod_no_mapping'] = float(lines[11].split('(')[1].split('%')[0])
+	features['BowtiePE_cod_uniquely'] = float(lines[12].split('(')[1].split('%')[0])
+	features['BowtiePE_cod_multiple'] = float(lines[13].split('(')[1].split('%')[0])
+	features['BowtiePE_overall'] = float(lines[14].split('%')[0])
+	# for mixed Bowtie
+	features['BowtieMI_no_mapping'] = features['BowtiePE_con_no_mapping']
+	features['BowtieMI_uniquely'] = features['BowtiePE_con_uniquely']
+	features['BowtieMI_multiple'] = features['BowtiePE_con_multiple']
+	features['BowtieMI_overall'] = features['BowtiePE_overall']
+	# for SE Bowtie
+	features['BowtieSE_no_mapping'] = features['BowtiePE_con_no_mapping']
+	features['BowtieSE_uniquely'] = features['BowtiePE_con_uniquely']
+	features['BowtieSE_multiple'] = features['BowtiePE_con_multiple']
+	features['BowtieSE_overall'] = features['BowtiePE_overall']
+	return features
+
+def get_MAP_features_by_line(feature_file_path):
+	# the line-indexed parser of seqQscorer before get_Bowtie_summaries
+	with open(feature_file_path, 'r') as feature_file:
+		lines = feature_file.read()
+	if 'concordantly' in lines and 'discordantly' in lines:
+		return parse_BowtiePE_by_line(lines)
+	else:
+		return parse_BowtieSE_by_line(lines)
+
+def parse_stream(stream_path):
+	with open(stream_path, 'r') as stream:
+		return parser.get_Bowtie_stream_features(stream.read())
+
+def best_time(function, *arguments):
+	times = []
+	for repeat in range(args.repeats):
+		start = time.perf_counter()
+		result = function(*arguments)
+		times.append(time.perf_counter() - start)
+	return min(times), result
+
+utils_dir = repo_dir + 'utils/'
+dataset = synthetic.load_dataset(utils_dir)
+workdir = args.workdir
+if workdir == None:
+	workdir = tempfile.mkdtemp(prefix='seqQscorer_bowtie_')
+
+def get_samples(size):
+	# the stream is written last, hence it marks a complete directory
+	sample_dir = os.path.join(workdir, 'MAP_%d_%d'%(size, args.seed)) + '/'
+	stream_path = sample_dir + 'stream.log'
+	if not os.path.exists(stream_path):
+		sample_IDs = synthetic.generate_samples(sample_dir, dataset, size, args.seed, feature_sets=['MAP'])
+		with open(stream_path + '.tmp', 'w') as stream:
+			for sample_ID in sample_IDs:
+				stream.write(open(sample_dir + sample_ID + '.MAP', 'r').read())
+		os.rename(stream_path + '.tmp', stream_path)
+	file_paths = sorted([sample_dir + name for name in os.listdir(sample_dir) if name.endswith('.MAP')])
+	return file_paths, stream_path
+
+results = []
+table = [['Samples', 'line-indexed (s)', 'per file (s)', 'speedup', 'stream (s)', 'speedup', 'identical']]
+try:
+	for size in [int(size) for size in args.sizes.split(',')]:
+		file_paths, stream_path = get_samples(size)
+		by_line_seconds, by_line = best_time(lambda: [get_MAP_features_by_line(path) for path in file_paths])
+		per_file_seconds, per_file = best_time(lambda: [parser.get_MAP_features(path) for path in file_paths])
+		stream_seconds, stream = best_time(parse_stream, stream_path)
+		identical = by_line == per_file == stream
+		results.append({'samples': size, 'line_indexed_seconds': by_line_seconds,
+						'per_file_seconds': per_file_seconds, 'stream_seconds': stream_seconds,
+						'identical': identical})
+		table.append([str(size), '%.4f'%(by_line_seconds), '%.4f'%(per_file_seconds),
+					'%.1fx'%(by_line_seconds / per_file_seconds), '%.4f'%(stream_seconds),
+					'%.1fx'%(by_line_seconds / stream_seconds), str(identical)])
+		print('%d samples done'%(size))
+finally:
+	if args.workdir == None:
+		shutil.rmtree(workdir)
+
+print('')
+utils.print_nice_table(table)
+
+if args.out != None:
+	json.dump({'repeats': args.repeats, 'results': results}, open(args.out, 'w'), indent=2)
@@ -0,0 +1,220 @@
+"""Scale benchmark of the scoring path
+
+Generates synthetic samples (see synthetic.py) for increasing numbers of
+samples and runs the scoring path of seqQscorer on them: parsing of the
+feature set files, creation of the input data, and prediction by the model
+of the setting. Per size it records
+
+	- the throughput of scoring the whole directory (samples per second),
+	  together with the time of parsing and prediction
+	- latency percentiles of requests scoring --batch samples each, as done
+	  with --sampleID or by the scoring server
+	- the peak memory traced by tracemalloc for parsing and prediction
+	  (measured in a separate run, as tracing slows down the run) and the
+	  peak resident set size of the process so far, which includes the
+	  smaller sizes run before
+
+With --chunkSize the directory is scored chunk by chunk as done by seqQscorer
+with --chunkSize, the traced peak should then not grow with the size.
+
+The results can be written as JSON (--out) and used as baseline of a later
+run (--baseline), a size whose throughput decreases or whose p99 latency
+increases by more than --tolerance fails. The model should be trained
+beforehand (see buildModels.py), otherwise its training is part of the run.
+
+	python benchmarks/scale_benchmark.py --sizes 100,1000,10000 --out scale_baseline.json
+	python benchmarks/scale_benchmark.py --sizes 100,1000,10000 --baseline scale_baseline.json
+
+date:	2026-10-18
+
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+import tracemalloc
+import numpy as np
+
+import warnings
+warnings.filterwarnings("ignore")
+
+script_dir = os.path.dirname(os.path.abspath(sys.argv[0])) + '/'
+repo_dir = os.path.abspath(script_dir + '..') + '/'
+sys.path.insert(0, repo_dir)
+
+import synthetic
+import utils.utils as utils
+import utils.parser as parser
+import utils.scoring as scoring
+import utils.profiling as profiling
+import utils.model_registry as model_registry
+
+argsParser = argparse.ArgumentParser(description='Benchmark the scoring path of seqQscorer on synthetic samples')
+argsParser.add_argument('--sizes', type=str, default='100,1000,10000', help='Comma-separated numbers of samples. Default: 100,1000,10000')
+argsParser.add_argument('--species', '-s', type=str, default='generic', choices=['generic','human','mouse'], help='Species of the model and of the ENCODE data the samples are drawn from.')
+argsParser.add_argument('--assay', '-a', type=str, default='generic', choices=['generic','ChIP-seq','DNase-seq','RNA-seq'], help='Assay of the model and of the ENCODE data the samples are drawn from.')
+argsParser.add_argument('--runtype', '-r', type=str, default='generic', choices=['generic','single-end','paired-end'], help='Run-Type of the model and of the ENCODE data the samples are drawn from.')
+argsParser.add_argument('--workdir', type=str, default=None, help='Directory for the synthetic samples. Samples generated before are reused. By default a temporary directory is used and removed afterwards.')
+argsParser.add_argument('--workers', '-w', type=int, default=1, help='Number of workers used to parse the feature set files. Default: 1')
+argsParser.add_argument('--pool', type=str, default='thread', choices=['thread','process'], help='Type of worker pool used with --workers > 1. Default: thread')
+argsParser.add_argument('--chunkSize', type=int, default=None, help='Score the directory in chunks of this number of samples, as seqQscorer does with --chunkSize. By default all samples are scored at once.')
+argsParser.add_argument('--repeats', type=int, default=1, help='Repetitions of the throughput run per size, the fastest run is reported. Default: 1')
+argsParser.add_argument('--requests', type=int, default=200, help='Number of requests measured for the latency percentiles. Default: 200')
+argsParser.add_argument('--batch', type=int, default=1, help='Number of samples per request. Default: 1')
+argsParser.add_argument('--noise', type=float, default=0.05, help='Standard deviation of the noise added to the features, relative to the standard deviation of each feature. Default: 0.05')
+argsParser.add_argument('--seed', '-rs', type=int, default=1, help='Seed for drawing the samples and the requests. Default: 1')
+argsParser.add_argument('--out', '-o', type=str, default=None, help='Optional JSON file for the results, can be used as baseline.')
+argsParser.add_argument('--baseline', '-b', type=str, default=None, help='JSON file of a previous run to compare with.')
+argsParser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative decrease of the throughput and increase of the p99 latency compared to the baseline. Default: 0.25')
+args = argsParser.parse_args()
+
+utils_dir = repo_dir + 'utils/'
+feature_sets = ['RAW','MAP','LOC','TSS']
+fs_suffix, metric = '', 'auROC'
+species, assay, run_type, fallback = scoring.resolve_setting(utils_dir, args.species, args.assay,
+										args.runtype, feature_sets, fs_suffix, metric)
+application_case = scoring.get_application_case(species, assay, run_type, feature_sets, metric, fs_suffix)
+medians = scoring.load_medians(utils_dir, species, assay, run_type)
+feature_columns = parser.get_feature_columns(feature_sets, run_type, medians)
+selection = utils.get_best_classifier(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric)[2]
+registry = model_registry.get_registry('%smodels/'%(repo_dir))
+model = scoring.get_model(registry, utils_dir, species, assay, run_type, feature_sets, fs_suffix,
+						metric, 1, feature_columns, verbose=True)
+dataset = synthetic.load_dataset(utils_dir, species, assay, run_type)
+print('Benchmarking the model for %s (%s).\n'%(application_case, type(model).__name__))
+
+workdir = args.workdir
+if workdir == None:
+	workdir = tempfile.mkdtemp(prefix='seqQscorer_scale_')
+
+def get_samples(size):
+	# the list of sample IDs is written last, hence it marks a complete directory
+	sample_dir = os.path.join(workdir, '%s_%d_%d'%(application_case, size, args.seed)) + '/'
+	sample_list = sample_dir + 'samples.txt'
+	if os.path.exists(sample_list):
+		return sample_dir, open(sample_list).read().split(), 0.0
+	start = time.perf_counter()
+	sample_IDs = synthetic.generate_samples(sample_dir, dataset, size, args.seed, args.noise, feature_sets)
+	with open(sample_list, 'w') as f:
+		f.write('\n'.join(sample_IDs) + '\n')
+	return sample_dir, sample_IDs, time.perf_counter() - start
+
+def score_directory(sample_dir, profiler=profiling.null_profiler):
+	# the same calls as in seqQscorer, without its prints
+	with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+		start = time.perf_counter()
+		if args.chunkSize != None:
+			return score_chunks(sample_dir, profiler, start)
+		with profiler.stage('parsing'):
+			input_data, columns = parser.generate_input_data(sample_dir, feature_sets, run_type, medians, True,
+															None, args.workers, args.pool)
+		parse_seconds = time.perf_counter() - start
+		with profiler.stage('prediction'):
+			fileID_score = scoring.predict_probabilities(model, input_data, columns, selection)
+	return parse_seconds, time.perf_counter() - start - parse_seconds, len(fileID_score)
+
+def score_chunks(sample_dir, profiler, start):
+	parse_seconds, n_scored = 0.0, 0
+	tasks = parser.get_feature_file_tasks(sample_dir, feature_sets)
+	for chunk in parser.get_sample_chunks(tasks, args.chunkSize):
+		chunk_start = time.perf_counter()
+		with profiler.stage('parsing'):
+			parsed_input = parser.parse_input_files(sample_dir, feature_sets, None, args.workers, args.pool,
+													tasks=chunk, verbose=False)
+			input_data, columns = parser.create_input_data(parsed_input, feature_sets, run_type, medians)
+		parse_seconds += time.perf_counter() - chunk_start
+		with profiler.stage('prediction'):
+			n_scored += len(scoring.predict_probabilities(model, input_data, columns, selection))
+	return parse_seconds, time.perf_counter() - start - parse_seconds, n_scored
+
+def score_request(sample_dir, sample_IDs):
+	tasks = [('%s%s.%s'%(sample_dir, sample_ID, feature_set), feature_set)
+			for sample_ID in sample_IDs for feature_set in feature_sets]
+	parsed_input = dict( (sample_ID, {}) for sample_ID in sample_IDs )
+	for (file_path, feature_set), (features, error) in zip(tasks, parser.parse_feature_files(tasks)):
+		parsed_input[file_path[len(sample_dir):-4]].update(features)
+	input_data, columns = parser.create_input_data(parsed_input, feature_sets, run_type, medians)
+	return scoring.predict_probabilities(model, input_data, columns, selection)
+
+baseline = {}
+if args.baseline != None:
+	baseline = dict( (result['samples'], result) for result in json.load(open(args.baseline))['results'] )
+
+results = []
+failures = []
+table = [['Samples', 'samples/s', 'parsing (s)', 'prediction (s)', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)',
+		'traced peak (MB)', 'process peak RSS (MB)', 'baseline samples/s', 'status']]
+rng = np.random.RandomState(args.seed)
+try:
+	for size in [int(size) for size in args.sizes.split(',')]:
+		sample_dir, sample_IDs, generate_seconds = get_samples(size)
+		if generate_seconds > 0:
+			print('Generated %d samples in %.1f seconds.'%(size, generate_seconds))
+
+		runs = [score_directory(sample_dir) for repeat in range(args.repeats)]
+		parse_seconds, predict_seconds, n_scored = min(runs, key=lambda run: run[0] + run[1])
+		samples_per_second = n_scored / (parse_seconds + predict_seconds)
+
+		latencies = []
+		for request in range(args.requests):
+			batch = [sample_IDs[i] for i in rng.randint(0, len(sample_IDs), args.batch)]
+			start = time.perf_counter()
+			score_request(sample_dir, batch)
+			latencies.append((time.perf_counter() - start) * 1000.0)
+		p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if len(latencies) > 0 else [np.nan] * 3
+
+		profiler = profiling.StageProfiler(True, True)
+		score_directory(sample_dir, profiler)
+		# tracing must not slow down the runs of the next size
+		tracemalloc.stop()
+		traced_peak_mb = max([stage['traced_peak_mb'] for stage in profiler.stages.values()])
+		process_peak_rss_mb = profiling.get_peak_rss_mb()
+
+		status = []
+		if n_scored != size:
+			status.append('%d of %d scored'%(n_scored, size))
+		baseline_samples_per_second = None
+		if size in baseline:
+			baseline_samples_per_second = baseline[size]['samples_per_second']
+			if samples_per_second < baseline_samples_per_second * (1.0 - args.tolerance):
+				status.append('throughput %.0f%% lower'%(100.0 * (1.0 - samples_per_second / baseline_samples_per_second)))
+			if baseline[size]['latency_ms']['p99'] != None and p99 > baseline[size]['latency_ms']['p99'] * (1.0 + args.tolerance):
+				status.append('p99 latency %.0f%% higher'%(100.0 * (p99 / baseline[size]['latency_ms']['p99'] - 1.0)))
+		if len(status) > 0:
+			failures.append(size)
+
+		results.append({'samples': size, 'samples_per_second': samples_per_second,
+						'parse_seconds': parse_seconds, 'predict_seconds': predict_seconds,
+						'latency_ms': {'requests': len(latencies), 'batch': args.batch,
+										'p50': None if len(latencies) == 0 else p50,
+										'p90': None if len(latencies) == 0 else p90,
+										'p99': None if len(latencies) == 0 else p99,
+										'max': None if len(latencies) == 0 else max(latencies)},
+						'traced_peak_mb': dict( (key, stage['traced_peak_mb']) for key, stage in profiler.stages.items() ),
+						'process_peak_rss_mb': process_peak_rss_mb, 'status': status})
+		table.append([str(size), '%.0f'%(samples_per_second), '%.3f'%(parse_seconds), '%.3f'%(predict_seconds),
+					'%.2f'%(p50), '%.2f'%(p90), '%.2f'%(p99), '%.1f'%(traced_peak_mb),
+					'' if process_peak_rss_mb == None else '%.1f'%(process_peak_rss_mb),
+					'' if baseline_samples_per_second == None else '%.0f'%(baseline_samples_per_second),
+					'ok' if len(status) == 0 else '; '.join(status)])
+		print('%d samples done'%(size))
+finally:
+	if args.workdir == None:
+		shutil.rmtree(workdir)
+
+print('')
+utils.print_nice_table(table)
+
+if args.out != None:
+	json.dump({'python': sys.version.split()[0], 'application_case': application_case,
+			'model': type(model).__name__, 'workers': args.workers, 'pool': args.pool, 'chunk_size': args.chunkSize,
+			'noise': args.noise, 'seed': args.seed, 'results': results}, open(args.out, 'w'), indent=2)
+
+if len(failures) > 0:
+	print('\nFailed sizes: %s'%(', '.join(map(str, failures))))
+	exit(1)
@@ -0,0 +1,118 @@
+"""Start-up benchmark of the seqQscorer scripts
+
+Runs the scripts with "python -X importtime" and reports the wall time, the
+total import time, and the modules that take longest to import. Each scenario
+lists modules that must not be imported (e.g. scikit-learn for --help), a
+scenario importing one of them fails. With --baseline the import times are
+compared to a previous run (--out), a scenario more than --tolerance slower
+fails as well, so that import-time regressions are caught.
+
+The scenario scoring one sample uses the generic model; it should be trained
+beforehand (see buildModels.py), otherwise the training dominates the time.
+
+	python benchmarks/startup_benchmark.py --out startup_baseline.json
+	python benchmarks/startup_benchmark.py --baseline startup_baseline.json
+
+date:	2026-10-18
+
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+script_dir = os.path.dirname(os.path.abspath(sys.argv[0])) + '/'
+repo_dir = os.path.abspath(script_dir + '..') + '/'
+sys.path.insert(0, repo_dir)
+
+import utils.utils as utils
+
+# name, arguments, modules that must not be imported
+global scenarios
+scenarios = [('seqQscorer --help', ['seqQscorer.py', '--help'], ['sklearn', 'pandas', 'scipy']),
+			('guidelineReports --help', ['guidelineReports.py', '--help'], ['sklearn', 'pandas', 'seaborn', 'matplotlib']),
+			('trainNewModel --help', ['trainNewModel.py', '--help'], ['sklearn', 'pandas']),
+			('seqQscorer one sample', ['seqQscorer.py', '--indir', 'feature_set_examples/',
+										'--sampleID', 'ENCFF137DWP', '--noVerbose'], ['pandas'])]
+
+argsParser = argparse.ArgumentParser(description='Benchmark the start-up time of the seqQscorer scripts')
+argsParser.add_argument('--repeats', type=int, default=5, help='Repetitions per scenario, the fastest run is reported. Default: 5')
+argsParser.add_argument('--top', type=int, default=10, help='Number of slowest top-level imports listed per scenario. Default: 10')
+argsParser.add_argument('--out', '-o', type=str, default=None, help='Optional JSON file for the results, can be used as baseline.')
+argsParser.add_argument('--baseline', '-b', type=str, default=None, help='JSON file of a previous run to compare with.')
+argsParser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative increase of the import time compared to the baseline. Default: 0.25')
+args = argsParser.parse_args()
+
+def parse_importtime(stderr):
+	# lines look like "import time:  self [us] | cumulative | imported package"
+	modules = []
+	for line in stderr.splitlines():
+		if not line.startswith('import time:') or line.endswith('imported package'):
+			continue
+		self_us, cumulative_us, name = line[len('import time:'):].split('|')
+		depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+		modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+	return modules
+
+def run_scenario(arguments):
+	start = time.perf_counter()
+	process = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, cwd=repo_dir,
+							stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+	wall_seconds = time.perf_counter() - start
+	modules = parse_importtime(process.stderr)
+	import_seconds = sum([module[2] for module in modules if module[3] == 0]) / 1e6
+	return wall_seconds, import_seconds, modules, process
+
+baseline = {}
+if args.baseline != None:
+	baseline = dict( (result['scenario'], result) for result in json.load(open(args.baseline))['results'] )
+
+results = []
+failures = []
+table = [['Scenario', 'wall (s)', 'imports (s)', 'modules', 'baseline (s)', 'status']]
+for name, arguments, forbidden in scenarios:
+	runs = [run_scenario(arguments) for repeat in range(args.repeats)]
+	wall_seconds = min([run[0] for run in runs])
+	import_seconds, modules, process = min(runs, key=lambda run: run[1])[1:]
+
+	status = []
+	if process.returncode != 0:
+		status.append('exit code %d'%(process.returncode))
+	if process.stdout.find('needs to be trained') >= 0:
+		status.append('model was trained')
+	imported = set([module[0] for module in modules])
+	violations = [module for module in forbidden if module in imported]
+	if len(violations) > 0:
+		status.append('imports %s'%(', '.join(violations)))
+	baseline_seconds = None
+	if name in baseline:
+		baseline_seconds = baseline[name]['import_seconds']
+		if import_seconds > baseline_seconds * (1.0 + args.tolerance):
+			status.append('%.0f%% slower'%(100.0 * (import_seconds / baseline_seconds - 1.0)))
+	if len(status) > 0:
+		failures.append(name)
+
+	top = sorted([module for module in modules if module[3] == 0], key=lambda x: -x[2])[:args.top]
+	results.append({'scenario': name, 'arguments': arguments, 'wall_seconds': wall_seconds,
+					'import_seconds': import_seconds, 'modules': len(modules),
+					'top_imports': [{'module': module[0], 'cumulative_seconds': module[2] / 1e6} for module in top],
+					'status': status})
+	table.append([name, '%.3f'%(wall_seconds), '%.3f'%(import_seconds), str(len(modules)),
+				'' if baseline_seconds == None else '%.3f'%(baseline_seconds),
+				'ok' if len(status) == 0 else '; '.join(status)])
+
+utils.print_nice_table(table)
+for result in results:
+	print('\nSlowest top-level imports of "%s":'%(result['scenario']))
+	for module in result['top_imports']:
+		print('\t%.3f s\t%s'%(module['cumulative_seconds'], module['module']))
+
+if args.out != None:
+	json.dump({'python': sys.version.split()[0], 'results': results}, open(args.out, 'w'), indent=2)
+
+if len(failures) > 0:
+	print('\nFailed scenarios: %s'%(', '.join(failures)))
+	exit(1)
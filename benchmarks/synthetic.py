@@ -0,0 +1,150 @@
+"""Synthetic samples
+
+Generates feature set files (.RAW, .MAP, .LOC, .TSS) of synthetic samples for
+benchmarks. Each synthetic sample is a sample of the ENCODE data provided in
+utils/datasets, drawn with replacement, whose continuous features are
+perturbed by Gaussian noise. The joint distribution of the features is
+therefore close to the one of real samples, while the samples do not repeat.
+The files are written in the formats of the tools used by deriveFeatureSets.py
+(FastQC summary, Bowtie2 log, ChIPseeker and ChIPpeakAnno tables), so that
+they pass through the same parser as real input.
+
+Methods
+-------
+
+load_dataset(utils_dir, species='generic', assay='generic', run_type='generic')
+	returns the ENCODE data of a setting as data frame
+draw_samples(dataset, n_samples, seed=1, noise=0.05)
+	returns a data frame with n_samples synthetic samples
+write_sample(outdir, sample_ID, features, feature_sets=['RAW','MAP','LOC','TSS'])
+	writes the feature set files of one sample
+generate_samples(outdir, dataset, n_samples, seed=1, noise=0.05, feature_sets=['RAW','MAP','LOC','TSS'])
+	draws n_samples synthetic samples, writes their files to outdir and
+	returns their sample IDs
+
+date:	2026-10-18
+
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# FastQC modules as named in the summary file
+global FastQC_labels
+FastQC_labels = {0: 'FAIL', 1: 'WARN', 2: 'PASS'}
+
+# rows of the ChIPseeker table: (row number, annotation, feature)
+global LOC_rows
+LOC_rows = [('9', 'Promoter', 'readsAnno_Promoter'),
+			('4', "5' UTR", 'readsAnno_5_UTR'),
+			('3', "3' UTR", 'readsAnno_3_UTR'),
+			('1', '1st Exon', 'readsAnno_1st_Exon'),
+			('7', 'Other Exon', 'readsAnno_Other_Exon'),
+			('2', '1st Intron', 'readsAnno_1st_Intron'),
+			('8', 'Other Intron', 'readsAnno_Other_Intron'),
+			('6', 'Downstream (<=300)', 'readsAnno_Downstream'),
+			('5', 'Distal Intergenic', 'readsAnno_Distal_Intergenic')]
+
+global TSS_distances
+TSS_distances = [-4500, -3500, -2500, -1500, -500, 500, 1500, 2500, 3500, 4500]
+
+# number of reads assumed for the counts in the Bowtie2 log and the TSS table
+global n_reads
+n_reads = 20000000
+
+
+def load_dataset(utils_dir, species='generic', assay='generic', run_type='generic'):
+	return pd.read_csv('%sdatasets/%s_%s_%s.tsv'%(utils_dir, assay, species, run_type), sep='\t')
+
+def draw_samples(dataset, n_samples, seed=1, noise=0.05):
+	rng = np.random.RandomState(seed)
+	samples = dataset.iloc[rng.randint(0, dataset.shape[0], n_samples)].reset_index(drop=True)
+	columns = [col for col in samples.columns if col.split('_')[0] in ['BowtieSE', 'BowtieMI', 'BowtiePE', 'readsAnno', 'TSS']]
+	values = np.array(samples[columns], dtype=float)
+	# the noise is scaled by the standard deviation of each feature, all features are percentages
+	scale = np.nan_to_num(np.nanstd(np.array(dataset[columns], dtype=float), axis=0)) * noise
+	values += rng.normal(0.0, 1.0, values.shape) * scale
+	samples[columns] = np.clip(values, 0.0, 100.0)
+	return samples
+
+def get_percent(features, name):
+	value = features.get(name, np.nan)
+	return 0.0 if pd.isnull(value) else float(value)
+
+def write_RAW(file_path, sample_ID, features):
+	with open(file_path, 'w') as f:
+		for name in sorted(features.keys()):
+			if name.startswith('FastQC_') and not pd.isnull(features[name]):
+				f.write('%s\t%s\t%s.fastq.gz\n'%(FastQC_labels[int(features[name])],
+												name[len('FastQC_'):].replace('_', ' '), sample_ID))
+
+def count_line(indent, percent, total, text):
+	return '%s%d (%.2f%%) %s\n'%(' ' * indent, int(round(total * percent / 100.0)), percent, text)
+
+def write_MAP(file_path, features):
+	with open(file_path, 'w') as f:
+		if pd.isnull(features.get('BowtiePE_con_no_mapping', np.nan)):
+			f.write('%d reads; of these:\n'%(n_reads))
+			f.write('  %d (100.00%%) were unpaired; of these:\n'%(n_reads))
+			f.write(count_line(4, get_percent(features, 'BowtieSE_no_mapping'), n_reads, 'aligned 0 times'))
+			f.write(count_line(4, get_percent(features, 'BowtieSE_uniquely'), n_reads, 'aligned exactly 1 time'))
+			f.write(count_line(4, get_percent(features, 'BowtieSE_multiple'), n_reads, 'aligned >1 times'))
+			f.write('%.2f%% overall alignment rate\n'%(get_percent(features, 'BowtieSE_overall')))
+			return
+		pairs = n_reads // 2
+		con_no_mapping = get_percent(features, 'BowtiePE_con_no_mapping')
+		not_concordant = int(round(pairs * con_no_mapping / 100.0))
+		not_aligned = int(round(not_concordant * (100.0 - get_percent(features, 'BowtiePE_dis_uniquely')) / 100.0))
+		f.write('%d reads; of these:\n'%(pairs))
+		f.write('  %d (100.00%%) were paired; of these:\n'%(pairs))
+		f.write(count_line(4, con_no_mapping, pairs, 'aligned concordantly 0 times'))
+		f.write(count_line(4, get_percent(features, 'BowtiePE_con_uniquely'), pairs, 'aligned concordantly exactly 1 time'))
+		f.write(count_line(4, get_percent(features, 'BowtiePE_con_multiple'), pairs, 'aligned concordantly >1 times'))
+		f.write('    ----\n')
+		f.write('    %d pairs aligned concordantly 0 times; of these:\n'%(not_concordant))
+		f.write(count_line(6, get_percent(features, 'BowtiePE_dis_uniquely'), not_concordant, 'aligned discordantly 1 time'))
+		f.write('    ----\n')
+		f.write('    %d pairs aligned 0 times concordantly or discordantly; of these:\n'%(not_aligned))
+		f.write('      %d mates make up the pairs; of these:\n'%(2 * not_aligned))
+		f.write(count_line(8, get_percent(features, 'BowtiePE_cod_no_mapping'), 2 * not_aligned, 'aligned 0 times'))
+		f.write(count_line(8, get_percent(features, 'BowtiePE_cod_uniquely'), 2 * not_aligned, 'aligned exactly 1 time'))
+		f.write(count_line(8, get_percent(features, 'BowtiePE_cod_multiple'), 2 * not_aligned, 'aligned >1 times'))
+		f.write('%.2f%% overall alignment rate\n'%(get_percent(features, 'BowtiePE_overall')))
+
+def write_LOC(file_path, features):
+	with open(file_path, 'w') as f:
+		f.write('"Feature"\t"Frequency"\n')
+		for row, annotation, name in LOC_rows:
+			f.write('"%s"\t"%s"\t%s\n'%(row, annotation, repr(get_percent(features, name))))
+
+def write_TSS(file_path, features):
+	with open(file_path, 'w') as f:
+		f.write('"reads"\t"tss_dist"\t"perc"\n')
+		for distance in TSS_distances:
+			name = 'TSS_%s%d'%('+' if distance > 0 else '', distance)
+			percent = get_percent(features, name)
+			f.write('%d\t%d\t%s\n'%(int(round(n_reads * percent / 100.0)), distance, repr(percent)))
+
+def write_sample(outdir, sample_ID, features, feature_sets=['RAW','MAP','LOC','TSS']):
+	file_path = os.path.join(outdir, sample_ID)
+	if 'RAW' in feature_sets:
+		write_RAW(file_path + '.RAW', sample_ID, features)
+	if 'MAP' in feature_sets:
+		write_MAP(file_path + '.MAP', features)
+	if 'LOC' in feature_sets:
+		write_LOC(file_path + '.LOC', features)
+	if 'TSS' in feature_sets:
+		write_TSS(file_path + '.TSS', features)
+
+def generate_samples(outdir, dataset, n_samples, seed=1, noise=0.05, feature_sets=['RAW','MAP','LOC','TSS']):
+	if not os.path.exists(outdir):
+		os.makedirs(outdir)
+	samples = draw_samples(dataset, n_samples, seed, noise)
+	sample_IDs = []
+	digits = len(str(n_samples))
+	for i, features in enumerate(samples.to_dict('records')):
+		sample_ID = 'SYN%0*d'%(digits, i)
+		write_sample(outdir, sample_ID, features, feature_sets)
+		sample_IDs.append(sample_ID)
+	return sample_IDs
@@ -0,0 +1,96 @@
+"""Benchmark of the tree engine against scikit-learn
+
+Compares the time of predict_proba of a scikit-learn tree ensemble and of
+the same model compiled by utils/tree_engine.py for increasing batch sizes.
+The batches are sampled from the ENCODE data in utils/datasets. By default
+the model for the generic setting and all feature sets is used, another
+serialized model can be given by --model.
+
+	python benchmarks/tree_engine_benchmark.py --sizes 1,10,100,1000,10000,100000,1000000
+
+date:	2026-10-18
+
+"""
+
+import os
+import sys
+import time
+import json
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+
+import warnings
+warnings.filterwarnings("ignore")
+
+script_dir = os.path.dirname(os.path.abspath(sys.argv[0])) + '/'
+repo_dir = os.path.abspath(script_dir + '..') + '/'
+sys.path.insert(0, repo_dir)
+
+import utils.utils as utils
+import utils.parser as parser
+import utils.scoring as scoring
+import utils.tree_engine as tree_engine
+
+argsParser = argparse.ArgumentParser(description='Benchmark the tree engine against scikit-learn')
+argsParser.add_argument('--model', '-m', type=str, default=None, help='Serialized tree ensemble to be benchmarked. By default the generic model (all feature sets, auROC) is trained.')
+argsParser.add_argument('--sizes', type=str, default='1,10,100,1000,10000,100000,1000000', help='Comma-separated batch sizes.')
+argsParser.add_argument('--repeats', type=int, default=3, help='Repetitions per batch size, the fastest run is reported.')
+argsParser.add_argument('--out', '-o', type=str, default=None, help='Optional JSON file for the results.')
+args = argsParser.parse_args()
+
+utils_dir = repo_dir + 'utils/'
+feature_sets = ['RAW','MAP','LOC','TSS']
+medians = scoring.load_medians(utils_dir, 'generic', 'generic', 'generic')
+feature_columns = parser.get_feature_columns(feature_sets, 'generic', medians)
+best_clf, feature_selection, selection, parameters, auROC, brier = utils.get_best_classifier(
+						utils_dir, 'generic', 'generic', 'generic', feature_sets, '', 'auROC')
+
+if args.model != None:
+	model = pickle.load(open(args.model, 'rb'))
+else:
+	print('Training the generic model...')
+	model = scoring.train_model(utils_dir, 'generic', 'generic', 'generic', feature_columns,
+								best_clf, selection, parameters, 1)
+
+start = time.perf_counter()
+compiled = tree_engine.compile_model(model)
+compile_seconds = time.perf_counter() - start
+print('Compiled %d trees with %d nodes in %.3f seconds.\n'%(len(compiled.roots), len(compiled.feature), compile_seconds))
+
+# sample batches from the ENCODE data, restricted to the features of the model
+data = pd.read_csv('%sdatasets/generic_generic_generic.tsv'%(utils_dir), sep='\t')
+X_data = np.array(data[feature_columns].fillna(data[feature_columns].median()), dtype=float)
+if selection != None and args.model == None:
+	X_data = X_data[:, selection]
+X_data = X_data[:, :model.n_features_in_]
+
+def best_time(function, X):
+	times = []
+	for repeat in range(args.repeats):
+		start = time.perf_counter()
+		result = function(X)
+		times.append(time.perf_counter() - start)
+	return min(times), result
+
+results = []
+table = [['Batch size', 'scikit-learn (s)', 'tree engine (s)', 'speedup', 'identical']]
+rng = np.random.RandomState(1)
+for size in [int(size) for size in args.sizes.split(',')]:
+	X = X_data[rng.randint(0, X_data.shape[0], size)]
+	sklearn_seconds, sklearn_proba = best_time(model.predict_proba, X)
+	engine_seconds, engine_proba = best_time(compiled.predict_proba, X)
+	identical = bool(np.array_equal(sklearn_proba, engine_proba))
+	results.append({'batch_size': size, 'sklearn_seconds': sklearn_seconds,
+					'engine_seconds': engine_seconds, 'identical': identical})
+	table.append([str(size), '%.5f'%(sklearn_seconds), '%.5f'%(engine_seconds),
+				'%.1fx'%(sklearn_seconds / engine_seconds), str(identical)])
+	print('batch size %d done'%(size))
+
+print('')
+utils.print_nice_table(table)
+
+if args.out != None:
+	json.dump({'model': type(model).__name__, 'trees': len(compiled.roots),
+			'compile_seconds': compile_seconds, 'results': results}, open(args.out, 'w'), indent=2)
@@ -0,0 +1,134 @@
+"""Train and serialize the models of all application cases ahead of time.
+
+seqQscorer trains the model of an application case on its first use, which
+delays the first request for the duration of the training. This script
+trains the models of all application cases listed in the best_algo_params
+tables (both metrics, with and without feature selection) in parallel on a
+process pool and writes them atomically into the folder "models". The fit
+time of every model is reported, so that a deployment can start with all
+models available.
+
+	python buildModels.py --workers 8 --report build_report.tsv
+
+date:	2026-10-18
+
+"""
+
+from sys import *
+import os
+import re
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# import project utils
+import utils.Exceptions as myExceptions
+import utils.utils as utils
+import utils.parser as parser
+import utils.scoring as scoring
+import utils.model_format as model_format
+import utils.model_registry as model_registry
+
+# parse command line arguments
+script_dir = './'
+if argv[0].find('/') >= 0:
+	script_dir = argv[0][: - argv[0][::-1].find('/')]
+utils_dir = '%sutils/'%(script_dir)
+models_dir = '%smodels/'%(script_dir)
+
+argsParser = argparse.ArgumentParser(description='Train and serialize the models of all application cases ahead of time')
+argsParser.add_argument('--workers', '-w', type=int, default=os.cpu_count(), help='Number of processes training models in parallel. Default: number of CPUs')
+argsParser.add_argument('--seed', '-rs', type=int, default=1, help='Seed used for the models, as used by seqQscorer with --seed. Default: 1')
+argsParser.add_argument('--match', type=str, default=None, help='Only build the application cases matching this regular expression, e.g. "^human_ChIP-seq".')
+argsParser.add_argument('--format', '-f', type=str, default='pickle', choices=['pickle', 'qmodel'], help='Format of the models. With "qmodel" the pickle-free format is used where possible (see convertModels.py). Default: pickle')
+argsParser.add_argument('--force', action='store_true', help='Train models again that are already serialized.')
+argsParser.add_argument('--report', '-o', type=str, default=None, help='Optional tab-separated file for the fit time and status per model.')
+args = argsParser.parse_args()
+
+if args.seed == -1:
+	raise myExceptions.WrongSettingException(
+		'Only reproducible models are serialized, please use a seed different to -1.')
+
+all_medians = scoring.load_all_medians(utils_dir)
+registry = model_registry.ModelRegistry(models_dir)
+
+tasks, skipped = [], []
+for species, assay, run_type, feature_sets, metric, fs_suffix in scoring.list_application_cases(utils_dir):
+	application_case = scoring.get_application_case(species, assay, run_type, feature_sets, metric, fs_suffix)
+	if args.match != None and re.search(args.match, application_case) == None:
+		continue
+	data_file_path = '%sdatasets/%s_%s_%s.tsv'%(utils_dir, assay, species, run_type)
+	if not os.path.exists(data_file_path):
+		skipped.append((application_case, 'no training data'))
+		continue
+	key = registry.get_key(species, assay, run_type, feature_sets, metric, fs_suffix, args.seed)
+	existing = [registry.get_model_file_path(key, suffix) for suffix in ['.model', model_format.model_suffix]]
+	if not args.force and any([os.path.exists(path) for path in existing]):
+		skipped.append((application_case, 'already serialized'))
+		continue
+	feature_columns = parser.get_feature_columns(feature_sets, run_type, all_medians[species][assay][run_type])
+	tasks.append(((utils_dir, models_dir, species, assay, run_type, feature_sets, metric, fs_suffix,
+				args.seed, feature_columns, args.format, args.force), os.path.getsize(data_file_path)))
+
+# the largest training sets are trained first, so that no long training is started last
+tasks = [task for task, size in sorted(tasks, key=lambda x: -x[1])]
+print('%d model(s) to be trained, %d skipped.'%(len(tasks), len(skipped)))
+for application_case, reason in skipped:
+	if reason != 'already serialized':
+		print('\t%s skipped (%s)'%(application_case, reason))
+
+results = []
+start = time.perf_counter()
+if len(tasks) > 0:
+	with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+		futures = [executor.submit(scoring.build_model, task) for task in tasks]
+		for future in as_completed(futures):
+			result = future.result()
+			results.append(result)
+			if result['skipped'] != None:
+				print('[%d/%d] %s (%s) skipped, %s'%(len(results), len(tasks),
+						result['application_case'], result['classifier'], result['skipped']))
+			elif result['error'] == None:
+				print('[%d/%d] %s (%s) trained in %.2f seconds'%(len(results), len(tasks),
+						result['application_case'], result['classifier'], result['fit_seconds']))
+			else:
+				print('[%d/%d] %s (%s) failed: %s'%(len(results), len(tasks),
+						result['application_case'], result['classifier'], result['error']))
+total_seconds = time.perf_counter() - start
+
+failed = [result for result in results if result['error'] != None]
+fit_times = [result['fit_seconds'] for result in results if result['error'] == None and result['skipped'] == None]
+print('\n%d model(s) trained in %.1f seconds (wall time), %d failed.'%(len(fit_times), total_seconds, len(failed)))
+if len(fit_times) > 0:
+	table = [['Classifier', 'Models', 'Total fit (s)', 'Max fit (s)']]
+	trained = [result for result in results if result['error'] == None and result['skipped'] == None]
+	for clf in sorted(set([result['classifier'] for result in trained])):
+		clf_times = [result['fit_seconds'] for result in trained if result['classifier'] == clf]
+		table.append([clf, str(len(clf_times)), '%.2f'%(sum(clf_times)), '%.2f'%(max(clf_times))])
+	utils.print_nice_table(table)
+
+# write fit time and status per model to file if a file-path is given
+if args.report != None:
+	report = 'application_case\tclassifier\tstatus\tfit_seconds\twrite_seconds\tmodel_file\n'
+	for result in sorted(results, key=lambda x: x['application_case']):
+		status = 'trained' if result['error'] == None else 'failed: %s'%(result['error'])
+		if result['skipped'] != None:
+			status = 'skipped: %s'%(result['skipped'])
+		fit_seconds = '' if result['fit_seconds'] == None else '%.4f'%(result['fit_seconds'])
+		write_seconds = '' if result['write_seconds'] == None else '%.4f'%(result['write_seconds'])
+		model_file = '' if result['model_file_path'] == None else os.path.basename(result['model_file_path'])
+		report += '%s\t%s\t%s\t%s\t%s\t%s\n'%(result['application_case'], result['classifier'],
+											status, fit_seconds, write_seconds, model_file)
+	for application_case, reason in skipped:
+		report += '%s\t\tskipped: %s\t\t\t\n'%(application_case, reason)
+	try:
+		open(args.report, 'w').write(report)
+	except:
+		raise myExceptions.WrongOutputFileException(
+			'Unable to write the report to file!')
+
+if len(failed) > 0:
+	exit(1)
@@ -0,0 +1,113 @@
+"""Convert serialized models into the pickle-free model format.
+
+Models in the folder "models" (trained by seqQscorer) and models trained by
+"trainNewModel.py" are pickles of scikit-learn classifiers. This script
+converts them into the format of utils/model_format.py, a directory with a
+JSON header and raw NumPy arrays that seqQscorer loads memory-mapped. The
+feature column order and the feature selection mask are embedded.
+
+For models within the folder "models" the setting is derived from the file
+name. For other models, e.g. trained by "trainNewModel.py", the setting has
+to be given by --species, --assay, --runtype, and the --noRAW/... options
+exactly as used for training.
+
+	python convertModels.py --all
+	python convertModels.py --model own.model --out own.qmodel --species human --assay ChIP-seq --runtype single-end
+
+date:	2026-10-18
+
+"""
+
+from sys import *
+import os
+import glob
+import pickle
+import argparse
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# import project utils
+import utils.Exceptions as myExceptions
+import utils.utils as utils
+import utils.parser as parser
+import utils.scoring as scoring
+import utils.model_format as model_format
+
+# parse command line arguments
+script_dir = './'
+if argv[0].find('/') >= 0:
+	script_dir = argv[0][: - argv[0][::-1].find('/')]
+utils_dir = '%sutils/'%(script_dir)
+
+argsParser = argparse.ArgumentParser(description='Convert serialized models into the pickle-free model format of seqQscorer')
+argsParser.add_argument('--model', '-m', type=str, nargs='+', default=[], help='Serialized model(s) to be converted.')
+argsParser.add_argument('--all', action='store_true', help='Convert all models within the folder "models".')
+argsParser.add_argument('--out', '-o', type=str, default=None, help='Output path, only if a single model is converted. By default the file ending ".model" is replaced by ".qmodel".')
+argsParser.add_argument('--species', '-s', type=str, default='generic',
+						choices=['generic','human', 'mouse'],  help='Species used to train the model (models not from the folder "models").')
+argsParser.add_argument('--assay', '-a', type=str, default='generic',
+						choices=['generic','ChIP-seq','DNase-seq','RNA-seq'], help='Assay used to train the model (models not from the folder "models").')
+argsParser.add_argument('--runtype', '-r', type=str, default='generic',
+						choices=['generic','single-end','paired-end'], help='Run-Type used to train the model (models not from the folder "models").')
+argsParser.add_argument('--noRAW', action='store_true', help='The model was trained without RAW features.')
+argsParser.add_argument('--noMAP', action='store_true', help='The model was trained without MAP features.')
+argsParser.add_argument('--noLOC', action='store_true', help='The model was trained without LOC features.')
+argsParser.add_argument('--noTSS', action='store_true', help='The model was trained without TSS features.')
+args = argsParser.parse_args()
+
+model_file_paths = list(args.model)
+if args.all:
+	model_file_paths += sorted(glob.glob('%smodels/*.model'%(script_dir)))
+if len(model_file_paths) == 0:
+	raise myExceptions.WrongSettingException(
+		'Provide models to be converted by --model or use --all.')
+if args.out != None and len(model_file_paths) != 1:
+	raise myExceptions.WrongSettingException(
+		'--out can only be used if a single model is converted.')
+
+all_medians = scoring.load_all_medians(utils_dir)
+
+def get_model_setting(model_file_path):
+	key = scoring.parse_model_file_name(model_file_path)
+	if key != None:
+		# model trained by seqQscorer, the selection is the one of the best_algo_params table
+		species, assay, run_type, feature_sets, metric, fs_suffix, seed = key
+		feature_sets = feature_sets.split('-')
+		selection = utils.get_best_classifier(utils_dir, species, assay, run_type,
+											feature_sets, fs_suffix, metric)[2]
+		application_case = scoring.get_application_case(species, assay, run_type, feature_sets, metric, fs_suffix)
+		return species, assay, run_type, feature_sets, selection, application_case
+
+	# model trained by trainNewModel.py on all features of the given setting,
+	# which falls back to the generic setting as done for training
+	species, assay, run_type = args.species, args.assay, args.runtype
+	feature_sets = scoring.get_feature_sets(args.noRAW, args.noMAP, args.noLOC, args.noTSS)
+	if utils.get_best_classifier(utils_dir, species, assay, run_type, feature_sets, '_noFS', 'auROC')[0] == None:
+		species, assay, run_type = 'generic', 'generic', 'generic'
+	return species, assay, run_type, feature_sets, None, None
+
+converted = 0
+for model_file_path in model_file_paths:
+	out_path = args.out
+	if out_path == None:
+		out_path = model_file_path[:-len('.model')] if model_file_path.endswith('.model') else model_file_path
+		out_path += model_format.model_suffix
+
+	try:
+		model = pickle.load(open(model_file_path, 'rb'))
+	except:
+		raise myExceptions.IncorrectModelException(
+			'The provided model from file "%s" could not be loaded.'%(model_file_path))
+	if not model_format.is_convertible(model):
+		print('%s: skipped, models of type %s are kept as pickle.'%(model_file_path, type(model).__name__))
+		continue
+
+	species, assay, run_type, feature_sets, selection, application_case = get_model_setting(model_file_path)
+	feature_columns = parser.get_feature_columns(feature_sets, run_type, all_medians[species][assay][run_type])
+	model_format.save_model(model, out_path, feature_columns, selection, (species, assay, run_type),
+							feature_sets, application_case)
+	converted += 1
+	print('%s: converted to %s'%(model_file_path, out_path))
+
+print('\n%d of %d model(s) converted.'%(converted, len(model_file_paths)))
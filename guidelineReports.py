@@ -13,25 +13,12 @@ author:	Steffen Albrecht
 
 from sys import *
 import os
-import pickle
-import pandas as pd
-import numpy as np
-import json
-import random
 import argparse
-import copy
 
 import warnings
 warnings.filterwarnings("ignore")
 
-# import project utils
 import utils.Exceptions as myExceptions
-import utils.utils as utils
-import utils.parser as parser
-
-import seaborn as sns
-import matplotlib
-import matplotlib.pyplot as plt
 
 # parse command line arguments
 script_dir = './'
@@ -40,7 +27,8 @@ if argv[0].find('/') >= 0:
 utils_dir = '%sutils/'%(script_dir)
 
 argsParser = argparse.ArgumentParser(description='inspectSamples - Creates a report as statistical guidelines for manual inspection.')
-argsParser.add_argument('--indir', '-i', type=str, required=True, help='Input directory containing the feature set files. The feature set files are perfectly fomated by the script "deriveFeatures.py": the file names (until the ".") define the sample ID while the file endings define the corresponding feature set RAW, MAP, LOC, and TSS. By default seqQscorer applies the machine learning model to all samples from the given directory within milliseconds. However, it can be restricted to one sample using --sampleID.')
+argsParser.add_argument('--indir', '-i', type=str, default=None, help='Input directory containing the feature set files. The feature set files are perfectly fomated by the script "deriveFeatures.py": the file names (until the ".") define the sample ID while the file endings define the corresponding feature set RAW, MAP, LOC, and TSS. By default seqQscorer applies the machine learning model to all samples from the given directory within milliseconds. However, it can be restricted to one sample using --sampleID. A tar or zip archive containing the feature set files can be given instead of a directory. Either --indir or --store is required.')
+argsParser.add_argument('--store', type=str, default=None, help='Feature store to read the features from instead of the feature set files of --indir, created with ingestFeatures.py.')
 argsParser.add_argument('--species', '-s', type=str, default='generic', 
 						choices=['generic','human', 'mouse'],  help='Species specifying the model used.')
 argsParser.add_argument('--assay', '-a', type=str, default='generic', 
@@ -53,9 +41,28 @@ argsParser.add_argument('--sampleID', '-id', type=str, default=None,
 						help='Restrict application of seqQscorer to only one sample defined by the ID.')
 args = argsParser.parse_args()
 
-if not os.path.isdir(args.indir):
+if (args.indir == None) == (args.store == None):
+	raise myExceptions.WrongSettingException(
+		'Please specify either an input directory (--indir) or a feature store (--store).')
+
+# heavy modules are imported after checking the arguments, so that --help returns instantly
+import pickle
+import pandas as pd
+import numpy as np
+import json
+import random
+import copy
+import seaborn as sns
+import matplotlib
+import matplotlib.pyplot as plt
+
+# import project utils
+import utils.utils as utils
+import utils.parser as parser
+
+if args.indir != None and not os.path.isdir(args.indir) and not parser.is_archive(args.indir):
 	raise myExceptions.WrongFeatureInputException(
-						'"%s" is not a directory'%(args.indir))
+						'"%s" is neither a directory nor a tar or zip archive'%(args.indir))
 
 outdir = args.outdir if args.outdir[-1] == '/' else args.outdir + '/'
 if not os.path.exists(outdir):
@@ -67,7 +74,13 @@ medians = medians['generic']['generic']['generic']
 
 # parse given input files
 feature_sets = ['RAW','MAP','LOC','TSS']
-input_data, feature_columns = parser.generate_input_data(args.indir, feature_sets, 'generic', medians, True, args.sampleID)
+if args.store != None:
+	import utils.feature_store as feature_store
+	feature_columns = parser.get_feature_columns(feature_sets, 'generic', medians)
+	parsed_input = feature_store.FeatureStore(args.store).read(feature_sets, feature_columns, restrict=args.sampleID)
+	input_data, feature_columns = parser.create_input_data(parsed_input, feature_sets, 'generic', medians)
+else:
+	input_data, feature_columns = parser.generate_input_data(args.indir, feature_sets, 'generic', medians, True, args.sampleID)
 
 # load the generic dataset and specify it according to the user setting
 data = pd.read_csv('./utils/datasets/generic_generic_generic.tsv', sep='\t')
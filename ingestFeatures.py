@@ -0,0 +1,62 @@
+"""Ingest feature set files into a feature store.
+
+Parses the feature set files (RAW, MAP, LOC, TSS) of an input directory and
+adds the features into a single indexed SQLite file, the feature store (see
+utils/feature_store.py). seqQscorer.py, trainNewModel.py, and
+guidelineReports.py read the features from the store with --store instead of
+parsing the files with --indir, which avoids reading hundreds of thousands of
+small files on shared file systems. Files ingested before are skipped unless
+they changed, hence the ingestion can be repeated when new samples arrive.
+
+	python ingestFeatures.py --indir ./feature_sets/ --store ./features.sqlite
+	python seqQscorer.py --store ./features.sqlite --probOut ./probabilities.tsv
+
+date:	2026-10-18
+
+"""
+
+from sys import *
+import os
+import time
+import argparse
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# import project utils
+import utils.Exceptions as myExceptions
+import utils.parser as parser
+import utils.feature_store as feature_store
+
+argsParser = argparse.ArgumentParser(description='Ingest feature set files into a feature store')
+argsParser.add_argument('--indir', '-i', type=str, required=True, help='Input directory containing the feature set files, named as for seqQscorer (e.g. ENCFF165NJF.RAW or ENCFF165NJF.RAW.gz), or a tar or zip archive containing them.')
+argsParser.add_argument('--store', type=str, required=True, help='File of the feature store, it is created if it does not exist.')
+argsParser.add_argument('--sampleID', '-id', type=str, default=None, help='Restrict the ingestion to one sample defined by the ID.')
+argsParser.add_argument('--force', action='store_true', help='Ingest files again that did not change since they were ingested.')
+argsParser.add_argument('--batchSize', type=int, default=10000, help='Number of files parsed and committed to the store at a time. Default: 10000')
+argsParser.add_argument('--workers', '-w', type=int, default=1, help='Number of workers used to parse the feature set files. Default: 1')
+argsParser.add_argument('--pool', type=str, default='thread', choices=['thread', 'process'], help='Type of worker pool used with --workers > 1. Default: thread')
+args = argsParser.parse_args()
+
+if not os.path.isdir(args.indir) and not parser.is_archive(args.indir):
+	raise myExceptions.WrongFeatureInputException(
+						'"%s" is neither a directory nor a tar or zip archive'%(args.indir))
+if args.batchSize < 1:
+	raise myExceptions.WrongSettingException(
+		'The batch size has to be at least 1, %d is given.'%(args.batchSize))
+
+start = time.perf_counter()
+store = feature_store.FeatureStore(args.store, create=True)
+tasks = parser.get_feature_file_tasks(args.indir, ['RAW','MAP','LOC','TSS'], args.sampleID)
+ingested, skipped, failed = store.ingest(tasks, args.workers, args.pool, args.force, args.batchSize)
+n_samples = len(store.get_sample_IDs(['RAW','MAP','LOC','TSS']))
+store.close()
+
+if len(failed) > 0:
+	print('\nWarning! %d feature file(s) could not be parsed:'%(len(failed)))
+	for file_path, error in failed:
+		print('\t%s\t%s'%(file_path, error))
+	print('')
+print('%d file(s) ingested, %d file(s) unchanged since they were ingested (%.1f seconds).'%(
+	ingested, skipped, time.perf_counter() - start))
+print('The store %s contains %d sample(s).'%(args.store, n_samples))
@@ -0,0 +1,171 @@
+"""Merge the outputs of a sharded seqQscorer run.
+
+With --shard i/N, seqQscorer scores only the samples of one shard and writes
+its outputs with the suffix ".shard-i-of-N", so that N runs on different
+nodes can write into the same folder. This script combines the shard outputs
+into the files seqQscorer writes without sharding: the probabilities sorted
+by score, the comprehensive output with one header per model, and the parsed
+input. The output paths are given as for seqQscorer, i.e. without suffix.
+All N shards have to be present. Outputs written as JSON Lines, Parquet,
+Feather, or Arrow (see --outFormat of seqQscorer) are merged in their
+format.
+
+	python seqQscorer.py --indir ./samples/ --shard 1/2 --probOut ./probabilities.tsv
+	python seqQscorer.py --indir ./samples/ --shard 2/2 --probOut ./probabilities.tsv
+	python mergeShards.py --probOut ./probabilities.tsv
+
+date:	2026-10-18
+
+"""
+
+from sys import *
+import os
+import argparse
+import pandas as pd
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# import project utils
+import utils.Exceptions as myExceptions
+import utils.scoring as scoring
+import utils.table_output as table_output
+
+argsParser = argparse.ArgumentParser(description='Merge the outputs of a sharded seqQscorer run')
+argsParser.add_argument('--probOut', '-po', type=str, default=None, help='Probabilities file as given to seqQscorer with --probOut.')
+argsParser.add_argument('--compOut', '-co', type=str, default=None, help='Comprehensive output file as given to seqQscorer with --compOut.')
+argsParser.add_argument('--inputOut', '-io', type=str, default=None, help='Parsed input file as given to seqQscorer with --inputOut.')
+argsParser.add_argument('--metricOut', type=str, default=None, help='Metric table file as given to seqQscorer with --metricOut.')
+argsParser.add_argument('--outFormat', type=str, default=None, choices=['tsv', 'jsonl', 'parquet', 'feather', 'arrow'], help='Format of the outputs as given to seqQscorer with --outFormat. By default it is taken from the file extension.')
+argsParser.add_argument('--remove', action='store_true', help='Remove the shard outputs after merging.')
+args = argsParser.parse_args()
+
+def get_shard_files(file_path):
+	shard_files, n_shards = scoring.get_shard_file_paths(file_path)
+	if n_shards == 0:
+		raise myExceptions.WrongFeatureInputException(
+			'No shard outputs found for "%s".'%(file_path))
+	missing = [str(shard) for shard in range(1, n_shards + 1) if not shard in shard_files]
+	if len(missing) > 0:
+		raise myExceptions.WrongFeatureInputException(
+			'The shard(s) %s of %d are missing for "%s".'%(', '.join(missing), n_shards, file_path))
+	return [shard_files[shard] for shard in range(1, n_shards + 1)]
+
+def sort_scores(lines):
+	# as written by seqQscorer, sorted by the probability and the sample ID
+	return sorted(lines, key=lambda line: scoring.get_score_key(*line.split('\t')[:2]))
+
+def split_block(block, file_path):
+	# a block consists of the model description, the metric table, an empty line, and the scores
+	start = block.find('Metric table:\n')
+	end = block.find('\n\n', start)
+	if start < 0 or end < 0:
+		raise myExceptions.WrongFeatureInputException(
+			'"%s" is not a comprehensive output of seqQscorer.'%(file_path))
+	return block[:end + 2], [line for line in block[end + 2:].split('\n') if line != '']
+
+def merge_comp_out(shard_files):
+	headers, scores = {}, {}
+	for file_path in shard_files:
+		content = open(file_path, 'r').read()
+		if content.startswith('Application case: '):
+			# comprehensive output of a manifest run, one block per application case
+			blocks = ['Application case: ' + block for block in content.split('Application case: ')[1:]]
+		else:
+			blocks = [content] if content != '' else []
+		for block in blocks:
+			header, lines = split_block(block, file_path)
+			case = header.split('\n')[0]
+			if not case in headers:
+				headers[case], scores[case] = header, []
+			elif headers[case] != header:
+				raise myExceptions.WrongFeatureInputException(
+					'The shards were scored with different models (%s).'%(file_path))
+			scores[case] += lines
+	comp_out = ''
+	for case in headers:
+		comp_out += headers[case]
+		for line in sort_scores(scores[case]):
+			comp_out += line + '\n'
+		if case.startswith('Application case: '):
+			comp_out += '\n'
+	return comp_out
+
+def merge_input_out(shard_files):
+	contents = [open(file_path, 'r').read() for file_path in shard_files]
+	# shards without samples contain only a header
+	filled = [i for i in range(len(contents)) if contents[i].strip('\n').count('\n') > 0]
+	if len(filled) == 0:
+		return contents[0]
+	headers = set([contents[i].split('\n')[0] for i in filled])
+	if len(headers) == 1:
+		# the same columns in all shards, the files are concatenated as they are
+		return contents[filled[0]] + ''.join([contents[i][contents[i].find('\n') + 1:] for i in filled[1:]])
+	# manifest runs may have different columns per shard
+	frames = [pd.read_csv(shard_files[i], sep='\t', dtype=str) for i in filled]
+	return pd.concat(frames, sort=False).to_csv(sep='\t', index=False)
+
+def read_frames(shard_files, out_format):
+	frames = [table_output.read_table(file_path, out_format) for file_path in shard_files]
+	# empty JSON Lines files do not contain the columns
+	frames = [frame for frame in frames if frame.shape[1] > 0]
+	if len(frames) == 0:
+		return pd.DataFrame()
+	return pd.concat(frames, sort=False, ignore_index=True)
+
+if args.probOut == None and args.compOut == None and args.inputOut == None and args.metricOut == None:
+	raise myExceptions.WrongSettingException(
+		'Please specify at least one of --probOut, --compOut, --inputOut, and --metricOut.')
+
+out_formats = {}
+for file_path in [args.probOut, args.inputOut, args.metricOut]:
+	if file_path != None:
+		out_formats[file_path] = table_output.get_format(file_path, args.outFormat)
+		table_output.check_format(out_formats[file_path])
+
+merged = []
+if args.probOut != None:
+	shard_files = get_shard_files(args.probOut)
+	if out_formats[args.probOut] == 'tsv':
+		lines = []
+		for file_path in shard_files:
+			lines += [line for line in open(file_path, 'r').read().split('\n') if line != '']
+		merged.append((args.probOut, ''.join([line + '\n' for line in sort_scores(lines)]), shard_files))
+		n_samples = len(lines)
+	else:
+		frame = read_frames(shard_files, out_formats[args.probOut])
+		if frame.shape[1] > 0:
+			# sorted by the probability, or by the model using all feature sets for an ablation
+			column = 'probability' if 'probability' in frame.columns else frame.columns[-1]
+			frame = frame.iloc[scoring.get_score_order(list(frame['sampleID']), list(frame[column]))]
+		merged.append((args.probOut, frame, shard_files))
+		n_samples = frame.shape[0]
+	print('%d sample(s) from %d shard(s) in %s'%(n_samples, len(shard_files), args.probOut))
+if args.compOut != None:
+	shard_files = get_shard_files(args.compOut)
+	merged.append((args.compOut, merge_comp_out(shard_files), shard_files))
+if args.inputOut != None:
+	shard_files = get_shard_files(args.inputOut)
+	if out_formats[args.inputOut] == 'tsv':
+		merged.append((args.inputOut, merge_input_out(shard_files), shard_files))
+	else:
+		merged.append((args.inputOut, read_frames(shard_files, out_formats[args.inputOut]), shard_files))
+if args.metricOut != None:
+	shard_files = get_shard_files(args.metricOut)
+	# every shard contains the metric tables of the models it used
+	merged.append((args.metricOut, read_frames(shard_files, out_formats[args.metricOut]).drop_duplicates(), shard_files))
+
+# the outputs are written after all shards were read successfully
+for file_path, content, shard_files in merged:
+	if isinstance(content, str):
+		try:
+			open(file_path, 'w').write(content)
+		except:
+			raise myExceptions.WrongOutputFileException(
+				'Unable to write the merged output to "%s"!'%(file_path))
+	else:
+		table_output.write_table(file_path, content, out_formats[file_path],
+								description='the merged output to "%s"'%(file_path))
+	if args.remove:
+		for shard_file in shard_files:
+			os.remove(shard_file)
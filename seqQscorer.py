@@ -13,36 +13,25 @@ author:	Steffen Albrecht
 
 from sys import *
 import os
-import pickle
-import pandas as pd
-import numpy as np
-import json
-import random
+import time
 import argparse
 
+start_wall, start_cpu = time.perf_counter(), time.process_time()
+
 import warnings
 warnings.filterwarnings("ignore")
 
-# import project utils
-import utils.Exceptions as myExceptions
-import utils.utils as utils
-import utils.parser as parser
-
 # parse command line arguments
-script_dir = './'
-if argv[0].find('/') >= 0:
-	script_dir = argv[0][: - argv[0][::-1].find('/')]
-utils_dir = '%sutils/'%(script_dir)
-
 argsParser = argparse.ArgumentParser(description='seqQscorer - A machine learning application for quality assessment of NGS data')
-argsParser.add_argument('--indir', '-i', type=str, required=True, help='Input directory containing the feature set files. The feature set files are perfectly fomated by the script "deriveFeatures.py": the file names (until the ".") define the sample ID while the file endings define the corresponding feature set RAW, MAP, LOC, and TSS. By default seqQscorer applies the machine learning model to all samples from the given directory within milliseconds. However, it can be restricted to one sample using --sampleID.')
+argsParser.add_argument('--indir', '-i', type=str, default=None, help='Input directory containing the feature set files. The feature set files are perfectly fomated by the script "deriveFeatures.py": the file names (until the ".") define the sample ID while the file endings define the corresponding feature set RAW, MAP, LOC, and TSS. By default seqQscorer applies the machine learning model to all samples from the given directory within milliseconds. However, it can be restricted to one sample using --sampleID. Feature set files in subdirectories are found as well, and they can be gzipped (e.g. ENCFF165NJF.RAW.gz). Instead of a directory, a tar (.tar, .tar.gz, .tgz, .tar.bz2, .tar.xz) or zip archive can be given, its members are read without extraction. Either --indir or --store is required.')
+argsParser.add_argument('--store', type=str, default=None, help='Feature store to read the features from instead of the feature set files of --indir, created with ingestFeatures.py. Only the features used by the model and the samples requested are read. Not used with --watch and --cache.')
 argsParser.add_argument('--species', '-s', type=str, default='generic', 
 						choices=['generic','human', 'mouse'],  help='Species specifying the model used.')
 argsParser.add_argument('--assay', '-a', type=str, default='generic', 
 						choices=['generic','ChIP-seq','DNase-seq','RNA-seq'], help='Assay specifying the model used.')
 argsParser.add_argument('--runtype', '-r', type=str, default='generic',
 						choices=['generic','single-end','paired-end'], help='Run-Type specifying the model used.')
-argsParser.add_argument('--model', '-m', type=str, default=None, help='Path to a serialized model, trained on own data. If used, the parameters --species, --assay, and --runtype have no impact on the classification model.')
+argsParser.add_argument('--model', '-m', type=str, default=None, help='Path to a serialized model, trained on own data. Either a pickle or a model directory of the pickle-free format (see convertModels.py). If used, the parameters --species, --assay, and --runtype have no impact on the classification model.')
 argsParser.add_argument('--noRAW', action='store_true', help='Ignore all RAW features.')
 argsParser.add_argument('--noMAP', action='store_true', help='Ignore all MAP features.')
 argsParser.add_argument('--noLOC', action='store_true', help='Ignore all LOC features.')
@@ -51,266 +40,439 @@ argsParser.add_argument('--noFS', action='store_true', help='Switch off feature
 argsParser.add_argument('--bestCalib', action='store_true', help='Classifier setting is used that achieved the lowest brier score, hence the best calibration of the probabilities.')
 argsParser.add_argument('--peaktype', '-pt', type=str, default=None, choices=['narrow','broad'], help='Optionally specify the peak-type for ChIP-seq data.')
 argsParser.add_argument('--probOut', '-po', type=str, default=None,
-						help='To specify an output file for the probabilities. Output will be tab-separated.')
+						help='To specify an output file for the probabilities. Output will be tab-separated, unless another format is given (see --outFormat).')
 argsParser.add_argument('--compOut', '-co', type=str, default=None,
 						help='To specify an out file for the comprehensive output. Output will be kind of tab-separated.')
 argsParser.add_argument('--inputOut', '-io', type=str, default=None,
-						help='To specify an out file that will contain the parsed input. Output will be tab-separated.')
+						help='To specify an out file that will contain the parsed input. Output will be tab-separated, unless another format is given (see --outFormat).')
+argsParser.add_argument('--metricOut', type=str, default=None,
+						help='To specify an out file for the metric table of the model used (precision, recall, F1, and accuracy per decision threshold), one row per threshold. Output will be tab-separated, unless another format is given (see --outFormat).')
+argsParser.add_argument('--outFormat', type=str, default=None, choices=['tsv', 'jsonl', 'parquet', 'feather', 'arrow'],
+						help='Format of the files of --probOut, --inputOut, and --metricOut: tab-separated, JSON Lines, Parquet, Feather, or Arrow IPC stream. By default the format is taken from the file extension (.jsonl, .parquet, .feather, .arrow), other files are tab-separated. Parquet, Feather, and Arrow need the package pyarrow. The tables are written in chunks.')
 argsParser.add_argument('--noVerbose', '-nv', action='store_true', help='Turn off verboseness, without being quiet.')
 argsParser.add_argument('--seed', '-rs', type=int, default=1, help='Some classifiers apply randomization. Use --seed to make results reproducible. By default the seed 1 is used, set it to -1 if using a seed is not desired. For K-nearest neighbor and Naive Bayes the seed has no impact.')
 argsParser.add_argument('--sampleID', '-id', type=str, default=None,
 						help='Restrict application of seqQscorer to only one sample defined by the ID.')
-
+argsParser.add_argument('--manifest', '-mf', type=str, default=None,
+						help='Tab-separated table to score samples of different settings within one run. It has to contain the column "sampleID" and can contain the columns "species", "assay", "runtype", and "peaktype". Samples are grouped by the model that applies to them and each group is scored with its model. Samples not listed in the manifest are scored according to --species, --assay, --runtype, and --peaktype.')
+argsParser.add_argument('--workers', '-w', type=int, default=1, help='Number of workers used to parse the feature set files. Helpful for large directories, especially on network storage. Default: 1')
+argsParser.add_argument('--pool', type=str, default='thread', choices=['thread', 'process'], help='Type of worker pool used with --workers > 1. Threads suit I/O-bound parsing (e.g. network storage), processes suit CPU-bound parsing. Default: thread')
+argsParser.add_argument('--shard', type=str, default=None, help='Score only the samples of one of N shards, given as i/N with i from 1 to N (e.g. 2/8). Samples are assigned to shards by a stable hash of their sample ID, hence N runs (e.g. on different nodes) score every sample exactly once. The outputs of --probOut, --compOut, --inputOut, and --metricOut get the suffix ".shard-i-of-N" and can be combined with mergeShards.py.')
+argsParser.add_argument('--ablation', action='store_true', help='Score the samples with the models of all combinations of the feature sets (15 if all are used, restricted by --noRAW, --noMAP, --noLOC, and --noTSS) to see which feature sets drive the probabilities. The files are parsed only once. The output of --probOut is then a table with one column of probabilities per combination. Not used with --manifest, --model, --chunkSize, and --cache.')
+argsParser.add_argument('--watch', action='store_true', help='Keep running and score each sample as soon as all its feature set files are in the input directory, e.g. while deriveFeatureSets.py writes them. Every file is parsed only once. The probabilities are appended to the console and to the output files. Samples already in the file of --probOut are not scored again, hence a watch can be restarted. Stop it with Ctrl+C or --watchIdle. Not used with --manifest, --ablation, --chunkSize, and --cache.')
+argsParser.add_argument('--watchInterval', type=float, default=2.0, help='Seconds between two checks of the input directory with --watch. Files are parsed once they were not modified for this time. Default: 2')
+argsParser.add_argument('--watchIdle', type=float, default=None, help='Stop watching after this many seconds without new feature set files. By default the watch runs until it is interrupted.')
+argsParser.add_argument('--chunkSize', type=int, default=None, help='Parse, score, and write the samples in chunks of this size, so that the memory used does not grow with the number of samples (e.g. for directories with millions of samples). The outputs are written while scoring, hence the probabilities are in the order of the input directory instead of being sorted. Not used with --manifest.')
+argsParser.add_argument('--cache', type=str, default=None, help='JSON file used as persistent score cache. Samples whose feature set files did not change since a previous run with the same model are neither parsed nor predicted again, their probability is taken from the cache. Scores are invalidated when the model changes. Not used with --seed -1.')
+argsParser.add_argument('--profile', type=str, default=None, help='Write a JSON report to this file with the wall time and CPU time of each stage of the run: argument parsing, imports, table lookups, medians, parsing, model loading, training, prediction, score cache, and output. The peak memory (RSS) of the process so far is recorded at the end of each stage.')
+argsParser.add_argument('--profileMemory', action='store_true', help='Additionally trace the memory allocated by Python per stage with tracemalloc (slows down the run). Used with --profile.')
+argsParser.add_argument('--cProfile', type=str, default=None, help='Write function-level statistics of cProfile to this file (pstats format, e.g. for snakeviz).')
 args = argsParser.parse_args()
 
-if not os.path.isdir(args.indir):
-	raise myExceptions.WrongFeatureInputException(
-						'"%s" is not a directory'%(args.indir))
-
-feature_sets = ['RAW','MAP','LOC','TSS']
+# the stages of the run are measured if --profile is given, otherwise the profiler does nothing
+import utils.profiling as profiling
+profiler = profiling.StageProfiler(args.profile != None, args.profileMemory, start_wall, start_cpu)
+profiler.add_stage('arguments', time.perf_counter() - start_wall, time.process_time() - start_cpu)
+function_profiler = None
+if args.cProfile != None:
+	import cProfile
+	function_profiler = cProfile.Profile()
+	function_profiler.enable()
+
+# heavy modules are imported after parsing the arguments, so that --help
+# returns instantly. scikit-learn is only imported when a model is trained or
+# unpickled, models of the pickle-free format do not need it. pandas is only
+# imported for data frames, i.e. for --inputOut, --ablation, and --manifest
+with profiler.stage('imports'):
+	# import project utils
+	import utils.Exceptions as myExceptions
+	import utils.utils as utils
+	import utils.parser as parser
+	import utils.scoring as scoring
+	import utils.table_output as table_output
+	from utils.scorer import ScoringRun
+
+def finish_profiling(n_samples, application_cases):
+	if function_profiler != None:
+		function_profiler.disable()
+		try:
+			function_profiler.dump_stats(args.cProfile)
+		except:
+			raise myExceptions.WrongOutputFileException(
+				'Unable to write the cProfile statistics to file!')
+	if args.profile != None:
+		try:
+			profiler.write_report(args.profile, samples=n_samples, application_cases=application_cases)
+		except:
+			raise myExceptions.WrongOutputFileException(
+				'Unable to write the profiling report to file!')
+		if not args.noVerbose:
+			print('\nTime and memory per stage:')
+			utils.print_nice_table(profiler.get_table())
+
+if (args.indir == None) == (args.store == None):
+	raise myExceptions.WrongSettingException(
+		'Please specify either an input directory (--indir) or a feature store (--store).')
+
+feature_sets = scoring.get_feature_sets(args.noRAW, args.noMAP, args.noLOC, args.noTSS)
+
+# the options that cannot be combined are rejected before any output is written
+if args.chunkSize != None and args.chunkSize < 1:
+	raise myExceptions.WrongSettingException(
+		'The chunk size has to be at least 1, %d is given.'%(args.chunkSize))
+if args.store != None:
+	for option, value in [('--watch', args.watch or None), ('--cache', args.cache)]:
+		if value != None:
+			raise myExceptions.WrongSettingException(
+				'A feature store cannot be combined with %s.'%(option))
+if args.ablation:
+	for option, value in [('--manifest', args.manifest), ('--model', args.model),
+						('--chunkSize', args.chunkSize), ('--cache', args.cache), ('--watch', args.watch or None)]:
+		if value != None:
+			raise myExceptions.WrongSettingException(
+				'The ablation mode cannot be combined with %s.'%(option))
+if args.manifest != None:
+	if args.model != None:
+		raise myExceptions.WrongSettingException(
+			'An external model cannot be combined with a manifest.')
+	if args.chunkSize != None:
+		raise myExceptions.WrongSettingException(
+			'Scoring in chunks (--chunkSize) cannot be combined with a manifest.')
+	if args.watch:
+		raise myExceptions.WrongSettingException(
+			'The watch mode cannot be combined with a manifest.')
+if args.watch:
+	for option, value in [('--chunkSize', args.chunkSize), ('--cache', args.cache)]:
+		if value != None:
+			raise myExceptions.WrongSettingException(
+				'The watch mode cannot be combined with %s.'%(option))
+	import utils.watcher as watcher
+	watcher.check_setting(args.indir, args.watchInterval)
+
+# the formats of the table outputs are taken from the file extensions before the shard suffix is added
+out_formats = {}
+for name, file_path in [('prob', args.probOut), ('input', args.inputOut), ('metric', args.metricOut)]:
+	if file_path != None:
+		out_formats[name] = table_output.get_format(file_path, args.outFormat)
+		table_output.check_format(out_formats[name])
+
+# every shard writes its own output files, mergeShards.py combines them afterwards
+shard = None
+if args.shard != None:
+	shard = parser.parse_shard(args.shard)
+	if args.probOut != None:
+		args.probOut = scoring.get_shard_file_path(args.probOut, shard)
+	if args.compOut != None:
+		args.compOut = scoring.get_shard_file_path(args.compOut, shard)
+	if args.inputOut != None:
+		args.inputOut = scoring.get_shard_file_path(args.inputOut, shard)
+	if args.metricOut != None:
+		args.metricOut = scoring.get_shard_file_path(args.metricOut, shard)
+
+# the scoring run reports training and files that could not be parsed, as seqQscorer always did
+run = ScoringRun(args.indir, args.store, feature_sets, args.sampleID, shard, args.bestCalib, args.noFS, args.seed,
+				workers=args.workers, pool=args.pool, cache=args.cache, verbose=True, noVerbose=args.noVerbose,
+				profiler=profiler)
+
+def get_model_description(scorer, table):
+	if table == None:
+		return 'External model: %s\nThe measures of the model are unknown.\n\n'%(scorer.model_file_path)
+	description  = 'Model trained by: %s\n'%(utils.clf_full_names(scorer.best_clf))
+	description += '%s feature selection applied\n'%(scorer.feature_selection.split('-')[0])
+	description += '%s %s of the features are used\n'%(scorer.feature_selection.split('-')[1], '%')
+	description += 'auROC: %s\n'%(scorer.auROC)
+	description += 'Brier: %s\n\n'%(scorer.brier)
+	description += 'Metric table:\n'
+	for row in table:
+		description += '\t'.join(row) + '\n'
+	return description + '\n'
 
-# restrict feature sets used according to given optional parameters
-if args.noRAW:
-	feature_sets.remove('RAW')
-if args.noMAP:
-	feature_sets.remove('MAP')
-if args.noLOC:
-	feature_sets.remove('LOC')
-if args.noTSS:
-	feature_sets.remove('TSS')
+def print_model_info(scorer):
+	print('\nThe best predictive performance was achived by %s'%(utils.clf_full_names(scorer.best_clf)))
+	print('%s feature selection is applied (using %s%s of the features)'%(
+		tuple(scorer.feature_selection.split('-') + ['%'])))
+	print('Within the cross-validated gird search this model achived:')
+	print('\tauROC: %s'%(scorer.auROC))
+	print('\tBrier: %s'%(scorer.brier))
+	print('\nThe model used, achieved these measures for different decision thresholds applied\non the probabilities within the grid-search (ten-fold cross-validation):')
+	profiler.stop('output')
+	with profiler.stage('table lookups'):
+		table = scorer.get_measure_table()
+	profiler.start('output')
+	utils.print_nice_table(table)
+	print('')
+	return table
+
+def get_model_table(scorer):
+	# the measures of the grid search belong to the models of seqQscorer,
+	# for an external model they are unknown
+	if scorer.model_file_path != None:
+		return None
+	profiler.start('output')
+	table = print_model_info(scorer)
+	profiler.stop('output')
+	return table
+
+output_descriptions = {'prob': 'the probabilities', 'input': 'the parsed input', 'metric': 'the metric table'}
+
+def open_table_output(name, columns=None, header=True, float_format=None, append=False):
+	file_path = {'prob': args.probOut, 'input': args.inputOut, 'metric': args.metricOut}[name]
+	if file_path == None:
+		return None
+	return table_output.TableWriter(file_path, columns, out_formats[name], header, float_format, append,
+									output_descriptions[name])
+
+def open_prob_output(columns=['sampleID', 'probability'], append=False):
+	# as before, tab-separated probabilities are written without header
+	return open_table_output('prob', columns, False, '%f', append)
+
+def write_table_output(name, frame, float_format=None):
+	writer = open_table_output(name, float_format=float_format)
+	if writer != None:
+		writer.write_frame(frame)
+		writer.close()
+
+def open_comp_out(mode='w'):
+	if args.compOut == None:
+		return None
+	try:
+		return open(args.compOut, mode)
+	except:
+		raise myExceptions.WrongOutputFileException(
+			'Unable to write the comprehensive output to file!')
 
-model_sel_metric = 'brier' if args.bestCalib else 'auROC'
-fs_suffix = '_noFS' if args.noFS else ''
+def write_metric_out(scorer, table):
+	if args.metricOut == None:
+		return
+	if table == None:
+		print('The metric table of an external model is unknown, it is not written to "%s".'%(args.metricOut))
+		return
+	write_table_output('metric', table_output.get_metric_frame(table, [('application_case', scorer.application_case)]))
+
+def write_comp_out(comp_file, text):
+	if comp_file != None:
+		try:
+			comp_file.write(text)
+		except:
+			raise myExceptions.WrongOutputFileException(
+				'Unable to write the comprehensive output to file!')
+
+def write_scores(scores, prob_writer=None, comp_file=None):
+	# the scores are printed and written chunk by chunk, not collected as one string
+	for start in range(0, len(scores), table_output.write_chunk_size):
+		chunk = scores[start:start + table_output.write_chunk_size]
+		for row in chunk:
+			print(row[0], '%.3f '%(row[1]), '(probability for being of low quality)', *row[2:], sep='\t')
+		if prob_writer != None:
+			prob_writer.write_rows(chunk)
+		write_comp_out(comp_file, ''.join(['%s\t%f\n'%(row[0], row[1]) for row in chunk]))
+
+def write_group_comp_out(comp_file, header, scorer, scores):
+	with profiler.stage('table lookups'):
+		table = scorer.get_measure_table()
+	with profiler.stage('output'):
+		write_comp_out(comp_file, header + get_model_description(scorer, table))
+		scores = scoring.sort_scores(scores)
+		for start in range(0, len(scores), table_output.write_chunk_size):
+			write_comp_out(comp_file, ''.join(['%s\t%f\n'%(fileID, score)
+											for fileID, score in scores[start:start + table_output.write_chunk_size]]))
+		write_comp_out(comp_file, '\n')
+	return table
+
+def read_scored_samples():
+	# samples scored by a previous watch on the same output are skipped
+	if args.probOut == None or not os.path.exists(args.probOut):
+		return []
+	if out_formats['prob'] == 'tsv':
+		return [line.split('\t')[0] for line in open(args.probOut, 'r').read().split('\n') if line != '']
+	if os.path.getsize(args.probOut) > 0:
+		return list(table_output.read_table(args.probOut, out_formats['prob'])['sampleID'])
+	return []
+
+# score the samples with the models of all feature set combinations, parsing the files only once
+if args.ablation:
+	import pandas as pd
+	scorers, probabilities, parsed_input = run.score_ablation(args.species, args.assay, args.runtype, args.peaktype)
+	
+	summary = [['Feature sets', 'Model', 'Classifier', 'auROC', 'Brier']]
+	comp_file = open_comp_out()
+	metric_frames = []
+	for name, scorer in scorers.items():
+		summary.append([name, scorer.application_case, utils.clf_full_names(scorer.best_clf),
+						str(scorer.auROC), str(scorer.brier)])
+		table = write_group_comp_out(comp_file, 'Feature sets: %s\nApplication case: %s\n'%(name, scorer.application_case),
+									scorer, list(zip(probabilities['sampleID'], probabilities[name])))
+		metric_frames.append(table_output.get_metric_frame(table, [('feature_sets', name),
+															('application_case', scorer.application_case)]))
+	profiler.start('output')
+	if comp_file != None:
+		comp_file.close()
+	print('\nThe models used for the combinations of the feature sets:')
+	utils.print_nice_table(summary)
+	
+	print('\nProbabilities for being of low quality per combination of the feature sets:')
+	table = [list(probabilities.columns)]
+	for row in probabilities.itertuples(index=False):
+		table.append([row[0]] + ['%.3f'%(score) for score in row[1:]])
+	utils.print_nice_table(table)
+	
+	write_table_output('prob', probabilities, '%f')
+	if args.inputOut != None:
+		write_table_output('input', scorers['-'.join(feature_sets)].create_input_data(parsed_input))
+	write_table_output('metric', pd.concat(metric_frames))
+	profiler.stop('output')
+	finish_profiling(probabilities.shape[0], [scorer.application_case for scorer in scorers.values()])
+	exit(0)
+
+# score samples of different settings within one run, as specified by the manifest
+if args.manifest != None:
+	import pandas as pd
+	default_setting = (args.species, args.assay, args.runtype, args.peaktype)
+	groups = run.score_manifest(args.manifest, default_setting)
+	
+	fileID_score = []
+	comp_file = open_comp_out()
+	metric_frames = []
+	input_frames = []
+	for application_case, scorer, group, group_scores, input_data in groups:
+		fileID_score += [ (fileID, score, application_case) for fileID, score in group_scores ]
+		table = write_group_comp_out(comp_file, 'Application case: %s\n'%(application_case), scorer, group_scores)
+		metric_frames.append(table_output.get_metric_frame(table, [('application_case', application_case)]))
+		input_data.insert(1, 'application_case', application_case)
+		input_frames.append(input_data)
+	
+	# print the scores to the console and write the probabilities, comprehensive output,
+	# parsed input, and metric tables to files if file-paths are given
+	profiler.start('output')
+	if comp_file != None:
+		comp_file.close()
+	print('')
+	prob_writer = open_prob_output(['sampleID', 'probability', 'application_case'])
+	write_scores(scoring.sort_scores(fileID_score), prob_writer)
+	if prob_writer != None:
+		prob_writer.close()
+	if args.inputOut != None:
+		# a shard may contain no samples at all
+		if len(input_frames) == 0:
+			input_frames.append(pd.DataFrame(columns=['sampleID', 'application_case']))
+		write_table_output('input', pd.concat(input_frames, sort=False))
+	if args.metricOut != None:
+		write_table_output('metric', pd.concat(metric_frames) if len(metric_frames) > 0 else
+							pd.DataFrame(columns=['application_case', 'threshold']))
+	profiler.stop('output')
+	finish_profiling(len(fileID_score), [group[0] for group in groups])
+	exit(0)
 
 # initiate the classification model and other data needed
-species, assay, run_type = args.species, args.assay, args.runtype
-
-if args.peaktype != None:
-	if args.assay != 'ChIP-seq' or args.runtype != 'single-end':
-		raise myExceptions.WrongSettingException(
-			'Peak-type specification can only be used for single-ended ChIP-seq.')
-	assay = args.peaktype + assay
-
-best_clf, feature_selection, selection, parameters, auROC, brier = utils.get_best_classifier(utils_dir, species, assay, 
-															run_type, feature_sets, fs_suffix, model_sel_metric)
+scorer = run.get_scorer(args.species, args.assay, args.runtype, args.peaktype, args.model)
 
-if best_clf == None and args.model == None:
+if scorer.fallback:
+	given_assay = args.assay if args.peaktype == None else args.peaktype + args.assay
 	message = '''\nPlease check the given setting:
-	assay:\t\t%s\n\tspecies:\t%s\n\trun-type:\t%s\n'''%(assay, species, run_type)
+	assay:\t\t%s\n\tspecies:\t%s\n\trun-type:\t%s\n'''%(given_assay, args.species, args.runtype)
 	message += '\tfeature sets:\t%s\n'%('-'.join(feature_sets))
 	message += 'A specialized model for this setting is not available,\n'
 	message += 'the generic model is used to proceed.\n'
 	print(message)
-	species, assay, run_type = 'generic', 'generic', 'generic'
-
-application_case = '%s_%s_%s_%s'%(species, assay, run_type, '-'.join(feature_sets))
-application_case += '_%s%s'%(model_sel_metric, fs_suffix)
-model_file_path = '%smodels/%s_%d.model'%(script_dir, application_case, args.seed)
 
 if args.model != None:
 	print('An external model is provided.')
-	model_file_path = args.model
-	try: 
-		pickle.load(open(model_file_path, 'rb'))
-	except:
-		raise myExceptions.IncorrectModelException(
-			'The provided model from file "%s" could not be loaded.'%(model_file_path))
-
-# load median values organized by subset, needed to impute missing values
-medians = pickle.load(open('%sutils/medians.dict'%(script_dir), 'rb'))
-medians = medians[species][assay][run_type]
-
-# parse given input files
-input_data, feature_columns = parser.generate_input_data(args.indir, feature_sets, run_type, medians, args.noVerbose, args.sampleID)
-
-# if the particula model is used for the very first time, it is trained and serialized
-best_clf, feature_selection, selection, parameters, auROC, brier = utils.get_best_classifier(utils_dir, 
-																	 species, assay, run_type, feature_sets, 
-																	 fs_suffix, model_sel_metric)
-
-if not os.path.exists(model_file_path) and args.model == None:
-	print('\nThe required model was not used so far.')
-	print('It needs to be trained and serialized...')
-	
-	clf = utils.get_clf_algos()[best_clf]
-	if not best_clf in ['GNB','KNN']:
-		if args.seed != -1:
-			parameters['random_state'] = args.seed
+	with profiler.stage('model loading'):
+		scorer.get_model()
+
+# with --watch the input directory is checked repeatedly, samples are scored as soon
+# as their feature sets are complete and the results are appended to the outputs
+if args.watch:
+	scorer.get_model()
+	table = get_model_table(scorer)
+	scored = read_scored_samples()
+	# the outputs are appended to, which is possible for tab-separated and JSON Lines files
+	prob_writer = open_prob_output(append=True)
+	input_writer = open_table_output('input', append=True)
+	comp_file = open_comp_out('a')
+	if comp_file != None and comp_file.tell() == 0:
+		write_comp_out(comp_file, get_model_description(scorer, table))
+		comp_file.flush()
+	write_metric_out(scorer, table)
 	
-	clf_setup = clf.set_params(**parameters)
+	def write_completed(scoring_input, completed_scores):
+		with profiler.stage('output'):
+			write_scores(completed_scores, prob_writer, comp_file)
+			stdout.flush()
+			if input_writer != None:
+				input_writer.write_frame(scoring_input)
+			for writer in [prob_writer, input_writer]:
+				if writer != None:
+					writer.flush()
+			if comp_file != None:
+				comp_file.flush()
 	
-	data_file_path = '%sutils/datasets/%s_%s_%s.tsv'%(script_dir, assay, species, run_type)
-	train_data = pd.read_csv(data_file_path, sep='\t')
+	n_scored, incomplete = run.watch(scorer, write_completed, args.watchInterval, args.watchIdle, scored,
+									args.inputOut != None)
+	for out_file in [prob_writer, input_writer, comp_file]:
+		if out_file != None:
+			out_file.close()
+	print('\n%d sample(s) scored, %d sample(s) with incomplete feature sets.'%(n_scored, len(incomplete)))
+	finish_profiling(n_scored, [scorer.application_case])
+	exit(0)
+
+# with --chunkSize only one chunk of samples is held in memory at a time, the
+# outputs are written chunk by chunk in the order of the input directory
+if args.chunkSize != None:
+	chunks = run.score_chunks(scorer, args.chunkSize, args.inputOut != None)
+	table = get_model_table(scorer)
+	profiler.start('output')
+	prob_writer = open_prob_output()
+	input_writer = open_table_output('input')
+	comp_file = open_comp_out()
+	if comp_file != None:
+		write_comp_out(comp_file, get_model_description(scorer, table))
+	write_metric_out(scorer, table)
+	profiler.stop('output')
 	
-	y = np.array(train_data['status'])
-	train_data = train_data[feature_columns]
-	if selection != None:
-		train_data = train_data.loc[:,selection]
-	X = np.array(train_data)
+	print('Scoring the input data in chunks of %d sample(s)...\n'%(args.chunkSize))
+	n_samples, n_chunks = 0, 0
+	for scoring_input, chunk_scores in chunks:
+		# the scores taken from the score cache come first, without input
+		with profiler.stage('output'):
+			write_scores(chunk_scores, prob_writer, comp_file)
+			if input_writer != None and scoring_input is not None:
+				input_writer.write_frame(scoring_input)
+		n_samples += len(chunk_scores)
+		if scoring_input is not None:
+			n_chunks += 1
 	
-	model = clf_setup.fit(X,y)
-	if args.seed != -1:
-		pickle.dump(model, open(model_file_path, 'wb'))
-		print('... training and serialization is done!')
-		print('The model is instantly available from now!')
-	else:
-		print('... training is done, but only reproducible models are serialized.')
-		print('Because no seed was used the model was not serialized.')
-
-# load the model
-model = pickle.load(open(model_file_path, 'rb'))
-
-# prepare input data format
-input_values = input_data[feature_columns]
-if selection != None:
-	input_values = input_values.loc[:,selection]
-
-# apply model on given samples to get the probabilities
-probabilities = model.predict_proba(np.array(input_values))
-fileIDs = list(input_data['sampleID'])
-fileID_score = list(zip(fileIDs, [prob[1] for prob in probabilities]))
-
-if args.model == None:
-	print('\nThe best predictive performance was achived by %s'%(utils.clf_full_names(best_clf)))
-	print('%s feature selection is applied (using %s%s of the features)'%(
-		tuple(feature_selection.split('-') + ['%'])))
-	print('Within the cross-validated gird search this model achived:')
-	print('\tauROC: %s'%(auROC))
-	print('\tBrier: %s'%(brier))
-	print('\nThe model used, achieved these measures for different decision thresholds applied\non the probabilities within the grid-search (ten-fold cross-validation):')
-	table = utils.read_in_measure_table(utils_dir, species, assay, run_type, 
-										feature_sets, fs_suffix, model_sel_metric)
-	utils.print_nice_table(table)
-	print('')
-
-# print the scores to the console
-probas_str = ''
-for fileID, score in sorted(fileID_score, key=lambda x: x[1]):
-	probas_str += '%s\t%f\n'%(fileID, score)
-	print(fileID, '%.3f '%(score), '(probability for being of low quality)', sep='\t')
-
-# write probabilities to file if a file-path is given
-if args.probOut != None:
-	try:
-		open(args.probOut, 'w').write(probas_str)
-	except:
-		raise myExceptions.WrongOutputFileException(
-			'Unable to write the probabilities to file!')
-
-# write comprehensive output to file if a file-path is given
-if args.compOut != None:
-	comp_out  = 'Model trained by: %s\n'%(utils.clf_full_names(best_clf))
-	comp_out += '%s feature selection applied\n'%(feature_selection.split('-')[0])
-	comp_out += '%s %s of the features are used\n'%(feature_selection.split('-')[1], '%')
-	comp_out += 'auROC: %s\n'%(auROC)
-	comp_out += 'Brier: %s\n\n'%(brier)
-	comp_out += 'Metric table:\n'
-	for row in table:
-		comp_out += '\t'.join(row) + '\n'
-	comp_out += '\n' + probas_str
-	
-	try:
-		open(args.compOut, 'w').write(comp_out)
-	except:
-		raise myExceptions.WrongOutputFileException(
-			'Unable to write the comprehensive output to file!')
-
-# write the parsed input into a file, if a pth is given
+	with profiler.stage('output'):
+		if input_writer != None and n_chunks == 0:
+			input_writer.write_frame(scorer.create_input_data({}))
+		for out_file in [prob_writer, comp_file, input_writer]:
+			if out_file != None:
+				out_file.close()
+	print('\n... %d sample(s) scored in %d chunk(s).'%(n_samples, n_chunks))
+	finish_profiling(n_samples, [scorer.application_case])
+	exit(0)
+
+# parse the given input files and apply the model on the samples to get the probabilities
+fileID_score, scoring_input = run.score(scorer, args.inputOut != None)
+
+table = get_model_table(scorer)
+profiler.start('output')
+
+# print the scores to the console and write the probabilities and the comprehensive
+# output to files, if file-paths are given
+prob_writer = open_prob_output()
+comp_file = open_comp_out()
+if comp_file != None:
+	write_comp_out(comp_file, get_model_description(scorer, table))
+write_scores(scoring.sort_scores(fileID_score), prob_writer, comp_file)
+for out_file in [prob_writer, comp_file]:
+	if out_file != None:
+		out_file.close()
+
+# write the parsed input and the metric table into files, if paths are given
 if args.inputOut != None:
-	try:
-		input_data.to_csv(args.inputOut, sep='\t', index=False)
-	except:
-		raise myExceptions.WrongOutputFileException(
-			'Unable to write the parsed input to file')
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+	write_table_output('input', scoring_input)
+write_metric_out(scorer, table)
+profiler.stop('output')
 
+finish_profiling(len(fileID_score), [scorer.application_case])
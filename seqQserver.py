@@ -0,0 +1,233 @@
+"""Scoring server for seqQscorer
+
+"python seqQserver.py --help" will display a formatted help text on the
+console. The server keeps a Scorer (see utils/scorer.py) per setting, with
+the median values and the model specifications, and the models in one
+registry in memory, so that repeated scoring requests do not pay for the
+imports, table lookups and model deserialization that a single seqQscorer
+run requires. Requests are scored exactly as by the Scorer API. The server
+listens on a local TCP port or on a unix socket and answers JSON requests:
+
+POST /score
+	{"species": "human", "assay": "ChIP-seq", "runtype": "single-end",
+	 "peaktype": null, "featureSets": ["RAW", "MAP", "LOC", "TSS"],
+	 "bestCalib": false, "noFS": false, "seed": 1,
+	 "samples": {"<sampleID>": {"<feature name>": <value>, ...}, ...}}
+	Instead of "samples", "indir" (and optionally "sampleID") can be used to
+	parse the feature set files from a directory. A list of such requests is
+	answered by a list of results. All samples of one request are scored
+	within one batch.
+GET /stats
+	latency counters per endpoint and the keys of the models loaded
+GET /health
+	returns {"status": "ok"}
+
+date:	2026-10-18
+
+"""
+
+from sys import *
+import os
+import time
+import json
+import argparse
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# import project utils
+import utils.Exceptions as myExceptions
+import utils.model_registry as model_registry
+from utils.scorer import Scorer, auto_batch_limit
+
+# parse command line arguments
+script_dir = './'
+if argv[0].find('/') >= 0:
+	script_dir = argv[0][: - argv[0][::-1].find('/')]
+utils_dir = '%sutils/'%(script_dir)
+
+argsParser = argparse.ArgumentParser(description='seqQserver - Serves seqQscorer predictions while keeping the models loaded')
+argsParser.add_argument('--host', type=str, default='127.0.0.1', help='Host address the server is bound to. Default: 127.0.0.1')
+argsParser.add_argument('--port', '-p', type=int, default=8642, help='Port the server listens on. Default: 8642')
+argsParser.add_argument('--socket', '-u', type=str, default=None, help='File path for a unix socket. If used, --host and --port are ignored.')
+argsParser.add_argument('--seed', '-rs', type=int, default=1, help='Seed used for requests that do not specify one. Only models trained with a seed are kept on disk.')
+argsParser.add_argument('--maxModels', type=int, default=16, help='Maximal number of models kept in memory. The least recently used model is dropped first.')
+argsParser.add_argument('--engine', type=str, default='sklearn', choices=['sklearn', 'numpy', 'auto'], help='Inference engine. With "numpy", tree ensembles are compiled into flat arrays once and predicted by a vectorized traversal, which is faster for small batches. With "auto", the compiled model is used for batches of up to %d samples and scikit-learn for larger ones. Other models are always applied with scikit-learn. Default: sklearn'%(auto_batch_limit))
+argsParser.add_argument('--noVerbose', '-nv', action='store_true', help='Do not log the requests to the console.')
+
+
+class LatencyCounters:
+	"""Thread-safe request counters and latencies per endpoint."""
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.counters = {}
+
+	def add(self, endpoint, seconds, samples=0, error=False):
+		with self.lock:
+			if not endpoint in self.counters:
+				self.counters[endpoint] = {'requests': 0, 'errors': 0, 'samples': 0,
+										'total_seconds': 0.0, 'max_seconds': 0.0,
+										'last_seconds': 0.0}
+			counter = self.counters[endpoint]
+			counter['requests'] += 1
+			counter['errors'] += 1 if error else 0
+			counter['samples'] += samples
+			counter['total_seconds'] += seconds
+			counter['max_seconds'] = max(counter['max_seconds'], seconds)
+			counter['last_seconds'] = seconds
+
+	def summary(self):
+		with self.lock:
+			summary = {}
+			for endpoint, counter in self.counters.items():
+				summary[endpoint] = dict(counter)
+				summary[endpoint]['mean_seconds'] = counter['total_seconds'] / counter['requests']
+			return summary
+
+
+class ScoringService:
+	"""Keeps a Scorer per setting, the models are shared by one registry."""
+
+	def __init__(self, script_dir, seed=1, max_models=16, engine='sklearn'):
+		self.script_dir = script_dir
+		self.engine = engine
+		self.seed = seed
+		self.registry = model_registry.ModelRegistry('%smodels/'%(script_dir), max_models)
+		self.scorers = {}
+		self.lock = threading.Lock()
+
+	def get_scorer(self, species, assay, run_type, peaktype, feature_sets, best_calib, no_fs, seed):
+		key = (species, assay, run_type, peaktype, tuple(feature_sets), best_calib, no_fs, seed)
+		with self.lock:
+			scorer = self.scorers.get(key, None)
+		if scorer == None:
+			# each Scorer locks only its own model, e.g. while it is trained
+			scorer = Scorer(species, assay, run_type, feature_sets, peaktype, best_calib, no_fs, seed,
+							base_dir=self.script_dir, registry=self.registry, engine=self.engine)
+			with self.lock:
+				scorer = self.scorers.setdefault(key, scorer)
+		return scorer
+
+	def score(self, request):
+		seed = int(request.get('seed', self.seed))
+		scorer = self.get_scorer(request.get('species', 'generic'), request.get('assay', 'generic'),
+								request.get('runtype', 'generic'), request.get('peaktype', None),
+								request.get('featureSets', ['RAW','MAP','LOC','TSS']),
+								bool(request.get('bestCalib', False)), bool(request.get('noFS', False)), seed)
+		if 'samples' in request:
+			scores = scorer.score_features(request['samples'])
+		elif 'indir' in request:
+			scores = scorer.score_directory(request['indir'], request.get('sampleID', None))
+		else:
+			raise myExceptions.WrongFeatureInputException(
+				'A request has to provide either "samples" or "indir".')
+
+		return {'application_case': scorer.application_case, 'fallback': scorer.fallback, 'seed': seed,
+				'probabilities': [{'sampleID': fileID, 'probability': float(score)}
+								for fileID, score in zip(scores['sampleID'], scores['probability'])]}
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+
+	def address_string(self):
+		if isinstance(self.client_address, tuple):
+			return self.client_address[0]
+		return 'unix-socket'
+
+	def log_message(self, format, *args):
+		if not self.server.noVerbose:
+			BaseHTTPRequestHandler.log_message(self, format, *args)
+
+	def send_json(self, status, content, seconds=None):
+		body = json.dumps(content).encode('utf-8')
+		self.send_response(status)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(body)))
+		if seconds != None:
+			self.send_header('X-Latency-Seconds', '%.6f'%(seconds))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def do_GET(self):
+		start = time.perf_counter()
+		if self.path == '/stats':
+			registry = self.server.service.registry
+			content = {'latency': self.server.counters.summary(),
+					'models': ['%s_%s_%s_%s_%s%s_%d'%(key) for key in registry.keys()],
+					'model_loads': registry.loads, 'model_hits': registry.hits}
+			status = 200
+		elif self.path == '/health':
+			content, status = {'status': 'ok'}, 200
+		else:
+			content, status = {'error': 'Unknown endpoint "%s"'%(self.path)}, 404
+		seconds = time.perf_counter() - start
+		self.server.counters.add(self.path, seconds, error=status != 200)
+		self.send_json(status, content, seconds)
+
+	def do_POST(self):
+		start = time.perf_counter()
+		if self.path != '/score':
+			seconds = time.perf_counter() - start
+			self.server.counters.add(self.path, seconds, error=True)
+			self.send_json(404, {'error': 'Unknown endpoint "%s"'%(self.path)}, seconds)
+			return
+
+		n_samples = 0
+		try:
+			length = int(self.headers.get('Content-Length', 0))
+			payload = json.loads(self.rfile.read(length).decode('utf-8'))
+			requests = payload if isinstance(payload, list) else [payload]
+			results = [self.server.service.score(request) for request in requests]
+			n_samples = sum([len(result['probabilities']) for result in results])
+			content = results if isinstance(payload, list) else results[0]
+			status = 200
+		except (myExceptions.WrongFeatureInputException, myExceptions.WrongSettingException,
+				myExceptions.IncorrectModelException, ValueError, KeyError, TypeError) as e:
+			content, status = {'error': str(e)}, 400
+		except Exception as e:
+			content, status = {'error': str(e)}, 500
+
+		seconds = time.perf_counter() - start
+		self.server.counters.add(self.path, seconds, n_samples, status != 200)
+		if status == 200:
+			if isinstance(content, list):
+				for result in content:
+					result['latency_seconds'] = seconds
+			else:
+				content['latency_seconds'] = seconds
+		self.send_json(status, content, seconds)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+	daemon_threads = True
+
+
+if __name__ == '__main__':
+	args = argsParser.parse_args()
+
+	if args.socket != None:
+		if os.path.exists(args.socket):
+			os.remove(args.socket)
+		server = ThreadingUnixHTTPServer(args.socket, ScoringRequestHandler)
+		address = 'unix socket %s'%(args.socket)
+	else:
+		server = ThreadingHTTPServer((args.host, args.port), ScoringRequestHandler)
+		address = 'http://%s:%d'%(args.host, args.port)
+
+	server.service = ScoringService(script_dir, args.seed, args.maxModels, args.engine)
+	server.counters = LatencyCounters()
+	server.noVerbose = args.noVerbose
+
+	print('seqQserver is listening on %s'%(address))
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		print('\nShutting down seqQserver.')
+	finally:
+		server.server_close()
+		if args.socket != None and os.path.exists(args.socket):
+			os.remove(args.socket)
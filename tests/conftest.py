@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the tests import the modules of seqQscorer as the scripts do, from the repository root
+repo_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, repo_dir)
@@ -0,0 +1,43 @@
+import os
+import glob
+
+import pandas as pd
+
+import utils.parser as parser
+
+repo_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + '/'
+example_dirs = [repo_dir + 'feature_set_examples/', repo_dir + 'cistrome_ATAC_seq_use_case/training/']
+
+def get_example_files(feature_set):
+	file_paths = []
+	for example_dir in example_dirs:
+		file_paths += sorted(glob.glob(example_dir + '*.' + feature_set))
+	return file_paths
+
+def get_LOC_features_by_pandas(feature_file_path):
+	# the header of the tables written by R has no field for the row names
+	loc = pd.read_csv(feature_file_path, sep='\t')
+	features = {}
+	for name, value in zip(loc['Feature'], loc['Frequency']):
+		name = name.replace('"', '').replace("'", '').replace(' (<=300)', '').replace(' ', '_')
+		features['readsAnno_' + name] = value
+	return features
+
+def get_TSS_features_by_pandas(feature_file_path):
+	# the pandas implementation of get_TSS_features before the csv parser
+	tss = pd.read_csv(feature_file_path, sep='\t')
+	tss_dist = list(map(str, tss['tss_dist']))
+	feature_names = ['TSS_' + name if name[0] == '-' else 'TSS_+' + name for name in tss_dist]
+	return dict(zip(feature_names, list(tss['perc'])))
+
+def test_LOC_features_match_pandas():
+	file_paths = get_example_files('LOC')
+	assert len(file_paths) > 0
+	for file_path in file_paths:
+		assert parser.get_LOC_features(file_path) == get_LOC_features_by_pandas(file_path), file_path
+
+def test_TSS_features_match_pandas():
+	file_paths = get_example_files('TSS')
+	assert len(file_paths) > 0
+	for file_path in file_paths:
+		assert parser.get_TSS_features(file_path) == get_TSS_features_by_pandas(file_path), file_path
@@ -0,0 +1,73 @@
+import os
+import glob
+import pytest
+
+import utils.parser as parser
+import utils.Exceptions as myExceptions
+
+repo_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + '/'
+MAP_files = sorted(glob.glob(repo_dir + 'feature_set_examples/*.MAP') +
+				glob.glob(repo_dir + 'cistrome_ATAC_seq_use_case/*/*.MAP'))
+
+def parse_BowtieSE_by_line(lines):
+	# the line-indexed parsers of seqQscorer before get_Bowtie_summaries
+	lines = lines.split('\n')
+	features = {}
+	features['BowtieSE_no_mapping'] = float(lines[2].split('(')[1].split('%')[0])
+	features['BowtieSE_uniquely'] = float(lines[3].split('(')[1].split('%')[0])
+	features['BowtieSE_multiple'] = float(lines[4].split('(')[1].split('%')[0])
+	features['BowtieSE_overall'] = float(lines[5].split('%')[0])
+	features['BowtieMI_no_mapping'] = features['BowtieSE_no_mapping']
+	features['BowtieMI_uniquely'] = features['BowtieSE_uniquely']
+	features['BowtieMI_multiple'] = features['BowtieSE_multiple']
+	features['BowtieMI_overall'] = features['BowtieSE_overall']
+	return features
+
+def parse_BowtiePE_by_line(lines):
+	lines = lines.split('\n')
+	features = {}
+	features['BowtiePE_con_no_mapping'] = float(lines[2].split('(')[1].split('%')[0])
+	features['BowtiePE_con_uniquely'] = float(lines[3].split('(')[1].split('%')[0])
+	features['BowtiePE_con_multiple'] = float(lines[4].split('(')[1].split('%')[0])
+	features['BowtiePE_dis_uniquely'] = float(lines[7].split('(')[1].split('%')[0])
+	features['BowtiePE_cod_no_mapping'] = float(lines[11].split('(')[1].split('%')[0])
+	features['BowtiePE_cod_uniquely'] = float(lines[12].split('(')[1].split('%')[0])
+	features['BowtiePE_cod_multiple'] = float(lines[13].split('(')[1].split('%')[0])
+	features['BowtiePE_overall'] = float(lines[14].split('%')[0])
+	features['BowtieMI_no_mapping'] = features['BowtiePE_con_no_mapping']
+	features['BowtieMI_uniquely'] = features['BowtiePE_con_uniquely']
+	features['BowtieMI_multiple'] = features['BowtiePE_con_multiple']
+	features['BowtieMI_overall'] = features['BowtiePE_overall']
+	features['BowtieSE_no_mapping'] = features['BowtiePE_con_no_mapping']
+	features['BowtieSE_uniquely'] = features['BowtiePE_con_uniquely']
+	features['BowtieSE_multiple'] = features['BowtiePE_con_multiple']
+	features['BowtieSE_overall'] = features['BowtiePE_overall']
+	return features
+
+def get_MAP_features_by_line(feature_file_path):
+	lines = open(feature_file_path, 'r').read()
+	if 'concordantly' in lines and 'discordantly' in lines:
+		return parse_BowtiePE_by_line(lines)
+	return parse_BowtieSE_by_line(lines)
+
+def test_example_files_match_line_indexed_parser():
+	assert len(MAP_files) > 0
+	for file_path in MAP_files:
+		assert parser.get_MAP_features(file_path) == get_MAP_features_by_line(file_path), file_path
+
+def test_stream_matches_line_indexed_parser():
+	stream = 'Warning: a warning written before the summaries\n'
+	stream += ''.join([open(file_path, 'r').read() for file_path in MAP_files])
+	assert parser.get_Bowtie_stream_features(stream) == [get_MAP_features_by_line(file_path) for file_path in MAP_files]
+
+def test_counts_by_label():
+	log = parser.parse_Bowtie_logs(open(MAP_files[0], 'r').read())[0]
+	lines = open(MAP_files[0], 'r').read().split('\n')
+	assert log['reads'] == (int(lines[0].split(' ')[0]), None)
+	assert log['concordant_1'] == (int(lines[3].split()[0]), float(lines[3].split('(')[1].split('%')[0]))
+	assert log['overall'] == (None, float(lines[14].split('%')[0]))
+
+def test_malformed_summary_is_rejected():
+	lines = open(MAP_files[0], 'r').read().replace('aligned discordantly 1 time', 'aligned discordantly once')
+	with pytest.raises(myExceptions.WrongFeatureInputException, match='Line 1 '):
+		parser.get_Bowtie_stream_features(lines)
@@ -0,0 +1,44 @@
+import os
+import gzip
+import shutil
+import zipfile
+
+import utils.parser as parser
+
+repo_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + '/'
+example_dir = repo_dir + 'feature_set_examples/'
+feature_sets = ['RAW', 'MAP', 'LOC', 'TSS']
+
+def test_duplicate_files_are_reported_per_file(tmp_path):
+	indir = str(tmp_path) + '/'
+	for file_name in os.listdir(example_dir):
+		shutil.copy(example_dir + file_name, indir)
+	# the same feature set gzipped, and a copy in a subdirectory
+	with open(example_dir + 'ENCFF165NJF.RAW', 'rb') as f:
+		with gzip.open(indir + 'ENCFF165NJF.RAW.gz', 'wb') as g:
+			g.write(f.read())
+	os.mkdir(indir + 'copy')
+	shutil.copy(example_dir + 'ENCFF137DWP.MAP', indir + 'copy/')
+
+	errors = []
+	parsed_input = parser.parse_input_files(indir, feature_sets, errors=errors, verbose=False)
+	assert parsed_input == parser.parse_input_files(example_dir, feature_sets, verbose=False)
+	reported = sorted([os.path.relpath(file_path, indir) for file_path, error in errors])
+	assert len(reported) == 2
+	# the files of a directory are listed in arbitrary order, the files of subdirectories after them
+	assert reported[0] in ['ENCFF165NJF.RAW', 'ENCFF165NJF.RAW.gz']
+	assert reported[1] == 'copy/ENCFF137DWP.MAP'
+	assert all(['given twice' in error for file_path, error in errors])
+
+def test_archives_are_closed_after_each_call(tmp_path):
+	archive_path = str(tmp_path) + '/samples.zip'
+	with zipfile.ZipFile(archive_path, 'w') as archive:
+		archive.write(example_dir + 'ENCFF165NJF.RAW', 'ENCFF165NJF.RAW')
+	assert list(parser.parse_input_files(archive_path, ['RAW'], verbose=False).keys()) == ['ENCFF165NJF']
+	assert len(parser.open_archives) == 0
+
+	# an archive replaced on disk is read anew
+	with zipfile.ZipFile(archive_path, 'w') as archive:
+		archive.write(example_dir + 'ENCFF137DWP.RAW', 'ENCFF137DWP.RAW')
+	assert list(parser.parse_input_files(archive_path, ['RAW'], verbose=False).keys()) == ['ENCFF137DWP']
+	assert len(parser.open_archives) == 0
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import utils.parser as parser
+import utils.scoring as scoring
+
+repo_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + '/'
+utils_dir = repo_dir + 'utils/'
+feature_sets = ['RAW', 'MAP', 'LOC', 'TSS']
+
+def create_input_data_by_column(parsed_input, feature_sets, run_type, medians):
+	# the pandas implementation of create_input_data before the input matrix
+	feature_cols = parser.get_feature_columns(feature_sets, run_type, medians)
+	input_data = dict( (col, []) for col in ['sampleID'] + feature_cols )
+	for sample in parsed_input:
+		input_data['sampleID'].append(sample)
+		for col in feature_cols:
+			input_data[col].append(parsed_input[sample].get(col, np.nan))
+	input_data = pd.DataFrame(input_data)[['sampleID'] + feature_cols]
+	for feature in feature_cols:
+		input_data[feature] = [medians[feature] if np.isnan(value) else value for value in input_data[feature]]
+	return input_data, feature_cols
+
+def get_parsed_input(indir):
+	return parser.parse_input_files(indir, feature_sets, verbose=False)
+
+def check_input(parsed_input, species, assay, run_type):
+	medians = scoring.load_medians(utils_dir, species, assay, run_type)
+	expected, expected_cols = create_input_data_by_column(parsed_input, feature_sets, run_type, medians)
+	expected_values = np.array(expected[expected_cols], dtype=float)
+
+	X, feature_cols = parser.create_input_matrix(parsed_input, feature_sets, run_type, medians)
+	assert feature_cols == expected_cols
+	assert np.array_equal(X, expected_values)
+
+	input_data, feature_cols = parser.create_input_data(parsed_input, feature_sets, run_type, medians)
+	assert list(input_data.columns) == list(expected.columns)
+	assert list(input_data['sampleID']) == list(expected['sampleID'])
+	assert np.array_equal(np.array(input_data[feature_cols], dtype=float), expected_values)
+
+def test_example_files():
+	check_input(get_parsed_input(repo_dir + 'feature_set_examples/'), 'generic', 'generic', 'generic')
+
+def test_cistrome_files():
+	parsed_input = get_parsed_input(repo_dir + 'cistrome_ATAC_seq_use_case/training/')
+	check_input(parsed_input, 'human', 'ChIP-seq', 'single-end')
+
+def test_imputation_of_missing_features():
+	parsed_input = get_parsed_input(repo_dir + 'cistrome_ATAC_seq_use_case/training/')
+	# features missing for single samples, and one feature missing for all samples
+	for i, sample_features in enumerate(parsed_input.values()):
+		sample_features.pop('TSS_+500', None)
+		if i % 3 == 0:
+			sample_features.pop('BowtieSE_overall', None)
+		if i % 5 == 0:
+			sample_features.pop('readsAnno_Promoter', None)
+			sample_features.pop('FastQC_Adapter_Content', None)
+	check_input(parsed_input, 'human', 'ChIP-seq', 'single-end')
@@ -0,0 +1,30 @@
+import tracemalloc
+
+import utils.profiling as profiling
+
+def test_nested_stages_are_children():
+	profiler = profiling.StageProfiler(True)
+	with profiler.stage('prediction'):
+		with profiler.stage('model loading'):
+			pass
+	with profiler.stage('model loading'):
+		pass
+	stages = dict( ((stage['parent'], stage['stage']), stage) for stage in profiler.get_report()['stages'] )
+	assert set(stages.keys()) == set([(None, 'prediction'), ('prediction', 'model loading'), (None, 'model loading')])
+	assert stages[('prediction', 'model loading')]['calls'] == 1
+	assert stages[('prediction', 'model loading')]['wall_seconds'] <= stages[(None, 'prediction')]['wall_seconds']
+
+def test_nested_stage_keeps_the_traced_peak_of_the_parent():
+	profiler = profiling.StageProfiler(True, True)
+	try:
+		with profiler.stage('prediction'):
+			block = bytearray(8 * 1024 * 1024)
+			del block
+			with profiler.stage('model loading'):
+				pass
+	finally:
+		tracemalloc.stop()
+	stages = dict( ((stage['parent'], stage['stage']), stage) for stage in profiler.get_report()['stages'] )
+	# the allocation before the nested stage still counts for the parent
+	assert stages[(None, 'prediction')]['traced_peak_mb'] >= 8.0
+	assert stages[('prediction', 'model loading')]['traced_peak_mb'] < 8.0
@@ -0,0 +1,64 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.scoring as scoring
+import utils.tree_engine as tree_engine
+from utils.scorer import Scorer
+
+repo_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + '/'
+example_dirs = {'single-end': repo_dir + 'cistrome_ATAC_seq_use_case/training/',
+				'paired-end': repo_dir + 'feature_set_examples/'}
+
+# settings whose best classifiers are small tree ensembles of each compilable type:
+# (species, assay, run type, feature sets, peak type, best calibration)
+settings = [('mouse', 'ChIP-seq', 'single-end', ['MAP', 'LOC'], None, False),
+			('mouse', 'ChIP-seq', 'single-end', ['MAP', 'LOC'], 'narrow', True),
+			('human', 'ChIP-seq', 'single-end', ['MAP'], 'broad', False),
+			('mouse', 'DNase-seq', 'paired-end', ['LOC'], None, True),
+			('human', 'ChIP-seq', 'single-end', ['TSS'], 'narrow', False)]
+
+def get_input_matrix(scorer):
+	# the example samples, and the training data of the setting for more paths through the trees
+	sample_IDs, X = scorer.create_input_matrix(scorer.parse_samples(example_dirs[scorer.run_type]))
+	train_data = pd.read_csv('%sdatasets/%s_%s_%s.tsv'%(scorer.utils_dir, scorer.assay, scorer.species, scorer.run_type), sep='\t')
+	X = np.vstack([X, np.array(train_data[scorer.feature_columns], dtype=float)])
+	if scorer.selection != None:
+		X = X[:, np.array(scorer.selection, dtype=bool)]
+	return X
+
+@pytest.mark.parametrize('setting', settings, ids=['_'.join([str(value) for value in setting[:3]] + ['-'.join(setting[3])] +
+																[str(value) for value in setting[4:]]) for setting in settings])
+def test_compiled_model_matches_sklearn(setting):
+	species, assay, run_type, feature_sets, peaktype, best_calib = setting
+	scorer = Scorer(species, assay, run_type, feature_sets, peaktype, best_calib)
+	with warnings.catch_warnings():
+		warnings.simplefilter('ignore')
+		model = scoring.train_model_for_case(scorer.utils_dir, scorer.species, scorer.assay, scorer.run_type,
+											scorer.feature_sets, scorer.fs_suffix, scorer.metric, 1, scorer.feature_columns)
+	assert tree_engine.is_compilable(model)
+	X = get_input_matrix(scorer)
+	assert np.array_equal(tree_engine.compile_model(model).predict_proba(X), model.predict_proba(X))
+
+@pytest.mark.parametrize('setting', settings[:2], ids=['RFC', 'ETC'])
+def test_compiled_model_sends_nan_right(setting):
+	species, assay, run_type, feature_sets, peaktype, best_calib = setting
+	scorer = Scorer(species, assay, run_type, feature_sets, peaktype, best_calib)
+	with warnings.catch_warnings():
+		warnings.simplefilter('ignore')
+		model = scoring.train_model_for_case(scorer.utils_dir, scorer.species, scorer.assay, scorer.run_type,
+											scorer.feature_sets, scorer.fs_suffix, scorer.metric, 1, scorer.feature_columns)
+	X = get_input_matrix(scorer)
+	X[np.random.RandomState(1).rand(*X.shape) < 0.3] = np.nan
+	# scikit-learn rejects NaN in predict_proba, the trees themselves send it to the right child,
+	# the probabilities of a forest are accumulated as in ForestClassifier.predict_proba
+	X_tree = np.asarray(X, dtype=np.float32)
+	expected = np.zeros((X.shape[0], len(model.classes_)))
+	estimators = getattr(model, 'estimators_', [model])
+	for estimator in estimators:
+		expected += estimator.predict_proba(X_tree, check_input=False)
+	expected /= len(estimators)
+	assert np.array_equal(tree_engine.compile_model(model).predict_proba(X), expected)
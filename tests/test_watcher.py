@@ -0,0 +1,76 @@
+import os
+import glob
+import shutil
+
+import utils.parser as parser
+import utils.watcher as watcher
+
+repo_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) + '/'
+example_dir = repo_dir + 'feature_set_examples/'
+feature_sets = ['RAW', 'MAP', 'LOC', 'TSS']
+
+class StubWatcher:
+	"""Replays lists of ready files, one list per poll."""
+
+	def __init__(self, polls):
+		self.polls = list(polls)
+		self.ignored = []
+
+	def poll(self):
+		return self.polls.pop(0) if len(self.polls) > 0 else []
+
+	def has_pending(self):
+		return len(self.polls) > 0
+
+	def ignore_samples(self, sample_IDs):
+		self.ignored += list(sample_IDs)
+
+def get_example_files(feature_set):
+	return sorted(glob.glob(example_dir + '*.' + feature_set))
+
+def run_watch(folder_watcher, tracker):
+	scored = []
+	clock = [0.0]
+	def sleep(seconds):
+		clock[0] += seconds
+	watcher.watch(folder_watcher, tracker, lambda samples: scored.append(samples), interval=1.0,
+				idle_timeout=3.0, sleep=sleep, clock=lambda: clock[0])
+	return scored
+
+def test_samples_are_scored_once_complete():
+	polls = [get_example_files('RAW') + get_example_files('MAP'), [], get_example_files('LOC'), get_example_files('TSS')]
+	stub = StubWatcher(polls)
+	tracker = watcher.SampleTracker(feature_sets)
+	scored = run_watch(stub, tracker)
+	expected = parser.parse_input_files(example_dir, feature_sets, verbose=False)
+	# all samples are completed by the last poll, with the same features as parsed without --watch
+	assert len(scored) == 1
+	assert dict(scored[0]) == dict(expected)
+	assert sorted(stub.ignored) == sorted(expected.keys())
+	assert tracker.get_incomplete() == []
+
+def test_skipped_and_incomplete_samples():
+	skipped = parser.get_sample_ID(get_example_files('RAW')[0])
+	polls = [get_example_files('RAW') + get_example_files('MAP') + get_example_files('LOC')]
+	tracker = watcher.SampleTracker(feature_sets, skip=[skipped])
+	scored = run_watch(StubWatcher(polls), tracker)
+	assert scored == []
+	assert sorted(tracker.get_incomplete()) == sorted([parser.get_sample_ID(file_path) for file_path in get_example_files('RAW')
+														if parser.get_sample_ID(file_path) != skipped])
+
+def test_polling_watcher_finds_subdirectories(tmp_path):
+	indir = str(tmp_path) + '/'
+	for file_path in get_example_files('RAW') + get_example_files('MAP'):
+		shutil.copy(file_path, indir)
+	os.makedirs(indir + 'annotation/TSS')
+	for file_path in get_example_files('LOC'):
+		shutil.copy(file_path, indir + 'annotation/')
+	for file_path in get_example_files('TSS'):
+		shutil.copy(file_path, indir + 'annotation/TSS/')
+	folder_watcher = watcher.PollingWatcher(indir, feature_sets, settle=0.0)
+	tracker = watcher.SampleTracker(feature_sets)
+	scored = run_watch(folder_watcher, tracker)
+	assert len(scored) == 1
+	assert dict(scored[0]) == dict(parser.parse_input_files(example_dir, feature_sets, verbose=False))
+	# files of scored samples are not reported again
+	assert folder_watcher.poll() == []
@@ -13,25 +13,11 @@ author:	Steffen Albrecht
 
 from sys import *
 import os
-import pickle
-import pandas as pd
-import numpy as np
-import json
-import random
 import argparse
 
 import warnings
 warnings.filterwarnings("ignore")
 
-# import project utils
-import utils.Exceptions as myExceptions
-import utils.utils as utils
-import utils.parser as parser
-import utils.custom_metrics as cm
-
-from sklearn.model_selection import cross_validate, StratifiedKFold
-from sklearn.metrics import roc_auc_score, precision_recall_curve, auc, precision_score, recall_score, f1_score, accuracy_score
-
 # parse command line arguments
 script_dir = './'
 if argv[0].find('/') >= 0:
@@ -39,7 +25,8 @@ if argv[0].find('/') >= 0:
 utils_dir = '%sutils/'%(script_dir)
 
 argsParser = argparse.ArgumentParser(description='Train a new model based on your labeled input data.')
-argsParser.add_argument('--training', '-t', type=str, required=True, help='Input directory containing the feature set files.')
+argsParser.add_argument('--training', '-t', type=str, default=None, help='Input directory containing the feature set files, or a tar or zip archive containing them. Either --training or --store is required.')
+argsParser.add_argument('--store', type=str, default=None, help='Feature store to read the features from instead of the feature set files of --training, created with ingestFeatures.py. Only the samples listed in the labels are read.')
 argsParser.add_argument('--labels', '-l', type=str, required=True, help='Table (tab-separated) that contains the labels. It has to contain one column called "sampleID" for the IDs that have to fit to the files within "training". A second column should be therer called "quality" describing low and high quality by 1 and 0, respectively. It is also possible to use "--column" to chose a column within "labels" different to "quality".')
 argsParser.add_argument('--model', '-m', type=str, required=True, help='File path for saving the model.')
 argsParser.add_argument('--column', '-c', type=str, default='quality', required=False, help='Specifies the column within the file with the labels.')
@@ -53,14 +40,44 @@ argsParser.add_argument('--runtype', '-r', type=str, default='generic',
 						choices=['generic','single-end','paired-end'], help='Run-Type specifying the model used.')
 argsParser.add_argument('--bestCalib', action='store_true', help='Classifier setting is used that achieved the lowest brier score, hence the best calibration of the probabilities.')
 argsParser.add_argument('--inputOut', '-io', type=str, default=None,
-						help='To specify an out file that will contain the parsed input together with the quaity labels. The output file is exactly the data used to train the model Output will be tab-separated.')
+						help='To specify an out file that will contain the parsed input together with the quaity labels. The output file is exactly the data used to train the model Output will be tab-separated, unless another format is given (see --outFormat).')
+argsParser.add_argument('--outFormat', type=str, default=None, choices=['tsv', 'jsonl', 'parquet', 'feather', 'arrow'],
+						help='Format of the file of --inputOut: tab-separated, JSON Lines, Parquet, Feather, or Arrow IPC stream. By default the format is taken from the file extension (.jsonl, .parquet, .feather, .arrow), other files are tab-separated. Parquet, Feather, and Arrow need the package pyarrow.')
 argsParser.add_argument('--noRAW', action='store_true', help='Ignore all RAW features.')
 argsParser.add_argument('--noMAP', action='store_true', help='Ignore all MAP features.')
 argsParser.add_argument('--noLOC', action='store_true', help='Ignore all LOC features.')
 argsParser.add_argument('--noTSS', action='store_true', help='Ignore all TSS features.')
 argsParser.add_argument('--useRF', '-rf', type=str, default=None, help='Simply use Random Forest. Specify its parameters via a ":"-separated parameter: "criterion:maxDepth:maxFeatures:nTrees"')
+argsParser.add_argument('--workers', '-w', type=int, default=1, help='Number of workers used to parse the feature set files. Helpful for large directories, especially on network storage. Default: 1')
+argsParser.add_argument('--pool', type=str, default='thread', choices=['thread', 'process'], help='Type of worker pool used with --workers > 1. Threads suit I/O-bound parsing (e.g. network storage), processes suit CPU-bound parsing. Default: thread')
+argsParser.add_argument('--format', '-f', type=str, default='pickle', choices=['pickle', 'qmodel'], help='Format of the saved model. "qmodel" is the pickle-free format (a directory with a header and NumPy arrays, see convertModels.py) that embeds the feature columns and is loaded memory-mapped by seqQscorer. It is available for tree ensembles, Logistic Regression, and Multi-layer Perceptron. Default: pickle')
 args = argsParser.parse_args()
 
+# heavy modules are imported after parsing the arguments, so that --help returns instantly
+import pickle
+import pandas as pd
+import numpy as np
+import json
+import random
+
+# import project utils
+import utils.Exceptions as myExceptions
+import utils.utils as utils
+import utils.parser as parser
+import utils.custom_metrics as cm
+import utils.model_format as model_format
+import utils.table_output as table_output
+
+from sklearn.model_selection import cross_validate, StratifiedKFold
+from sklearn.metrics import roc_auc_score, precision_recall_curve, auc, precision_score, recall_score, f1_score, accuracy_score
+
+if (args.training == None) == (args.store == None):
+	raise myExceptions.WrongSettingException(
+		'Please specify either an input directory (--training) or a feature store (--store).')
+if args.inputOut != None:
+	input_format = table_output.get_format(args.inputOut, args.outFormat)
+	table_output.check_format(input_format)
+
 feature_sets = ['RAW','MAP','LOC','TSS']
 
 # restrict feature sets used according to given optional parameters
@@ -97,8 +114,18 @@ model_file_path = '%smodels/%s.model'%(script_dir, application_case)
 medians = pickle.load(open('%sutils/medians.dict'%(script_dir), 'rb'))
 medians = medians[species][assay][run_type]
 
-# parse given input files
-input_data, feature_columns = parser.generate_input_data(args.training, feature_sets, run_type, medians)
+# parse given input files, or read the labeled samples from the feature store
+if args.store != None:
+	import utils.feature_store as feature_store
+	print('Parsing input data...')
+	feature_columns = parser.get_feature_columns(feature_sets, run_type, medians)
+	labeled = list(pd.read_csv(args.labels, sep='\t', dtype={'sampleID': str})['sampleID'])
+	parsed_input = feature_store.FeatureStore(args.store).read(feature_sets, feature_columns, labeled)
+	input_data, feature_columns = parser.create_input_data(parsed_input, feature_sets, run_type, medians)
+	print('... input data loaded.\n')
+else:
+	input_data, feature_columns = parser.generate_input_data(args.training, feature_sets, run_type, medians,
+															workers=args.workers, pool=args.pool)
 
 # if the particula model is used for the very first time, it is trained and serialized
 best_clf, feature_selection, selection, parameters, auROC, brier = utils.get_best_classifier(utils_dir, 
@@ -110,13 +137,13 @@ clf_setup = None
 if args.useRF == None:
 	print('Using the %s classifier with appropriate parameters'%(utils.clf_full_names(best_clf)))
 	print('that performed well for the given species-assay-runtype specification.\n')
-	clf = utils.get_clf_algos()[best_clf]
+	clf = utils.get_clf_algo(best_clf)
 	if not best_clf in ['GNB','KNN']:
 		parameters['random_state'] = args.seed
 	clf_setup = clf.set_params(**parameters)
 else:
 	print('Using the Random Forest Classifier specified by the user.\n')
-	clf = utils.get_clf_algos()['RFC']
+	clf = utils.get_clf_algo('RFC')
 	rf_args = args.useRF.split(':')
 	
 	max_depth = None
@@ -209,12 +236,15 @@ utils.print_nice_table(table)
 
 # train again all all samples, then serialize
 model = clf_setup.fit(X,y)
-pickle.dump(model, open(args.model, 'wb'))
+if args.format == 'qmodel':
+	model_format.save_model(model, args.model, feature_columns, None, (species, assay, run_type), feature_sets)
+else:
+	pickle.dump(model, open(args.model, 'wb'))
 
 # write input data to a file
 if args.inputOut != None:
 	input_data['quality'] = y
-	input_data.to_csv(args.inputOut, sep='\t', index=False)
+	table_output.write_table(args.inputOut, input_data, input_format, description='the parsed input')
 
 
 
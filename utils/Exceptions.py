@@ -31,3 +31,9 @@ class IncorrectModelException(Exception):
     def __str__(self):
         return repr(self.value)
 
+
+class WrongCacheFileException(Exception):
+    def __init__(self, value):
+        self.value = value
+    def __str__(self):
+        return repr(self.value)
@@ -9,7 +9,7 @@ with warnings.catch_warnings():
 	from sklearn import preprocessing
 
 import random
-from scipy import interp
+from numpy import interp
 
 def auPRC_lowQual(y_true, probas):
 	if sum(y_true) == len(y_true) or len(y_true) == 0:
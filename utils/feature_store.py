@@ -0,0 +1,193 @@
+"""Feature store
+
+A single SQLite file holding the parsed features of many samples, as an
+alternative to the four feature set files per sample. Reading hundreds of
+thousands of small files is bound by the metadata operations of the file
+system, the store is read with a few queries instead. The features are
+ingested once with ingestFeatures.py and can then be read by seqQscorer.py,
+trainNewModel.py, and guidelineReports.py with --store.
+
+Each feature set has its own table with one row per sample (indexed by the
+sample ID) and one column per feature, columns are added when new features
+are ingested. Missing values are stored as NULL and imputed when the input
+data is created, as for missing values in the feature set files. Queries
+read only the columns of the features needed and, if given, only the rows
+of the requested samples. The samples are returned in the order in which
+they were ingested.
+
+Methods
+-------
+
+FeatureStore(store_path, create=False)
+	opens the store, with create=True it is created if it does not exist
+FeatureStore.ingest(tasks, workers=1, pool='thread', force=False, batch_size=10000)
+	parses the (file path, feature set) tasks and adds the features to the
+	store, files ingested before are skipped unless they changed (or force is
+	used). Returns the numbers of ingested and skipped files and the files
+	that could not be parsed as (file path, error) pairs
+FeatureStore.get_sample_IDs(feature_sets, restrict=None, shard=None)
+	returns the IDs of the samples with features of the given feature sets,
+	optionally only the sample restrict or the samples of a shard
+FeatureStore.read(feature_sets, columns=None, sample_IDs=None, restrict=None, shard=None)
+	returns the features per sample as parser.parse_input_files does,
+	optionally only the given feature columns and samples
+FeatureStore.close()
+	closes the connection to the store
+
+date:	2026-10-18
+
+"""
+
+import os
+import sqlite3
+from collections import OrderedDict
+
+import utils.Exceptions as myExceptions
+import utils.parser as parser
+
+global store_format
+store_format = 'seqQscorer-feature-store'
+
+global store_version
+store_version = '1'
+
+# the number of sample IDs per query, below the limit of SQLite for variables
+global query_batch_size
+query_batch_size = 500
+
+
+def quote(name):
+	return '"%s"'%(name.replace('"', '""'))
+
+
+class FeatureStore:
+	"""Parsed features of many samples in one indexed SQLite file."""
+
+	def __init__(self, store_path, create=False):
+		self.store_path = store_path
+		if not os.path.exists(store_path):
+			if not create:
+				raise myExceptions.WrongFeatureInputException(
+					'The feature store "%s" does not exist.'%(store_path))
+			self.connection = sqlite3.connect(store_path)
+			self.create()
+		else:
+			try:
+				if create:
+					self.connection = sqlite3.connect(store_path)
+				else:
+					# readers do not lock the store for writing
+					self.connection = sqlite3.connect('file:%s?mode=ro'%(os.path.abspath(store_path)), uri=True)
+				meta = dict(self.connection.execute('SELECT key, value FROM meta').fetchall())
+			except sqlite3.DatabaseError:
+				raise myExceptions.WrongFeatureInputException(
+					'"%s" is not a seqQscorer feature store.'%(store_path))
+			if meta.get('format', None) != store_format:
+				raise myExceptions.WrongFeatureInputException(
+					'"%s" is not a seqQscorer feature store.'%(store_path))
+			if meta.get('version', None) != store_version:
+				raise myExceptions.WrongFeatureInputException(
+					'The feature store "%s" has the version %s, version %s is supported.'%(
+						store_path, meta.get('version', None), store_version))
+		self.columns = dict( (fs, self.get_table_columns(fs)) for fs in ['RAW','MAP','LOC','TSS'] )
+
+	def create(self):
+		with self.connection:
+			self.connection.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+			self.connection.executemany('INSERT INTO meta VALUES (?, ?)',
+										[('format', store_format), ('version', store_version)])
+			self.connection.execute('CREATE TABLE samples (sampleID TEXT PRIMARY KEY)')
+			self.connection.execute('CREATE TABLE files (file_path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER)')
+			for fs in ['RAW','MAP','LOC','TSS']:
+				self.connection.execute('CREATE TABLE %s (sampleID TEXT PRIMARY KEY)'%(fs))
+
+	def get_table_columns(self, feature_set):
+		rows = self.connection.execute('PRAGMA table_info(%s)'%(feature_set)).fetchall()
+		return [row[1] for row in rows if row[1] != 'sampleID']
+
+	def add_columns(self, feature_set, columns):
+		for column in columns:
+			if not column in self.columns[feature_set]:
+				self.connection.execute('ALTER TABLE %s ADD COLUMN %s REAL'%(feature_set, quote(column)))
+				self.columns[feature_set].append(column)
+
+	def add_features(self, sample_ID, feature_set, features):
+		self.connection.execute('INSERT OR IGNORE INTO samples VALUES (?)', (sample_ID,))
+		columns = list(features.keys())
+		self.add_columns(feature_set, columns)
+		# a sample is replaced as a whole, features not given anymore become NULL
+		values = [None if value != value else float(value) for value in features.values()]
+		self.connection.execute('INSERT OR REPLACE INTO %s (sampleID%s) VALUES (?%s)'%(feature_set,
+								''.join([', ' + quote(column) for column in columns]), ', ?' * len(columns)),
+								[sample_ID] + values)
+
+	def ingest(self, tasks, workers=1, pool='thread', force=False, batch_size=10000):
+		tasks, failed = parser.split_duplicate_tasks(tasks)
+		ingested, skipped = 0, 0
+		for start in range(0, len(tasks), batch_size):
+			batch = []
+			for file_path, feature_set in tasks[start:start + batch_size]:
+				# members of an archive are ingested again when the archive changes
+				stat = os.stat(parser.get_physical_path(file_path))
+				signature = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+				if not force:
+					row = self.connection.execute('SELECT size, mtime_ns FROM files WHERE file_path = ?',
+												(signature[0],)).fetchone()
+					if row != None and tuple(row) == signature[1:]:
+						skipped += 1
+						continue
+				batch.append(((file_path, feature_set), signature))
+
+			# each batch is committed as one transaction
+			results = parser.parse_feature_files([task for task, signature in batch], workers, pool)
+			with self.connection:
+				for ((file_path, feature_set), signature), (features, error) in zip(batch, results):
+					if error != None:
+						failed.append((file_path, error))
+						continue
+					self.add_features(parser.get_sample_ID(file_path), feature_set, features)
+					self.connection.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)', signature)
+					ingested += 1
+		return ingested, skipped, failed
+
+	def get_sample_IDs(self, feature_sets, restrict=None, shard=None):
+		query = 'SELECT sampleID FROM samples WHERE sampleID IN (%s)'%(
+				' UNION '.join(['SELECT sampleID FROM %s'%(fs) for fs in feature_sets]))
+		parameters = []
+		if restrict != None:
+			query += ' AND sampleID = ?'
+			parameters.append(restrict)
+		sample_IDs = [row[0] for row in self.connection.execute(query + ' ORDER BY rowid', parameters)]
+		if shard != None:
+			sample_IDs = [sample_ID for sample_ID in sample_IDs if parser.get_shard(sample_ID, shard[1]) == shard[0]]
+		return sample_IDs
+
+	def read(self, feature_sets, columns=None, sample_IDs=None, restrict=None, shard=None):
+		order = self.get_sample_IDs(feature_sets, restrict, shard)
+		if sample_IDs != None:
+			requested = set(sample_IDs)
+			order = [sample_ID for sample_ID in order if sample_ID in requested]
+		filtered = sample_IDs != None or restrict != None or shard != None
+
+		parsed_input = OrderedDict( (sample_ID, {}) for sample_ID in order )
+		for fs in feature_sets:
+			# only the columns of the features needed are read
+			fs_columns = self.columns[fs]
+			if columns != None:
+				fs_columns = [column for column in fs_columns if column in columns]
+			query = 'SELECT sampleID%s FROM %s'%(''.join([', ' + quote(column) for column in fs_columns]), fs)
+			if not filtered:
+				batches = [(query, [])]
+			else:
+				batches = [ (query + ' WHERE sampleID IN (%s)'%(', '.join(['?'] * len(order[i:i + query_batch_size]))),
+							order[i:i + query_batch_size]) for i in range(0, len(order), query_batch_size) ]
+			for batch_query, parameters in batches:
+				for row in self.connection.execute(batch_query, parameters):
+					features = parsed_input[row[0]]
+					for column, value in zip(fs_columns, row[1:]):
+						if value != None:
+							features[column] = value
+		return parsed_input
+
+	def close(self):
+		self.connection.close()
@@ -0,0 +1,81 @@
+"""File lock
+
+Inter-process lock based on a lock file, used to make sure that a model is
+trained and serialized by only one process at a time. The lock is held by
+an advisory lock on the lock file (fcntl on Unix, msvcrt on Windows) and is
+released by the operating system if the process dies. The lock file itself
+is never removed, as removing it would allow two processes to lock
+different files of the same name.
+
+Methods
+-------
+
+FileLock(lock_file_path)
+	lock for the given lock file, can be used as context manager
+FileLock.acquire(blocking=True)
+	acquires the lock, returns False if blocking is False and the lock is held
+	by another process
+FileLock.release()
+	releases the lock
+
+date:	2026-10-18
+
+"""
+
+import os
+
+try:
+	import fcntl
+except ImportError:
+	fcntl = None
+	import msvcrt
+
+
+class FileLock:
+	"""Advisory inter-process lock on a lock file."""
+
+	def __init__(self, lock_file_path):
+		self.lock_file_path = lock_file_path
+		self.fd = None
+
+	def acquire(self, blocking=True):
+		fd = os.open(self.lock_file_path, os.O_RDWR | os.O_CREAT, 0o666)
+		try:
+			if fcntl != None:
+				fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+			else:
+				mode = msvcrt.LK_NBLCK
+				while True:
+					try:
+						msvcrt.locking(fd, mode, 1)
+						break
+					except OSError:
+						# LK_LOCK gives up after 10 seconds, hence it is retried
+						if not blocking:
+							raise
+						mode = msvcrt.LK_LOCK
+		except OSError:
+			os.close(fd)
+			if not blocking:
+				return False
+			raise
+		self.fd = fd
+		return True
+
+	def release(self):
+		if self.fd == None:
+			return
+		if fcntl != None:
+			fcntl.flock(self.fd, fcntl.LOCK_UN)
+		else:
+			os.lseek(self.fd, 0, os.SEEK_SET)
+			msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+		os.close(self.fd)
+		self.fd = None
+
+	def __enter__(self):
+		self.acquire()
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.release()
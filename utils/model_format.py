@@ -0,0 +1,296 @@
+"""Model format
+
+Pickle-free on-disk format for the classification models. A model is stored
+as a directory (by convention with the suffix ".qmodel") that contains a JSON
+header and one raw .npy file per array. The header describes the format
+version, the model kind, the feature column order, and the feature selection
+mask, hence a model can be applied without the tables in utils/tables. Arrays
+are loaded with np.load(mmap_mode='r') and never unpickled, so loading is fast
+for large forests, independent of the scikit-learn version, and safe for
+models provided by users.
+
+Tree ensembles are stored as flattened by utils/tree_engine.py, Logistic
+Regression and Multi-layer Perceptron models by their weights. The remaining
+classifiers (SVC, K-nearest neighbor, Naive Bayes) cannot be converted and are
+kept as pickles.
+
+Methods
+-------
+
+save_model(model, model_path, feature_columns, selection=None, setting=None, feature_sets=None, application_case=None)
+	writes a trained scikit-learn model (or a compiled model) in the format
+load_model(model_path, mmap_mode='r')
+	returns the StoredModel, raises an IncorrectModelException for invalid models
+is_model_dir(model_path)
+	returns True if the path is a model in the format
+is_convertible(model)
+	returns True if the model can be stored in the format
+to_array_model(model)
+	converts a trained scikit-learn model into its NumPy representation
+StoredModel.predict_proba(X)
+	returns the class probabilities for the samples in X (selected features)
+
+date:	2026-10-18
+
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+
+import utils.Exceptions as myExceptions
+import utils.tree_engine as tree_engine
+
+global format_name
+format_name = 'seqQscorer-model'
+
+global format_version
+format_version = 1
+
+global model_suffix
+model_suffix = '.qmodel'
+
+global header_file_name
+header_file_name = 'header.json'
+
+global convertible_models
+convertible_models = tree_engine.compilable_models + ['LogisticRegression', 'MLPClassifier']
+
+# same logistic function as used by scikit-learn, scipy is imported on first use
+expit = tree_engine.expit
+
+
+class LinearModel:
+	"""Logistic Regression given by its coefficients."""
+
+	def __init__(self, classes, coef, intercept):
+		self.kind = 'logistic_regression'
+		self.classes_ = np.asarray(classes)
+		self.coef = np.asarray(coef, dtype=np.float64)
+		self.intercept = np.asarray(intercept, dtype=np.float64)
+		self.n_features_in_ = self.coef.shape[1]
+
+	def get_header(self):
+		return {'kind': self.kind, 'n_features': self.n_features_in_}
+
+	def get_arrays(self):
+		return {'coef': self.coef, 'intercept': self.intercept, 'classes': self.classes_}
+
+	@classmethod
+	def from_arrays(cls, header, arrays):
+		return cls(arrays['classes'], arrays['coef'], arrays['intercept'])
+
+	def predict_proba(self, X):
+		# one-vs-rest probabilities, as computed by scikit-learn for binary problems
+		prob = np.dot(X, self.coef.T) + self.intercept
+		prob = prob.ravel() if prob.shape[1] == 1 else prob
+		expit(prob, out=prob)
+		if prob.ndim == 1:
+			return np.vstack([1 - prob, prob]).T
+		prob /= prob.sum(axis=1).reshape((prob.shape[0], -1))
+		return prob
+
+
+class NeuralNetwork:
+	"""Multi-layer Perceptron given by its weights and activation functions."""
+
+	def __init__(self, classes, coefs, intercepts, activation, out_activation):
+		self.kind = 'mlp'
+		self.classes_ = np.asarray(classes)
+		self.coefs = [np.asarray(coef, dtype=np.float64) for coef in coefs]
+		self.intercepts = [np.asarray(intercept, dtype=np.float64) for intercept in intercepts]
+		self.activation = activation
+		self.out_activation = out_activation
+		self.n_features_in_ = self.coefs[0].shape[0]
+
+	def get_header(self):
+		return {'kind': self.kind, 'n_features': self.n_features_in_, 'n_layers': len(self.coefs) + 1,
+				'activation': self.activation, 'out_activation': self.out_activation}
+
+	def get_arrays(self):
+		arrays = {'classes': self.classes_}
+		for i in range(len(self.coefs)):
+			arrays['coef_%d'%(i)] = self.coefs[i]
+			arrays['intercept_%d'%(i)] = self.intercepts[i]
+		return arrays
+
+	@classmethod
+	def from_arrays(cls, header, arrays):
+		n_weights = header['n_layers'] - 1
+		coefs = [arrays['coef_%d'%(i)] for i in range(n_weights)]
+		intercepts = [arrays['intercept_%d'%(i)] for i in range(n_weights)]
+		return cls(arrays['classes'], coefs, intercepts, header['activation'], header['out_activation'])
+
+	def activate(self, X, function):
+		if function == 'relu':
+			np.maximum(X, 0, out=X)
+		elif function == 'logistic':
+			expit(X, out=X)
+		elif function == 'tanh':
+			np.tanh(X, out=X)
+		elif function == 'softmax':
+			tmp = X - X.max(axis=1)[:, np.newaxis]
+			np.exp(tmp, out=X)
+			X /= X.sum(axis=1)[:, np.newaxis]
+		elif function != 'identity':
+			raise myExceptions.IncorrectModelException(
+				'Unknown activation function "%s".'%(function))
+
+	def predict_proba(self, X):
+		# forward pass in the order of scikit-learn
+		activation = X
+		for i in range(len(self.coefs)):
+			activation = np.dot(activation, self.coefs[i])
+			activation += self.intercepts[i]
+			if i != len(self.coefs) - 1:
+				self.activate(activation, self.activation)
+		self.activate(activation, self.out_activation)
+		if activation.shape[1] == 1:
+			activation = activation.ravel()
+			return np.vstack([1 - activation, activation]).T
+		return activation
+
+
+global model_kinds
+model_kinds = {'forest': tree_engine.CompiledEnsemble, 'tree': tree_engine.CompiledEnsemble,
+			'adaboost_samme_r': tree_engine.CompiledEnsemble, 'adaboost_samme': tree_engine.CompiledEnsemble,
+			'gradient_boosting': tree_engine.CompiledEnsemble,
+			'logistic_regression': LinearModel, 'mlp': NeuralNetwork}
+
+
+class StoredModel:
+	"""Model loaded from the format, together with its feature columns and selection."""
+
+	def __init__(self, header, array_model):
+		self.header = header
+		self.array_model = array_model
+		self.model_type = header['model_type']
+		self.feature_columns = header['feature_columns']
+		self.selection = header['selection']
+		self.classes_ = array_model.classes_
+		self.n_features_in_ = array_model.n_features_in_
+
+	def predict_proba(self, X):
+		X = np.asarray(X, dtype=np.float64)
+		if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+			raise myExceptions.WrongFeatureInputException(
+				'The model expects %d features.'%(self.n_features_in_))
+		return self.array_model.predict_proba(X)
+
+
+def is_convertible(model):
+	return type(model).__name__ in convertible_models or type(model).__name__ == 'StoredModel'
+
+def to_array_model(model):
+	model_type = type(model).__name__
+	if model_type == 'StoredModel':
+		return model.array_model
+	if tree_engine.is_compilable(model):
+		return tree_engine.compile_model(model)
+	if model_type == 'LogisticRegression':
+		return LinearModel(model.classes_, model.coef_, model.intercept_)
+	if model_type == 'MLPClassifier':
+		return NeuralNetwork(model.classes_, model.coefs_, model.intercepts_,
+							model.activation, model.out_activation_)
+	raise myExceptions.IncorrectModelException(
+		'Models of type %s cannot be stored without pickle, supported are: %s.'%(
+			model_type, ', '.join(convertible_models)))
+
+def get_header_path(model_path):
+	return os.path.join(model_path, header_file_name)
+
+def is_model_dir(model_path):
+	return os.path.isdir(model_path) and os.path.isfile(get_header_path(model_path))
+
+def get_array_hash(array):
+	return hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+def save_model(model, model_path, feature_columns, selection=None, setting=None, feature_sets=None,
+			application_case=None):
+	model_path = model_path.rstrip('/')
+	array_model = to_array_model(model)
+	n_selected = len(feature_columns) if selection == None else sum(selection)
+	if selection != None and len(selection) != len(feature_columns):
+		raise myExceptions.IncorrectModelException(
+			'The selection mask does not fit to the %d feature columns.'%(len(feature_columns)))
+	if n_selected != array_model.n_features_in_:
+		raise myExceptions.IncorrectModelException(
+			'The model expects %d features, but %d are selected.'%(array_model.n_features_in_, n_selected))
+
+	header = {'format': format_name, 'version': format_version,
+			'model_type': getattr(model, 'model_type', type(model).__name__),
+			'model': array_model.get_header(),
+			'feature_columns': list(feature_columns),
+			'selection': None if selection == None else [bool(b) for b in selection],
+			'setting': None if setting == None else list(setting),
+			'feature_sets': None if feature_sets == None else list(feature_sets),
+			'application_case': application_case,
+			'arrays': {}}
+
+	# the model is written into a temporary directory first and moved afterwards,
+	# so that readers never see a partially written model
+	tmp_path = '%s.%d.tmp'%(model_path, os.getpid())
+	if os.path.exists(tmp_path):
+		shutil.rmtree(tmp_path)
+	os.makedirs(tmp_path)
+	for name, array in array_model.get_arrays().items():
+		array = np.ascontiguousarray(array)
+		np.save(os.path.join(tmp_path, name + '.npy'), array, allow_pickle=False)
+		header['arrays'][name] = {'file': name + '.npy', 'dtype': array.dtype.str,
+								'shape': list(array.shape), 'sha256': get_array_hash(array)}
+	with open(get_header_path(tmp_path), 'w') as f:
+		json.dump(header, f, indent=1)
+
+	if os.path.exists(model_path):
+		old_path = '%s.%d.old'%(model_path, os.getpid())
+		os.rename(model_path, old_path)
+		os.rename(tmp_path, model_path)
+		shutil.rmtree(old_path)
+	else:
+		os.rename(tmp_path, model_path)
+	return header
+
+def read_header(model_path):
+	try:
+		header = json.load(open(get_header_path(model_path), 'r'))
+	except (OSError, ValueError):
+		raise myExceptions.IncorrectModelException(
+			'The model header of "%s" could not be read.'%(model_path))
+	if not isinstance(header, dict) or header.get('format', None) != format_name:
+		raise myExceptions.IncorrectModelException(
+			'"%s" is not a seqQscorer model.'%(model_path))
+	if not isinstance(header.get('version', None), int) or header['version'] > format_version:
+		raise myExceptions.IncorrectModelException(
+			'The model "%s" has the format version %s, supported are versions up to %d.'%(
+				model_path, header.get('version', None), format_version))
+	if not header.get('model', {}).get('kind', None) in model_kinds:
+		raise myExceptions.IncorrectModelException(
+			'The model "%s" is of an unknown kind.'%(model_path))
+	return header
+
+def load_model(model_path, mmap_mode='r'):
+	header = read_header(model_path)
+	arrays = {}
+	for name, description in header['arrays'].items():
+		# only plain file names within the model directory are accepted
+		if os.path.basename(description['file']) != description['file']:
+			raise myExceptions.IncorrectModelException(
+				'The model "%s" refers to files outside of its directory.'%(model_path))
+		try:
+			array = np.load(os.path.join(model_path, description['file']), mmap_mode=mmap_mode,
+							allow_pickle=False)
+		except (OSError, ValueError):
+			raise myExceptions.IncorrectModelException(
+				'The array "%s" of the model "%s" could not be loaded.'%(name, model_path))
+		if array.dtype.str != description['dtype'] or list(array.shape) != description['shape']:
+			raise myExceptions.IncorrectModelException(
+				'The array "%s" of the model "%s" does not fit to the header.'%(name, model_path))
+		arrays[name] = array
+	try:
+		array_model = model_kinds[header['model']['kind']].from_arrays(header['model'], arrays)
+	except KeyError as e:
+		raise myExceptions.IncorrectModelException(
+			'The model "%s" is incomplete, %s is missing.'%(model_path, e))
+	return StoredModel(header, array_model)
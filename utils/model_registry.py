@@ -0,0 +1,180 @@
+"""Model registry
+
+In-process cache for the serialized classification models. Each model is
+deserialized only once and kept in a bounded LRU. Before a cached model is
+returned, the state of its file (modification time and size, optionally the
+sha256 hash) is compared to the state at loading time, so that a model is
+loaded again when its file was replaced. Models in the pickle-free format of
+utils/model_format.py (directories ending with ".qmodel") are memory-mapped
+and preferred over the pickle of the same application case.
+
+Methods
+-------
+
+get_registry(models_dir, max_size=16)
+	returns the registry shared within the process for the given model folder
+ModelRegistry.get_key(species, assay, run_type, feature_sets, metric, fs_suffix, seed)
+	returns the key identifying the model for a setting
+ModelRegistry.get_model_file_path(key, suffix='.model')
+	returns the file path of the serialized model in the model folder
+ModelRegistry.get_lock_file_path(key)
+	returns the file path of the inter-process lock of the model, the lock
+	files are kept in the folder .locks/ of the model folder
+ModelRegistry.get_path(key)
+	returns the path of the model used for the key, the pickle-free format is preferred
+ModelRegistry.get(key)
+	returns the model for the key or None if it was not trained so far
+ModelRegistry.get_file(model_file_path)
+	returns the model from any file or model directory, e.g. a model provided by the user
+ModelRegistry.put(key, model, model_file_path=None)
+	adds a model that was just trained to the registry
+
+date:	2026-10-18
+
+"""
+
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+import utils.Exceptions as myExceptions
+import utils.model_format as model_format
+
+
+def get_state_path(file_path):
+	# a model directory is replaced as a whole, its header (with the hashes
+	# of all arrays) identifies its state
+	if os.path.isdir(file_path):
+		return model_format.get_header_path(file_path)
+	return file_path
+
+def get_file_hash(file_path):
+	file_path = get_state_path(file_path)
+	sha256 = hashlib.sha256()
+	with open(file_path, 'rb') as f:
+		for block in iter(lambda: f.read(1 << 20), b''):
+			sha256.update(block)
+	return sha256.hexdigest()
+
+def get_file_state(file_path):
+	stat = os.stat(get_state_path(file_path))
+	return (stat.st_mtime_ns, stat.st_size)
+
+
+class ModelRegistry:
+	"""Bounded LRU of deserialized models that detects changed model files."""
+
+	def __init__(self, models_dir, max_size=16, check_hash=False):
+		if models_dir[-1] != '/':
+			models_dir += '/'
+		self.models_dir = models_dir
+		self.max_size = max_size
+		self.check_hash = check_hash
+		self.entries = OrderedDict()
+		self.lock = threading.RLock()
+		self.loads = 0
+		self.hits = 0
+
+	@staticmethod
+	def get_key(species, assay, run_type, feature_sets, metric, fs_suffix, seed):
+		return (species, assay, run_type, '-'.join(feature_sets), metric, fs_suffix, seed)
+
+	def get_model_file_path(self, key, suffix='.model'):
+		species, assay, run_type, feature_sets, metric, fs_suffix, seed = key
+		application_case = '%s_%s_%s_%s_%s%s'%(species, assay, run_type, feature_sets, metric, fs_suffix)
+		return '%s%s_%d%s'%(self.models_dir, application_case, seed, suffix)
+
+	def get_lock_file_path(self, key):
+		# lock files are never removed (see utils/file_lock.py), hence they are kept apart from the models
+		locks_dir = '%s.locks/'%(self.models_dir)
+		os.makedirs(locks_dir, exist_ok=True)
+		return locks_dir + os.path.basename(self.get_model_file_path(key, '.lock'))
+
+	def keys(self):
+		with self.lock:
+			return list(self.entries.keys())
+
+	def get_path(self, key):
+		model_file_path = self.get_model_file_path(key, model_format.model_suffix)
+		if not os.path.exists(model_file_path):
+			model_file_path = self.get_model_file_path(key)
+		return model_file_path
+
+	def get(self, key):
+		return self.load(key, self.get_path(key), required=False)
+
+	def get_file(self, model_file_path):
+		return self.load(('file', os.path.abspath(model_file_path)), model_file_path, required=True)
+
+	def put(self, key, model, model_file_path=None):
+		with self.lock:
+			state, file_hash = None, None
+			if model_file_path != None and os.path.exists(model_file_path):
+				state = get_file_state(model_file_path)
+				file_hash = get_file_hash(model_file_path) if self.check_hash else None
+			self.store(key, (model, model_file_path, state, file_hash))
+
+	def store(self, key, entry):
+		self.entries[key] = entry
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.max_size:
+			self.entries.popitem(last=False)
+
+	def is_current(self, entry):
+		model, model_file_path, state, file_hash = entry
+		if model_file_path == None:
+			return True
+		if not os.path.exists(model_file_path):
+			return False
+		current_state = get_file_state(model_file_path)
+		if current_state == state:
+			return True
+		if self.check_hash and get_file_hash(model_file_path) == file_hash:
+			return True
+		return False
+
+	def load(self, key, model_file_path, required):
+		with self.lock:
+			if key in self.entries:
+				entry = self.entries[key]
+				# the entry is outdated as well if e.g. a pickle was converted in the meantime
+				if entry[1] in [None, model_file_path] and self.is_current(entry):
+					self.hits += 1
+					self.entries.move_to_end(key)
+					return entry[0]
+				del self.entries[key]
+
+			if not os.path.exists(model_file_path):
+				if required:
+					raise myExceptions.IncorrectModelException(
+						'The provided model from file "%s" could not be loaded.'%(model_file_path))
+				return None
+
+			try:
+				state = get_file_state(model_file_path)
+				file_hash = get_file_hash(model_file_path) if self.check_hash else None
+				if model_format.is_model_dir(model_file_path):
+					model = model_format.load_model(model_file_path)
+				else:
+					model = pickle.load(open(model_file_path, 'rb'))
+			except myExceptions.IncorrectModelException:
+				raise
+			except:
+				raise myExceptions.IncorrectModelException(
+					'The provided model from file "%s" could not be loaded.'%(model_file_path))
+			self.loads += 1
+			self.store(key, (model, model_file_path, state, file_hash))
+			return model
+
+
+registries = {}
+registries_lock = threading.Lock()
+
+def get_registry(models_dir, max_size=16):
+	models_dir = os.path.abspath(models_dir) + '/'
+	with registries_lock:
+		if not models_dir in registries:
+			registries[models_dir] = ModelRegistry(models_dir, max_size)
+		return registries[models_dir]
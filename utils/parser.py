@@ -2,41 +2,237 @@
 
 This script provides functions used by seqQscorer to parse input files.
 
+Feature set files can be plain or gzipped (e.g. ENCFF165NJF.RAW.gz), and the
+input directory can also be a tar (.tar, .tar.gz, .tgz, .tar.bz2, .tar.xz) or
+zip archive. Members of an archive are addressed as "<archive>::<member>" and
+are read in memory without extraction.
+
 Methods
 -------
 
+is_archive(path)
+	returns True if the path is a tar or zip archive that can be used as input
+get_sample_ID(file_path)
+	returns the sample ID defined by the name of a feature set file
+get_physical_path(file_path)
+	returns the file on disk containing a feature set file, i.e. the archive
+	for members of an archive
+read_feature_file(file_path)
+	returns the (decompressed) content of a feature set file as bytes
+open_feature_file(file_path)
+	opens a feature set file for reading text, also for gzipped files and
+	members of archives
+archive_session()
+	context manager keeping the archives opened within it open, until the
+	outermost session ends. Used while an archive is listed or its members
+	are parsed, hence no archive stays open after a call and an archive
+	replaced on disk is read anew by the next call
+close_archives()
+	closes the archives opened so far
 get_FastQC_features(feature_file_path)
 	parses the RAW features from the FastQC tool
+get_Bowtie_summaries(text, source='the Bowtie2 log')
+	parses one or several concatenated Bowtie2 alignment summaries in a single
+	pass of one regular expression and returns the named groups of each
+	summary, i.e. the count ("<label>_count") and percentage ("<label>") of
+	each line by label, or the count ("<label>") of lines without percentage.
+	Lines that are not part of a summary (e.g. warnings) are skipped,
+	summaries with an unexpected layout are rejected
+parse_Bowtie_logs(text, source='the Bowtie2 log')
+	returns per summary the counts and percentages by label as
+	{label: (count, percentage)}
+get_Bowtie_summary_features(summary)
+	returns the MAP features of a parsed Bowtie2 summary, for paired-end and
+	mixed summaries the features of the pairs are used
+get_Bowtie_stream_features(text, source='the Bowtie2 log stream')
+	returns the MAP features of each summary of a concatenated log stream
 parse_BowtieSE(lines)
 	parses the MAP features from Bowtie2 from single-end sequencing samples
 parse_BowtiePE(lines)
 	parses the MAP features from Bowtie2 from paired-end sequencing samples
 get_Bowtie_features(feature_file_path)
 	directly used by seqQscorer, parses Bowtie2 input and defines the run type
-get_readsAnno_features(feature_file_path)
+get_LOC_feature_name(name)
+	returns the feature name of a genomic region annotated by ChIPseeker
+get_LOC_features(feature_file_path)
 	parses the LOC features from ChIPseeker
+get_TSS_feature_name(tss_dist)
+	returns the feature name of a distance to the TSS from ChIPpeakAnno
 get_TSS_features(feature_file_path)
 	parses the TSS features from ChIPpeakAnno
-generate_input_data(indir, feature_sets, run_type, medians, noVerbose=True, restrict=None)
+get_feature_columns(feature_sets, run_type, medians)
+	returns the sorted feature columns used by the models for the given feature sets
+create_input_matrix(parsed_input, feature_sets, run_type, medians, noVerbose=True)
+	given the parsed features per sample, this function creates the input
+	matrix (one row per sample, in the order of parsed_input) and imputes
+	missing values by the median, without using pandas
+create_input_data(parsed_input, feature_sets, run_type, medians, noVerbose=True)
+	given the parsed features per sample, this function creates the input data
+	frame and imputes missing values by the median
+parse_feature_files(tasks, workers=1, pool='thread')
+	parses (file path, feature set) tasks, optionally with a pool of threads or
+	processes (not for members of archives), and returns (features, error)
+	pairs in the order of the tasks
+parse_shard(shard)
+	returns the shard given as "i/N" (e.g. "2/8") as tuple (i, N), shards are
+	numbered from 1 to N
+get_shard(sample_ID, n_shards)
+	returns the shard of a sample, defined by a stable hash of the sample ID
+get_feature_file_index(indir, feature_sets, restrict=None, shard=None, duplicates=None)
+	returns the feature set files per sample ID as {sampleID: {feature set:
+	file path}}, found by os.scandir in the input directory and all its
+	subdirectories, optionally only of the samples of one shard. If a feature
+	set of a sample is given by several files (e.g. X.RAW and X.RAW.gz), the
+	first file found is used and the others are added as (file path, feature
+	set) tasks to duplicates, if a list is given
+split_duplicate_tasks(tasks)
+	returns the tasks with only the first file per sample and feature set, and
+	the other files as (file path, error) pairs
+get_sample_files(indir, sample_ID, feature_sets)
+	returns the feature set files of one sample in the input directory as
+	{feature set: file path}, found by checking the expected file paths
+get_feature_file_tasks(indir, feature_sets, restrict=None, shard=None)
+	returns the (file path, feature set) tasks of the feature set files in the
+	input directory, optionally only of the samples of one shard. A sample
+	given by restrict is looked up directly, the directory is only searched
+	if not all its feature set files are in the input directory itself.
+	Duplicate files of a feature set follow the first file, they are reported
+	as errors when the tasks are parsed
+get_sample_chunks(tasks, chunk_size)
+	groups the (file path, feature set) tasks by sample ID and yields them in
+	chunks of chunk_size samples, the files of a sample are never split
+parse_input_files(indir, feature_sets, restrict=None, workers=1, pool='thread', errors=None, tasks=None, verbose=True)
+	parses the feature set files from the input directory and returns the features
+	per sample. Files that cannot be parsed, and duplicate files of a feature set,
+	are reported (if verbose) and, if a list is given via errors, added to it as
+	(file path, error) pairs. If tasks are given, only these files are parsed
+generate_input_data(indir, feature_sets, run_type, medians, noVerbose=True, restrict=None, workers=1, pool='thread', errors=None, tasks=None)
 	given the input directory this function reads in the feature sets for 
-	all samples provided by the user
+	all samples provided by the user and creates the input data frame
 
 date:	2020-11-02
 author:	Steffen Albrecht
 
 """
 
+import io
 import os
+import re
+import csv
+import gzip
+import hashlib
+import tarfile
+import zipfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 import numpy as np
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import utils.Exceptions as myExceptions
 
 global FastQC_value_map
 FastQC_value_map = {'FAIL': 0, 'WARN': 1, 'PASS': 2}
 
+global archive_suffixes
+archive_suffixes = ['.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz', '.zip']
+
+global archive_separator
+archive_separator = '::'
+
+# archives stay open with their list of members during an archive session, so that
+# the members are read in one pass. Archive objects are not thread-safe, the lock
+# serializes access
+global open_archives
+open_archives = {}
+global archive_sessions
+archive_sessions = 0
+archives_lock = threading.Lock()
+
+
+def is_archive(path):
+	return os.path.isfile(path) and any([path.endswith(suffix) for suffix in archive_suffixes])
+
+def get_sample_ID(file_path):
+	file_name = os.path.basename(file_path.split(archive_separator)[-1])
+	if file_name.endswith('.gz'):
+		file_name = file_name[:-3]
+	return file_name[:-4]
+
+def split_feature_file_name(file_name, feature_sets):
+	if file_name.endswith('.gz'):
+		file_name = file_name[:-3]
+	if file_name[-4:] in [ '.'+fs for fs in feature_sets ]:
+		return file_name[:-4], file_name[-3:]
+	return None, None
+
+def get_physical_path(file_path):
+	return file_path.split(archive_separator)[0]
+
+def get_archive(archive_path):
+	if not archive_path in open_archives:
+		try:
+			if archive_path.endswith('.zip'):
+				archive = zipfile.ZipFile(archive_path)
+				members = OrderedDict( (info.filename, info) for info in archive.infolist() if not info.is_dir() )
+			else:
+				archive = tarfile.open(archive_path, 'r:*')
+				members = OrderedDict( (info.name, info) for info in archive.getmembers() if info.isfile() )
+		except (tarfile.TarError, zipfile.BadZipFile) as e:
+			raise myExceptions.WrongFeatureInputException(
+				'The archive "%s" could not be read: %s'%(archive_path, str(e)))
+		open_archives[archive_path] = (archive, members)
+	return open_archives[archive_path]
+
+def close_open_archives():
+	for archive, members in open_archives.values():
+		archive.close()
+	open_archives.clear()
+
+def close_archives():
+	with archives_lock:
+		close_open_archives()
+
+@contextmanager
+def archive_session():
+	# sessions of concurrent threads share the archives, they are closed with the last session
+	global archive_sessions
+	with archives_lock:
+		archive_sessions += 1
+	try:
+		yield
+	finally:
+		with archives_lock:
+			archive_sessions -= 1
+			if archive_sessions == 0:
+				close_open_archives()
+
+def read_feature_file(file_path):
+	if archive_separator in file_path:
+		archive_path, member = file_path.split(archive_separator, 1)
+		with archive_session():
+			with archives_lock:
+				archive, members = get_archive(archive_path)
+				if isinstance(archive, zipfile.ZipFile):
+					content = archive.read(members[member])
+				else:
+					content = archive.extractfile(members[member]).read()
+	else:
+		with open(file_path, 'rb') as f:
+			content = f.read()
+	if file_path.endswith('.gz'):
+		content = gzip.decompress(content)
+	return content
+
+def open_feature_file(file_path):
+	if archive_separator in file_path or file_path.endswith('.gz'):
+		return io.TextIOWrapper(io.BytesIO(read_feature_file(file_path)))
+	return open(file_path, 'r')
+
 
 def get_RAW_features(feature_file_path):
 	features = {}
-	with open(feature_file_path, 'r') as feature_file:
+	with open_feature_file(feature_file_path) as feature_file:
 		for line in feature_file:
 			line = line.strip().split('\t')
 			feature_name = line[1].replace(' ', '_')
@@ -44,103 +240,209 @@ def get_RAW_features(feature_file_path):
 			features['FastQC_'+feature_name] = value
 	return features
 
+# the lines of a Bowtie2 alignment summary as (label, text, with percentage), in the order
+# written by Bowtie2. The labels name the groups of Bowtie_summary_pattern, lines given
+# without a percentage name their count, the others their percentage and "<label>_count"
+global Bowtie_summary_lines
+Bowtie_summary_lines = [('reads', 'reads; of these:', False),
+						('paired', 'were paired; of these:', True),
+						('concordant_0', 'aligned concordantly 0 times', True),
+						('concordant_1', 'aligned concordantly exactly 1 time', True),
+						('concordant_multi', 'aligned concordantly >1 times', True),
+						('not_concordant', 'pairs aligned concordantly 0 times; of these:', False),
+						('discordant_1', 'aligned discordantly 1 time', True),
+						('not_aligned', 'pairs aligned 0 times concordantly or discordantly; of these:', False),
+						('mates', 'mates make up the pairs; of these:', False),
+						('mates_0', 'aligned 0 times', True),
+						('mates_1', 'aligned exactly 1 time', True),
+						('mates_multi', 'aligned >1 times', True),
+						('unpaired', 'were unpaired; of these:', True),
+						('unpaired_0', 'aligned 0 times', True),
+						('unpaired_1', 'aligned exactly 1 time', True),
+						('unpaired_multi', 'aligned >1 times', True)]
+
+global Bowtie_summary_texts
+Bowtie_summary_texts = dict( (label, (text, percentage)) for label, text, percentage in Bowtie_summary_lines )
+
+def get_Bowtie_line_expression(label):
+	text, percentage = Bowtie_summary_texts[label]
+	if percentage:
+		return r'[ \t]*(?P<%s_count>\d+) \((?P<%s>\d+(?:\.\d+)?)%%\) %s[ \t\r]*\n'%(label, label, re.escape(text))
+	return r'[ \t]*(?P<%s>\d+) %s[ \t\r]*\n'%(label, re.escape(text))
+
+def get_Bowtie_block_expression(labels):
+	return ''.join([get_Bowtie_line_expression(label) for label in labels])
+
+# one expression for a whole summary, the blocks of discordant pairs and mates are
+# optional (--no-discordant, --no-mixed). It matches all summaries of a log stream in
+# one pass, lines in between (e.g. warnings) are not part of a summary
+global Bowtie_summary_pattern
+Bowtie_summary_pattern = re.compile('^' + get_Bowtie_line_expression('reads') + r'(?=[ \t]*\d+ \()' +
+	'(?:' + get_Bowtie_block_expression(['paired', 'concordant_0', 'concordant_1', 'concordant_multi']) +
+	r'(?:(?:[ \t]*----[ \t\r]*\n)?' + get_Bowtie_block_expression(['not_concordant', 'discordant_1']) + ')?' +
+	r'(?:(?:[ \t]*----[ \t\r]*\n)?' + get_Bowtie_block_expression(['not_aligned', 'mates', 'mates_0', 'mates_1', 'mates_multi']) + ')?)?' +
+	'(?:' + get_Bowtie_block_expression(['unpaired', 'unpaired_0', 'unpaired_1', 'unpaired_multi']) + ')?' +
+	r'[ \t]*(?P<overall>\d+(?:\.\d+)?)% overall alignment rate[ \t\r]*$', re.MULTILINE)
+
+# any line of a summary, to report the lines of summaries that do not match the layout
+global Bowtie_line_pattern
+Bowtie_line_pattern = re.compile(r'^[ \t]*(?:\d+ (?:\(\d+(?:\.\d+)?%%\) )?(?:%s)|\d+(?:\.\d+)?%% overall alignment rate)[ \t\r]*$'%(
+							'|'.join([re.escape(text) for text in sorted(set([text for label, text, percentage in Bowtie_summary_lines]),
+																		key=len, reverse=True)])), re.MULTILINE)
+
+# MAP features by the label of their line. Paired-end summaries define the features of
+# the pairs, and the concordant pairs are used for the single-end and mixed features
+global Bowtie_PE_features
+Bowtie_PE_features = [('BowtiePE_con_no_mapping', 'concordant_0'), ('BowtiePE_con_uniquely', 'concordant_1'),
+					('BowtiePE_con_multiple', 'concordant_multi'), ('BowtiePE_dis_uniquely', 'discordant_1'),
+					('BowtiePE_cod_no_mapping', 'mates_0'), ('BowtiePE_cod_uniquely', 'mates_1'),
+					('BowtiePE_cod_multiple', 'mates_multi'), ('BowtiePE_overall', 'overall')]
+Bowtie_PE_features += [(prefix + feature_name, label) for prefix in ['BowtieMI_', 'BowtieSE_']
+					for feature_name, label in [('no_mapping', 'concordant_0'), ('uniquely', 'concordant_1'),
+												('multiple', 'concordant_multi'), ('overall', 'overall')]]
+
+global Bowtie_SE_features
+Bowtie_SE_features = [(prefix + feature_name, label) for prefix in ['BowtieSE_', 'BowtieMI_']
+					for feature_name, label in [('no_mapping', 'unpaired_0'), ('uniquely', 'unpaired_1'),
+												('multiple', 'unpaired_multi'), ('overall', 'overall')]]
+
+def check_Bowtie_lines(text, start, end, source):
+	# lines between the summaries that look like a part of a summary
+	match = Bowtie_line_pattern.search(text, start, end)
+	if match != None:
+		raise myExceptions.WrongFeatureInputException(
+			'Line %d in %s: "%s" is not part of a complete Bowtie2 alignment summary.'%(
+				text.count('\n', 0, match.start()) + 1, source, match.group(0).strip()))
+
+def get_Bowtie_summaries(text, source='the Bowtie2 log'):
+	# the named groups of all summaries in one pass, the values as written by Bowtie2
+	summaries = []
+	position = 0
+	for match in Bowtie_summary_pattern.finditer(text):
+		check_Bowtie_lines(text, position, match.start(), source)
+		summaries.append(match.groupdict())
+		position = match.end()
+	check_Bowtie_lines(text, position, len(text), source)
+	if len(summaries) == 0:
+		raise myExceptions.WrongFeatureInputException(
+			'No Bowtie2 alignment summary found in %s.'%(source))
+	return summaries
+
+def parse_Bowtie_logs(text, source='the Bowtie2 log'):
+	logs = []
+	for summary in get_Bowtie_summaries(text, source):
+		log = {}
+		for label, line_text, percentage in Bowtie_summary_lines:
+			if summary[label] == None:
+				continue
+			if percentage:
+				log[label] = (int(summary[label + '_count']), float(summary[label]))
+			else:
+				log[label] = (int(summary[label]), None)
+		log['overall'] = (None, float(summary['overall']))
+		logs.append(log)
+	return logs
+
+def get_Bowtie_summary_features(summary):
+	# blocks missing in a summary (e.g. --no-discordant) give no features
+	feature_labels = Bowtie_PE_features if summary['paired'] != None else Bowtie_SE_features
+	return dict( (feature_name, float(summary[label])) for feature_name, label in feature_labels if summary[label] != None )
+
+def get_Bowtie_stream_features(text, source='the Bowtie2 log stream'):
+	return [get_Bowtie_summary_features(summary) for summary in get_Bowtie_summaries(text, source)]
+
+def check_single_Bowtie_summary(summaries, source):
+	if len(summaries) > 1:
+		raise myExceptions.WrongFeatureInputException(
+			'Found %d Bowtie2 alignment summaries in %s, one is expected.'%(len(summaries), source))
+	return summaries[0]
+
+def get_single_Bowtie_summary(lines, source='the Bowtie2 log'):
+	return check_single_Bowtie_summary(get_Bowtie_summaries(lines, source), source)
+
 def parse_BowtieSE(lines):
-	lines = lines.split('\n')
-	features = {}
-	features['BowtieSE_no_mapping'] = float(lines[2].split('(')[1].split('%')[0])
-	features['BowtieSE_uniquely'] = float(lines[3].split('(')[1].split('%')[0])
-	features['BowtieSE_multiple'] = float(lines[4].split('(')[1].split('%')[0])
-	features['BowtieSE_overall'] = float(lines[5].split('%')[0])
-	# for mixed Bowtie
-	features['BowtieMI_no_mapping'] = features['BowtieSE_no_mapping']
-	features['BowtieMI_uniquely'] = features['BowtieSE_uniquely']
-	features['BowtieMI_multiple'] = features['BowtieSE_multiple']
-	features['BowtieMI_overall'] = features['BowtieSE_overall']
-	return features
+	summary = get_single_Bowtie_summary(lines)
+	if summary['paired'] != None:
+		raise myExceptions.WrongFeatureInputException(
+			'The Bowtie2 alignment summary is not from single-end reads.')
+	return get_Bowtie_summary_features(summary)
 
 def parse_BowtiePE(lines):
-	lines = lines.split('\n')
-	features = {}
-	features['BowtiePE_con_no_mapping'] = float(lines[2].split('(')[1].split('%')[0])
-	features['BowtiePE_con_uniquely'] = float(lines[3].split('(')[1].split('%')[0])
-	features['BowtiePE_con_multiple'] = float(lines[4].split('(')[1].split('%')[0])
-	features['BowtiePE_dis_uniquely'] = float(lines[7].split('(')[1].split('%')[0])
-	features['BowtiePE_cod_no_mapping'] = float(lines[11].split('(')[1].split('%')[0])
-	features['BowtiePE_cod_uniquely'] = float(lines[12].split('(')[1].split('%')[0])
-	features['BowtiePE_cod_multiple'] = float(lines[13].split('(')[1].split('%')[0])
-	features['BowtiePE_overall'] = float(lines[14].split('%')[0])
-	# for mixed Bowtie
-	features['BowtieMI_no_mapping'] = features['BowtiePE_con_no_mapping']
-	features['BowtieMI_uniquely'] = features['BowtiePE_con_uniquely']
-	features['BowtieMI_multiple'] = features['BowtiePE_con_multiple']
-	features['BowtieMI_overall'] = features['BowtiePE_overall']
-	# for SE Bowtie
-	features['BowtieSE_no_mapping'] = features['BowtiePE_con_no_mapping']
-	features['BowtieSE_uniquely'] = features['BowtiePE_con_uniquely']
-	features['BowtieSE_multiple'] = features['BowtiePE_con_multiple']
-	features['BowtieSE_overall'] = features['BowtiePE_overall']
-	return features
+	summary = get_single_Bowtie_summary(lines)
+	if summary['paired'] == None:
+		raise myExceptions.WrongFeatureInputException(
+			'The Bowtie2 alignment summary is not from paired-end reads.')
+	return get_Bowtie_summary_features(summary)
 
 def get_MAP_features(feature_file_path):
-	lines = open(feature_file_path, 'r').read()
-	if 'concordantly' in lines and 'discordantly' in lines:
-		return parse_BowtiePE(lines)
-	else:
-		return parse_BowtieSE(lines)
+	with open_feature_file(feature_file_path) as feature_file:
+		lines = feature_file.read()
+	return get_Bowtie_summary_features(get_single_Bowtie_summary(lines, '"%s"'%(feature_file_path)))
+
+def get_LOC_feature_name(name):
+	name = name.replace('"', '')
+	name = name.replace("'", '')
+	name = name.replace(' (<=300)', '')
+	name = name.replace(' ', '_')
+	return 'readsAnno_'+name
+
+# feature names of the genomic regions in the tables written by ChIPseeker
+# (see utils/get_LOC_features.R), other regions are named by get_LOC_feature_name
+global LOC_feature_names
+LOC_feature_names = dict( (name, get_LOC_feature_name(name)) for name in ['Promoter', "5' UTR", "3' UTR",
+						'1st Exon', 'Other Exon', '1st Intron', 'Other Intron', 'Downstream (<=300)', 'Distal Intergenic'] )
+
+def get_TSS_feature_name(tss_dist):
+	# the distance as formatted when the table was read by pandas.read_csv before
+	try:
+		tss_dist = str(int(tss_dist))
+	except ValueError:
+		tss_dist = str(float(tss_dist))
+	return 'TSS_'+tss_dist if tss_dist[0] == '-' else 'TSS_+'+tss_dist
+
+# feature names of the distances in the tables written by ChIPpeakAnno
+# (see utils/get_TSS_features.R), other distances are named by get_TSS_feature_name
+global TSS_feature_names
+TSS_feature_names = dict( (tss_dist, get_TSS_feature_name(tss_dist)) for tss_dist in
+						['-4500', '-3500', '-2500', '-1500', '-500', '500', '1500', '2500', '3500', '4500'] )
 
 def get_LOC_features(feature_file_path):
+	# tables written by R, the quoted names are read by the csv module
 	features = {}
-	with open(feature_file_path, 'r') as f:
-		f.readline()
-		for line in f:
-			line = line.strip().split('\t')
-			feature_name = line[1]
-			feature_name = feature_name.replace('"', '')
-			feature_name = feature_name.replace("'", '')
-			feature_name = feature_name.replace(' (<=300)', '')
-			feature_name = feature_name.replace(' ', '_')
-			feature_name = 'readsAnno_'+feature_name
-			features[feature_name] = float(line[2])
+	with open_feature_file(feature_file_path) as feature_file:
+		rows = csv.reader(feature_file, delimiter='\t')
+		next(rows, None)
+		for row in rows:
+			if len(row) == 0:
+				continue
+			feature_name = LOC_feature_names.get(row[1], None)
+			if feature_name == None:
+				feature_name = get_LOC_feature_name(row[1])
+			features[feature_name] = float(row[2])
 	return features
 
 def get_TSS_features(feature_file_path):
-	tss = pd.read_csv(feature_file_path, sep='\t')
-	tss_dist = list(map(str,tss['tss_dist']))
-	feature_names = ['TSS_'+name if name[0] == '-' else 'TSS_+'+name for name in tss_dist]
-	feature_values = list(tss['perc'])
-	return dict(zip(feature_names, feature_values))
+	features = {}
+	with open_feature_file(feature_file_path) as feature_file:
+		rows = csv.reader(feature_file, delimiter='\t')
+		header = next(rows, [])
+		if not 'tss_dist' in header or not 'perc' in header:
+			raise myExceptions.WrongFeatureInputException(
+				'The TSS table "%s" needs the columns tss_dist and perc.'%(feature_file_path))
+		dist_index, perc_index = header.index('tss_dist'), header.index('perc')
+		for row in rows:
+			if len(row) == 0:
+				continue
+			# rows with row names have one field more than the header
+			offset = len(row) - len(header)
+			feature_name = TSS_feature_names.get(row[dist_index + offset], None)
+			if feature_name == None:
+				feature_name = get_TSS_feature_name(row[dist_index + offset])
+			features[feature_name] = float(row[perc_index + offset])
+	return features
 
 
-def generate_input_data(indir, feature_sets, run_type, medians, noVerbose=True, restrict=None):
-	print('Parsing input data...')
-	# initialize the specific parser functions
-	parsers = {}
-	parsers['RAW'] = get_RAW_features
-	parsers['MAP'] = get_MAP_features
-	parsers['LOC'] = get_LOC_features
-	parsers['TSS'] = get_TSS_features
-	
-	# parse input data and create an input data frame
-	if indir[-1] != '/':
-		indir += '/'
-	
-	parsed_input = {}
-	for subdir, dirs, files in os.walk(indir):
-		for feature_file in files:
-			file_path = indir + feature_file
-			sample_ID = feature_file[:-4]
-			if restrict != None:
-				if restrict != sample_ID:
-					continue
-			feature_set = feature_file[-3:]
-			if os.path.exists(file_path):
-				if feature_file[-4:] in [ '.'+fs for fs in feature_sets ]:
-					if not sample_ID in parsed_input:
-						parsed_input[sample_ID] = {}
-					
-					features = parsers[feature_set](file_path)
-					parsed_input[sample_ID].update(features)
-	
+def get_feature_columns(feature_sets, run_type, medians):
 	feature_prefix = {'RAW': 'FastQC', 'MAP': 'BowtieMI',
 					'LOC': 'readsAnno', 'TSS': 'TSS'}
 	if run_type != 'generic':
@@ -153,38 +455,245 @@ def generate_input_data(indir, feature_sets, run_type, medians, noVerbose=True,
 		feature_cols += col_names
 	feature_cols = sorted(feature_cols)
 	
-	missing = False
-	input_data = dict( (col, []) for col in ['sampleID'] + feature_cols )
-	for sample in parsed_input:
-		input_data['sampleID'].append(sample)
-		for col in feature_cols:
-			if col in parsed_input[sample]:
-				input_data[col].append(parsed_input[sample][col])
-			else:
-				missing = True
-				input_data[col].append(np.nan)
-				if col in feature_cols and not noVerbose:
-					print('\nWarning! The feature "%s" is missing for %s'%(col, sample))
-	if missing and not noVerbose:
+	return feature_cols
+
+def impute_input_matrix(parsed_input, feature_sets, run_type, medians, noVerbose=True):
+	feature_cols = get_feature_columns(feature_sets, run_type, medians)
+	samples = list(parsed_input.keys())
+	
+	# fill a preallocated matrix, features not provided for a sample remain NaN
+	values = np.full((len(samples), len(feature_cols)), np.nan, dtype=float)
+	for i, sample in enumerate(samples):
+		features = parsed_input[sample]
+		values[i] = [features.get(col, np.nan) for col in feature_cols]
+	missing = np.isnan(values)
+	
+	if missing.any() and not noVerbose:
+		for i, j in zip(*np.nonzero(missing)):
+			print('\nWarning! The feature "%s" is missing for %s'%(feature_cols[j], samples[i]))
 		print('\nMissing values will be imputed by median.')
 		print('However, you might check your input data.\n')
+		
+		# search for features without any value
+		if len(samples) > 0:
+			for j in np.nonzero(missing.all(axis=0))[0]:
+				print('\nWarning: No values at all for the following feature:')
+				print('\t%s'%(feature_cols[j]))
+				print('\nFeature was imputed for all samples with its median value: "%s"\n'%(str(medians[feature_cols[j]])))
+	
+	# imputation of missing values by the median value
+	median_values = np.array([medians[col] for col in feature_cols], dtype=float)
+	values = np.where(missing, median_values, values)
 	
-	input_data = pd.DataFrame(input_data)
-	input_data = input_data[['sampleID'] + feature_cols]
+	return samples, values, missing, feature_cols
+
+def create_input_matrix(parsed_input, feature_sets, run_type, medians, noVerbose=True):
+	samples, values, missing, feature_cols = impute_input_matrix(parsed_input, feature_sets, run_type,
+																medians, noVerbose)
+	return values, feature_cols
+
+def create_input_data(parsed_input, feature_sets, run_type, medians, noVerbose=True):
+	# pandas is only imported for the input data frame, the input matrix does not need it
+	import pandas as pd
+	samples, values, missing, feature_cols = impute_input_matrix(parsed_input, feature_sets, run_type,
+																medians, noVerbose)
 	
-	# search for missing features
-	missing_features = list(filter(lambda x: not x in input_data.columns, feature_cols))
-	for feature in missing_features:
-		median = medians[feature]
-		if not noVerbose:
-			print('\nWarning: No values at all for the following feature:')
-			print('\t%s'%(feature))
-			print('\nFeature was imputed for all samples with its median value: "%s"\n'%(str(median)))
-		input_data[feature] = input_data.shape[0] * median
+	input_data = pd.DataFrame(values, columns=feature_cols)
+	input_data.insert(0, 'sampleID', samples)
+	
+	# FastQC features are categorical, they stay integers unless a median was imputed
+	complete = ~missing.any(axis=0)
+	for j, col in enumerate(feature_cols):
+		if col.startswith('FastQC_') and complete[j]:
+			input_data[col] = input_data[col].astype(int)
+	
+	return input_data, feature_cols
 
-	# imputation of missing values by the median value
-	for feature in feature_cols:
-		input_data[feature] = [medians[feature] if np.isnan(value) else value for value in input_data[feature]]
+global feature_parsers
+feature_parsers = {'RAW': get_RAW_features, 'MAP': get_MAP_features,
+					'LOC': get_LOC_features, 'TSS': get_TSS_features}
+
+def parse_feature_file(task):
+	file_path, feature_set = task
+	try:
+		return feature_parsers[feature_set](file_path), None
+	except Exception as e:
+		return None, '%s: %s'%(type(e).__name__, str(e))
+
+def parse_feature_files(tasks, workers=1, pool='thread'):
+	# members of archives are read one after the other, in the order of the archive,
+	# and each archive is opened only once for all its members
+	if any([archive_separator in file_path for file_path, feature_set in tasks]):
+		with archive_session():
+			return list(map(parse_feature_file, tasks))
+	if workers <= 1 or len(tasks) <= 1:
+		return list(map(parse_feature_file, tasks))
+	# map keeps the order of the tasks, hence the output is deterministic
+	if pool == 'process':
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			chunksize = max(1, len(tasks) // (workers * 4))
+			return list(executor.map(parse_feature_file, tasks, chunksize=chunksize))
+	with ThreadPoolExecutor(max_workers=workers) as executor:
+		return list(executor.map(parse_feature_file, tasks))
+
+def parse_shard(shard):
+	try:
+		index, n_shards = [int(part) for part in shard.split('/')]
+	except ValueError:
+		raise myExceptions.WrongSettingException(
+			'The shard "%s" has to be given as i/N, e.g. 2/8.'%(shard))
+	if n_shards < 1 or index < 1 or index > n_shards:
+		raise myExceptions.WrongSettingException(
+			'The shard "%s" is not valid, shards are numbered from 1 to N.'%(shard))
+	return index, n_shards
+
+def get_shard(sample_ID, n_shards):
+	# unlike hash(), sha256 is the same for every process and node
+	digest = hashlib.sha256(sample_ID.encode('utf-8')).digest()
+	return int.from_bytes(digest[:8], 'big') % n_shards + 1
+
+def get_feature_file_index(indir, feature_sets, restrict=None, shard=None, duplicates=None):
+	index = OrderedDict()
+	def add_file(file_path, file_name):
+		sample_ID, feature_set = split_feature_file_name(file_name, feature_sets)
+		if sample_ID == None:
+			return
+		if restrict != None and restrict != sample_ID:
+			return
+		if shard != None and get_shard(sample_ID, shard[1]) != shard[0]:
+			return
+		if not sample_ID in index:
+			index[sample_ID] = OrderedDict()
+		# the first file found is used, the others are reported when the tasks are parsed
+		if feature_set in index[sample_ID]:
+			if duplicates != None:
+				duplicates.append((file_path, feature_set))
+			return
+		index[sample_ID][feature_set] = file_path
+	
+	# the members of an archive are listed in their order within the archive
+	if is_archive(indir):
+		with archive_session():
+			with archives_lock:
+				members = list(get_archive(indir)[1].keys())
+		for member in members:
+			add_file(indir + archive_separator + member, os.path.basename(member))
+		return index
+	
+	if indir[-1] != '/':
+		indir += '/'
+	# the files of a directory come before its subdirectories, as with os.walk
+	directories = [indir]
+	while len(directories) > 0:
+		directory = directories.pop(0)
+		subdirectories = []
+		with os.scandir(directory) as entries:
+			for entry in entries:
+				if entry.is_dir(follow_symlinks=False):
+					subdirectories.append(directory + entry.name + '/')
+				elif entry.is_file():
+					add_file(directory + entry.name, entry.name)
+		directories = subdirectories + directories
+	return index
+
+def get_sample_files(indir, sample_ID, feature_sets):
+	if indir[-1] != '/':
+		indir += '/'
+	sample_files = OrderedDict()
+	for feature_set in feature_sets:
+		file_path = '%s%s.%s'%(indir, sample_ID, feature_set)
+		found = [path for path in [file_path, file_path + '.gz'] if os.path.isfile(path)]
+		# if both are given, the duplicate is found by get_feature_file_index
+		if len(found) == 1:
+			sample_files[feature_set] = found[0]
+	return sample_files
+
+def get_feature_file_tasks(indir, feature_sets, restrict=None, shard=None):
+	index = None
+	if restrict != None and not is_archive(indir):
+		# a known sample is resolved without listing the directory
+		if shard != None and get_shard(restrict, shard[1]) != shard[0]:
+			return []
+		sample_files = get_sample_files(indir, restrict, feature_sets)
+		if len(sample_files) == len(feature_sets):
+			index = {restrict: sample_files}
+	duplicates = []
+	if index == None:
+		index = get_feature_file_index(indir, feature_sets, restrict, shard, duplicates)
+	return [ (file_path, feature_set) for sample_files in index.values()
+			for feature_set, file_path in sample_files.items() ] + duplicates
+
+def split_duplicate_tasks(tasks):
+	unique, failed = [], []
+	first = {}
+	for file_path, feature_set in tasks:
+		key = (get_sample_ID(file_path), feature_set)
+		if key in first:
+			# reported like a file that cannot be parsed, instead of stopping the whole run
+			e = myExceptions.WrongFeatureInputException(
+				'The %s features of %s are given twice, "%s" is used.'%(feature_set, key[0], first[key]))
+			failed.append((file_path, '%s: %s'%(type(e).__name__, str(e))))
+			continue
+		first[key] = file_path
+		unique.append((file_path, feature_set))
+	return unique, failed
+
+def get_sample_chunks(tasks, chunk_size):
+	if chunk_size < 1:
+		raise myExceptions.WrongSettingException(
+			'The chunk size has to be at least 1, %d is given.'%(chunk_size))
+	# the files of a sample are listed in arbitrary order, hence they are grouped first
+	sample_tasks = OrderedDict()
+	for file_path, feature_set in tasks:
+		sample_ID = get_sample_ID(file_path)
+		if not sample_ID in sample_tasks:
+			sample_tasks[sample_ID] = []
+		sample_tasks[sample_ID].append((file_path, feature_set))
+	
+	chunk, n_samples = [], 0
+	for sample_ID, sample_files in sample_tasks.items():
+		chunk += sample_files
+		n_samples += 1
+		if n_samples == chunk_size:
+			yield chunk
+			chunk, n_samples = [], 0
+	if n_samples > 0:
+		yield chunk
+
+def parse_input_files(indir, feature_sets, restrict=None, workers=1, pool='thread', errors=None, tasks=None,
+					verbose=True):
+	if tasks == None:
+		tasks = get_feature_file_tasks(indir, feature_sets, restrict)
+	
+	tasks, failed = split_duplicate_tasks(tasks)
+	parsed_input = {}
+	for (file_path, feature_set), (features, error) in zip(tasks, parse_feature_files(tasks, workers, pool)):
+		sample_ID = get_sample_ID(file_path)
+		if error != None:
+			failed.append((file_path, error))
+			continue
+		if not sample_ID in parsed_input:
+			parsed_input[sample_ID] = {}
+		parsed_input[sample_ID].update(features)
+	
+	# report files that could not be parsed instead of stopping the whole run
+	if len(failed) > 0 and verbose:
+		print('\nWarning! %d feature file(s) could not be parsed:'%(len(failed)))
+		for file_path, error in failed:
+			print('\t%s\t%s'%(file_path, error))
+		print('The features from these files are imputed by median if possible.\n')
+	if errors != None:
+		errors.extend(failed)
+	
+	return parsed_input
+
+def generate_input_data(indir, feature_sets, run_type, medians, noVerbose=True, restrict=None,
+						workers=1, pool='thread', errors=None, tasks=None):
+	print('Parsing input data...')
+	
+	# parse input data and create an input data frame
+	parsed_input = parse_input_files(indir, feature_sets, restrict, workers, pool, errors, tasks)
+	input_data, feature_cols = create_input_data(parsed_input, feature_sets, run_type, medians, noVerbose)
 	
 	print('... input data loaded.\n')
 	return input_data, feature_cols
@@ -0,0 +1,184 @@
+"""Stage profiling
+
+Opt-in instrumentation of the stages of a seqQscorer run (argument parsing,
+imports, table lookups, medians, parsing, model loading, training,
+prediction, output). Per stage the wall time, the CPU time, and optionally
+the peak of the memory traced by tracemalloc during the stage are recorded.
+Stages used several times accumulate. A stage started while another one is
+running is recorded as its child (e.g. model loading during prediction), with
+the enclosing stage as "parent"; its time is part of the time of the parent,
+hence only the stages without parent add up to the run. The traced peak of a
+stage covers its children as well. The resident set size is only known
+as peak of the whole process so far (ru_maxrss), it is recorded per stage
+as "process_peak_rss_mb" when the stage ended, which is not the memory used
+by the stage. A disabled profiler only yields, hence the stages cost nothing
+by default.
+
+Methods
+-------
+
+StageProfiler(enabled=False, trace_memory=False, start_wall=None, start_cpu=None)
+	creates a profiler, tracemalloc is started if trace_memory is True. The
+	totals are measured from the given start times (time.perf_counter and
+	time.process_time), by default from the creation of the profiler
+StageProfiler.stage(name)
+	context manager measuring one stage, nested in the running stage if any
+StageProfiler.start(name) and StageProfiler.stop(name)
+	measure one stage without context manager, e.g. for longer script sections
+StageProfiler.add_stage(name, wall_seconds, cpu_seconds)
+	adds a stage measured before the profiler existed, e.g. argument parsing
+StageProfiler.get_report(**info)
+	returns the report as JSON-serializable dictionary
+StageProfiler.write_report(report_file_path, **info)
+	writes the report as JSON file
+StageProfiler.get_table()
+	returns the stages as table for utils.print_nice_table
+get_peak_rss_mb()
+	returns the peak resident set size of the process since its start in MB,
+	or None
+
+date:	2026-10-18
+
+"""
+
+import os
+import sys
+import time
+import json
+import socket
+import platform
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+
+def get_peak_rss_mb():
+	if resource == None:
+		return None
+	max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# ru_maxrss is given in bytes on macOS and in kilobytes on Linux
+	if sys.platform == 'darwin':
+		return max_rss / (1024.0 * 1024.0)
+	return max_rss / 1024.0
+
+
+class StageProfiler:
+	"""Records wall time, CPU time and memory per stage of a run."""
+
+	def __init__(self, enabled=False, trace_memory=False, start_wall=None, start_cpu=None):
+		self.enabled = enabled
+		self.trace_memory = enabled and trace_memory
+		self.stages = OrderedDict()
+		# running stages, the innermost last: [key, start wall, start CPU, traced peak so far]
+		self.running = []
+		self.start_wall = time.perf_counter() if start_wall == None else start_wall
+		self.start_cpu = time.process_time() if start_cpu == None else start_cpu
+		if self.trace_memory and not tracemalloc.is_tracing():
+			tracemalloc.start()
+
+	def get_stage(self, name, parent=None):
+		# nested stages are kept apart from the stages of the same name without parent
+		key = name if parent == None else '%s > %s'%(parent, name)
+		if not key in self.stages:
+			self.stages[key] = {'stage': name, 'parent': parent, 'calls': 0, 'wall_seconds': 0.0,
+								'cpu_seconds': 0.0, 'process_peak_rss_mb': None, 'traced_peak_mb': None}
+		return key
+
+	def add_stage(self, name, wall_seconds, cpu_seconds, key=None):
+		if not self.enabled:
+			return
+		stage = self.stages[self.get_stage(name) if key == None else key]
+		stage['calls'] += 1
+		stage['wall_seconds'] += wall_seconds
+		stage['cpu_seconds'] += cpu_seconds
+		stage['process_peak_rss_mb'] = get_peak_rss_mb()
+
+	def update_traced_peaks(self):
+		# the peak since the last reset belongs to all running stages
+		traced_peak = tracemalloc.get_traced_memory()[1]
+		for running in self.running:
+			running[3] = max(running[3], traced_peak)
+
+	def start(self, name):
+		if not self.enabled:
+			return
+		parent = None
+		if len(self.running) > 0:
+			parent = self.running[-1][0]
+		key = self.get_stage(name, parent)
+		if self.trace_memory:
+			# the peak is kept for the enclosing stages before it is reset,
+			# reset_peak is available from Python 3.9 on, clearing the traces resets the peak as well
+			self.update_traced_peaks()
+			if hasattr(tracemalloc, 'reset_peak'):
+				tracemalloc.reset_peak()
+			else:
+				tracemalloc.clear_traces()
+		self.running.append([key, time.perf_counter(), time.process_time(), 0])
+
+	def stop(self, name):
+		if not self.enabled:
+			return
+		# the innermost running stage of that name is stopped
+		index = None
+		for i in range(len(self.running)):
+			if self.stages[self.running[i][0]]['stage'] == name:
+				index = i
+		if index == None:
+			return
+		if self.trace_memory:
+			self.update_traced_peaks()
+		key, start_wall, start_cpu, traced_peak = self.running.pop(index)
+		self.add_stage(name, time.perf_counter() - start_wall, time.process_time() - start_cpu, key)
+		if self.trace_memory:
+			stage = self.stages[key]
+			stage['traced_peak_mb'] = max(stage['traced_peak_mb'] or 0.0, traced_peak / (1024.0 * 1024.0))
+
+	@contextmanager
+	def stage(self, name):
+		self.start(name)
+		try:
+			yield
+		finally:
+			self.stop(name)
+
+	def get_report(self, **info):
+		report = OrderedDict()
+		report['timestamp'] = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+		report['host'] = socket.gethostname()
+		report['pid'] = os.getpid()
+		report['python'] = platform.python_version()
+		report['command'] = list(sys.argv)
+		report.update(info)
+		report['total_wall_seconds'] = time.perf_counter() - self.start_wall
+		report['total_cpu_seconds'] = time.process_time() - self.start_cpu
+		report['process_peak_rss_mb'] = get_peak_rss_mb()
+		report['trace_memory'] = self.trace_memory
+		report['stages'] = [stage for stage in self.stages.values() if stage['calls'] > 0]
+		return report
+
+	def write_report(self, report_file_path, **info):
+		report = self.get_report(**info)
+		with open(report_file_path, 'w') as f:
+			json.dump(report, f, indent=2)
+		return report
+
+	def get_table(self):
+		table = [['Stage', 'calls', 'wall (s)', 'CPU (s)', 'process peak RSS (MB)', 'traced peak (MB)']]
+		for key, stage in self.stages.items():
+			if stage['calls'] == 0:
+				continue
+			table.append([key, str(stage['calls']), '%.4f'%(stage['wall_seconds']),
+						'%.4f'%(stage['cpu_seconds']),
+						'' if stage['process_peak_rss_mb'] == None else '%.1f'%(stage['process_peak_rss_mb']),
+						'' if stage['traced_peak_mb'] == None else '%.1f'%(stage['traced_peak_mb'])])
+		return table
+
+
+# used where no profiler is given
+null_profiler = StageProfiler(False)
@@ -0,0 +1,185 @@
+"""Score cache
+
+Persistent cache of the probabilities computed by seqQscorer, so that
+samples that did not change since a previous run are neither parsed nor
+predicted again. A sample is addressed by the sha256 hash of the content of
+its feature set files, a model by its application case and seed together
+with the hash of its file (see model_registry.get_file_hash). The cache keeps
+the scores per model and drops them when the file of the model changed, e.g.
+after a model was trained again or replaced by the user.
+
+The cache is a JSON file. It is written atomically (temporary file and
+rename) under an inter-process lock, and entries written by a concurrent run
+in the meantime are merged.
+
+Methods
+-------
+
+get_sample_hashes(tasks)
+	returns the content hash per sample for the (file path, feature set) tasks
+get_model_identity(model_name, model_file_path)
+	returns the identity of a serialized model, None if the model has no file
+get_registry_model_identity(registry, key)
+	returns the identity of the model used by the model registry for the key
+get_scorer_model_identity(scorer)
+	returns the identity of the model used by a Scorer (see utils/scorer.py)
+ScoreCache(cache_file_path)
+	loads the cache from the file, an empty cache is used if it does not exist
+ScoreCache.lookup(model_identity, tasks)
+	returns the (sampleID, probability) pairs found in the cache, the tasks of
+	the samples not found, and the content hash per sample
+ScoreCache.add(model_identity, fileID_score, sample_hashes)
+	adds the probabilities of newly scored samples
+ScoreCache.save()
+	writes the cache to its file
+ScoreCache.get_summary()
+	returns the numbers of hits and misses as text
+
+date:	2026-10-18
+
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+import utils.Exceptions as myExceptions
+import utils.parser as parser
+import utils.model_registry as model_registry
+import utils.file_lock as file_lock
+
+global cache_format
+cache_format = 'seqQscorer-score-cache'
+
+global cache_version
+cache_version = 1
+
+
+def get_sample_ID(file_path):
+	return parser.get_sample_ID(file_path)
+
+def get_sample_hashes(tasks):
+	sample_files = OrderedDict()
+	for file_path, feature_set in tasks:
+		sample_ID = get_sample_ID(file_path)
+		if not sample_ID in sample_files:
+			sample_files[sample_ID] = []
+		sample_files[sample_ID].append((feature_set, file_path))
+
+	# the feature sets are hashed in a fixed order, together with their names
+	sample_hashes = OrderedDict()
+	with parser.archive_session():
+		for sample_ID, files in sample_files.items():
+			sha256 = hashlib.sha256()
+			for feature_set, file_path in sorted(files):
+				sha256.update(feature_set.encode())
+				content = parser.read_feature_file(file_path)
+				sha256.update(str(len(content)).encode() + b'\n' + content)
+			sample_hashes[sample_ID] = sha256.hexdigest()
+	return sample_hashes
+
+def get_model_identity(model_name, model_file_path):
+	if model_file_path == None or not os.path.exists(model_file_path):
+		return None
+	return (model_name, model_registry.get_file_hash(model_file_path))
+
+def get_registry_model_identity(registry, key):
+	# e.g. human_ChIP-seq_single-end_RAW-MAP-LOC-TSS_auROC_1
+	model_name = os.path.basename(registry.get_model_file_path(key, ''))
+	return get_model_identity(model_name, registry.get_path(key))
+
+def get_scorer_model_identity(scorer):
+	if scorer.model_file_path != None:
+		return get_model_identity('file:%s'%(os.path.abspath(scorer.model_file_path)), scorer.model_file_path)
+	return get_registry_model_identity(scorer.registry, scorer.model_key)
+
+
+class ScoreCache:
+	"""Probabilities per model, addressed by the content of the feature set files."""
+
+	def __init__(self, cache_file_path):
+		self.cache_file_path = cache_file_path
+		self.models = self.read()
+		self.changed = set()
+		self.hits = 0
+		self.misses = 0
+		self.invalidated = 0
+
+	def read(self):
+		if not os.path.exists(self.cache_file_path):
+			return {}
+		try:
+			cache = json.load(open(self.cache_file_path, 'r'))
+		except (OSError, ValueError):
+			raise myExceptions.WrongCacheFileException(
+				'The score cache "%s" could not be read.'%(self.cache_file_path))
+		if not isinstance(cache, dict) or cache.get('format', None) != cache_format:
+			raise myExceptions.WrongCacheFileException(
+				'"%s" is not a seqQscorer score cache.'%(self.cache_file_path))
+		if cache.get('version', None) != cache_version:
+			# scores of other versions are not reused
+			return {}
+		return cache['models']
+
+	def get_scores(self, model_identity):
+		model_name, model_hash = model_identity
+		entry = self.models.get(model_name, None)
+		if entry == None or entry['model_hash'] != model_hash:
+			if entry != None:
+				self.invalidated += len(entry['scores'])
+			entry = {'model_hash': model_hash, 'scores': {}}
+			self.models[model_name] = entry
+			self.changed.add(model_name)
+		return entry['scores']
+
+	def lookup(self, model_identity, tasks):
+		sample_hashes = get_sample_hashes(tasks)
+		scores = self.get_scores(model_identity)
+		cached = []
+		for sample_ID, sample_hash in sample_hashes.items():
+			if sample_hash in scores:
+				cached.append((sample_ID, scores[sample_hash]))
+		self.hits += len(cached)
+		self.misses += len(sample_hashes) - len(cached)
+		cached_IDs = set([sample_ID for sample_ID, score in cached])
+		missing_tasks = [task for task in tasks if not get_sample_ID(task[0]) in cached_IDs]
+		return cached, missing_tasks, sample_hashes
+
+	def add(self, model_identity, fileID_score, sample_hashes):
+		scores = self.get_scores(model_identity)
+		for fileID, score in fileID_score:
+			scores[sample_hashes[fileID]] = float(score)
+		if len(fileID_score) > 0:
+			self.changed.add(model_identity[0])
+
+	def save(self):
+		if len(self.changed) == 0:
+			return
+		cache_dir = os.path.dirname(os.path.abspath(self.cache_file_path))
+		with file_lock.FileLock(self.cache_file_path + '.lock'):
+			# models not used in this run may have been updated by a concurrent run
+			models = self.read()
+			for model_name in self.changed:
+				entry = self.models[model_name]
+				if model_name in models and models[model_name]['model_hash'] == entry['model_hash']:
+					models[model_name]['scores'].update(entry['scores'])
+				else:
+					models[model_name] = entry
+			fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.score_cache.', suffix='.tmp')
+			try:
+				with os.fdopen(fd, 'w') as f:
+					json.dump({'format': cache_format, 'version': cache_version, 'models': models}, f)
+				os.replace(tmp_path, self.cache_file_path)
+			except:
+				if os.path.exists(tmp_path):
+					os.remove(tmp_path)
+				raise
+		self.changed = set()
+
+	def get_summary(self):
+		summary = 'Score cache: %d hit(s), %d miss(es)'%(self.hits, self.misses)
+		if self.invalidated > 0:
+			summary += ', %d score(s) invalidated as the model changed'%(self.invalidated)
+		return summary
@@ -0,0 +1,600 @@
+"""Scorer
+
+Library interface of seqQscorer. A Scorer scores samples for one setting
+(species, assay, run-type, feature sets) or for a serialized model, it keeps
+the model, median values and feature columns, prints nothing unless verbose,
+and can be shared between threads. A ScoringRun scores an input directory or
+a feature store in the modes of seqQscorer.py, which only parses the
+arguments and writes the outputs.
+
+Methods
+-------
+
+Scorer(species='generic', assay='generic', runtype='generic', feature_sets=['RAW','MAP','LOC','TSS'], peaktype=None, best_calib=False, no_fs=False, seed=1, model=None, base_dir=None, registry=None, workers=1, pool='thread', verbose=False, profiler=None, engine='sklearn')
+	creates a Scorer, with engine 'numpy' (or 'auto' for small batches) tree
+	ensembles are predicted by utils/tree_engine.py
+Scorer.score_dataframe(data)
+	scores a data frame with one column per feature and the column sampleID
+Scorer.score_features(samples)
+	scores the features given per sample ID
+Scorer.score_directory(indir, sample_ID=None, errors=None, shard=None)
+	parses and scores the feature set files of a directory or archive
+Scorer.score_directory_chunks(indir, chunk_size, sample_ID=None, errors=None, shard=None, tasks=None)
+	yields (input data, probabilities) per chunk of chunk_size samples
+Scorer.score_store(store, sample_ID=None, shard=None)
+	scores the samples of a feature store (see utils/feature_store.py)
+Scorer.score_files(file_paths, errors=None)
+	parses and scores the given feature set files
+Scorer.predict(X)
+	returns the probabilities for a matrix of the feature columns
+Scorer.parse_directory(indir, sample_ID=None, errors=None, tasks=None, noVerbose=True, shard=None)
+	returns the input data frame for the feature set files of a directory
+Scorer.parse_matrix(indir, sample_ID=None, errors=None, tasks=None, noVerbose=True, shard=None)
+	returns the sample IDs and the input matrix, without using pandas
+Scorer.parse_store(store, sample_ID=None, shard=None, sample_IDs=None, noVerbose=True)
+	returns the input data frame for the samples of a feature store
+Scorer.parse_store_matrix(store, sample_ID=None, shard=None, sample_IDs=None, noVerbose=True)
+	returns the sample IDs and the input matrix for a feature store
+Scorer.parse_samples(indir, sample_ID=None, errors=None, tasks=None, shard=None)
+	returns the parsed features per sample of a directory
+Scorer.read_store(store, sample_ID=None, shard=None, sample_IDs=None)
+	returns the features per sample of a feature store
+Scorer.create_input_data(samples, noVerbose=True)
+	returns the input data frame, missing values are imputed by the median
+Scorer.create_input_matrix(samples, noVerbose=True)
+	returns the sample IDs and the input matrix, imputed as the data frame
+Scorer.create_input(samples, frame=False, noVerbose=True)
+	returns the input data frame if frame is True, otherwise the input matrix
+Scorer.score_input(scoring_input)
+	returns (sampleID, probability) pairs for the result of create_input
+Scorer.score_input_data(input_data)
+	scores an input data frame
+Scorer.get_model()
+	returns the model, it is loaded or trained on first use
+Scorer.get_prediction_model(n_samples)
+	returns the model applied on a batch of n_samples
+Scorer.get_measure_table()
+	returns the measures of the model per decision threshold
+score_combinations(scorers, parsed_input, noVerbose=True)
+	scores parsed features with Scorers of different feature set combinations
+	given as {name: Scorer}, one column of probabilities per combination
+ScoringRun(indir=None, store=None, feature_sets=['RAW','MAP','LOC','TSS'], sample_ID=None, shard=None, best_calib=False, no_fs=False, seed=1, base_dir=None, registry=None, workers=1, pool='thread', cache=None, verbose=False, noVerbose=True, profiler=None)
+	scores the samples of a directory, an archive, or a feature store file
+	(store), optionally with a score cache file (cache)
+ScoringRun.get_scorer(species='generic', assay='generic', runtype='generic', peaktype=None, model=None, feature_sets=None)
+	returns a Scorer with the options of the run
+ScoringRun.score(scorer, frame=False)
+	returns the (sampleID, probability) pairs and the input of all samples
+ScoringRun.score_chunks(scorer, chunk_size, frame=False)
+	returns a generator of (input, scores) per chunk, the scores taken from
+	the cache come first with the input None
+ScoringRun.score_manifest(manifest_path, default_setting)
+	scores the samples grouped by the model of their setting in the
+	manifest, returns (application case, Scorer, group, scores, input data)
+	per group
+ScoringRun.score_ablation(species='generic', assay='generic', runtype='generic', peaktype=None)
+	returns the Scorers per feature set combination, the probabilities per
+	combination sorted by the model using all feature sets, and the parsed input
+ScoringRun.watch(scorer, score, interval=2.0, idle_timeout=None, skip=[], frame=False)
+	scores the samples of the directory once their feature sets are
+	complete and calls score(input, scores), returns the number of samples
+	scored and the incomplete samples
+
+date:	2026-10-18
+
+"""
+
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+import utils.Exceptions as myExceptions
+import utils.utils as utils
+import utils.parser as parser
+import utils.scoring as scoring
+import utils.model_registry as model_registry
+import utils.score_cache as score_cache
+import utils.tree_engine as tree_engine
+import utils.profiling as profiling
+
+# batches up to this size are predicted by the tree engine if engine='auto' is used
+global auto_batch_limit
+auto_batch_limit = 100
+
+
+class Scorer:
+	"""Scores samples for one setting, without output to the console by default."""
+
+	def __init__(self, species='generic', assay='generic', runtype='generic', feature_sets=['RAW','MAP','LOC','TSS'],
+				peaktype=None, best_calib=False, no_fs=False, seed=1, model=None, base_dir=None, registry=None,
+				workers=1, pool='thread', verbose=False, profiler=None, engine='sklearn'):
+		if len(feature_sets) == 0 or any([not fs in ['RAW','MAP','LOC','TSS'] for fs in feature_sets]):
+			raise myExceptions.WrongSettingException(
+				'Feature sets have to be a non-empty selection of RAW, MAP, LOC, and TSS.')
+		if not engine in ['sklearn', 'numpy', 'auto']:
+			raise myExceptions.WrongSettingException(
+				'The engine has to be sklearn, numpy, or auto, %s is given.'%(engine))
+		if base_dir == None:
+			base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+		self.base_dir = os.path.abspath(base_dir) + '/'
+		self.utils_dir = '%sutils/'%(self.base_dir)
+		self.feature_sets = [fs for fs in ['RAW','MAP','LOC','TSS'] if fs in feature_sets]
+		self.metric = 'brier' if best_calib else 'auROC'
+		self.fs_suffix = '_noFS' if no_fs else ''
+		self.seed = seed
+		self.model_file_path = model
+		self.workers = workers
+		self.pool = pool
+		self.verbose = verbose
+		self.profiler = profiler if profiler != None else profiling.null_profiler
+		self.engine = engine
+		self.registry = registry
+		if self.registry == None:
+			self.registry = model_registry.ModelRegistry('%smodels/'%(self.base_dir))
+
+		with self.profiler.stage('table lookups'):
+			self.species, self.assay, self.run_type, self.fallback = scoring.resolve_setting(self.utils_dir,
+														species, assay, runtype, self.feature_sets, self.fs_suffix,
+														self.metric, peaktype, model != None)
+			self.application_case = scoring.get_application_case(self.species, self.assay, self.run_type,
+														self.feature_sets, self.metric, self.fs_suffix)
+			self.model_key = self.registry.get_key(self.species, self.assay, self.run_type, self.feature_sets,
+														self.metric, self.fs_suffix, seed)
+		with self.profiler.stage('medians'):
+			self.medians = scoring.load_medians(self.utils_dir, self.species, self.assay, self.run_type)
+			self.feature_columns = parser.get_feature_columns(self.feature_sets, self.run_type, self.medians)
+		with self.profiler.stage('table lookups'):
+			self.best_clf, self.feature_selection, self.selection, self.parameters, self.auROC, self.brier = \
+				utils.get_best_classifier(self.utils_dir, self.species, self.assay, self.run_type,
+										self.feature_sets, self.fs_suffix, self.metric)
+		self.compiled = None
+		self.lock = threading.Lock()
+
+	def get_model(self):
+		# the lock avoids that concurrent threads train the same model twice,
+		# Scorers of other settings are not blocked meanwhile
+		with self.lock:
+			if self.model_file_path != None:
+				return self.registry.get_file(self.model_file_path)
+			return scoring.get_model(self.registry, self.utils_dir, self.species, self.assay,
+									self.run_type, self.feature_sets, self.fs_suffix, self.metric,
+									self.seed, self.feature_columns, self.verbose, self.profiler)
+
+	def get_prediction_model(self, n_samples):
+		# the compiled model is faster for small batches, scikit-learn for large ones
+		model = self.get_model()
+		if self.engine == 'sklearn' or (self.engine == 'auto' and n_samples > auto_batch_limit):
+			return model
+		if not tree_engine.is_compilable(model):
+			return model
+		# the compiled model is kept as long as the registry returns the same model
+		compiled = self.compiled
+		if compiled == None or compiled[0] is not model:
+			compiled = (model, tree_engine.compile_model(model))
+			with self.lock:
+				self.compiled = compiled
+		return compiled[1]
+
+	def get_measure_table(self):
+		return utils.read_in_measure_table(self.utils_dir, self.species, self.assay, self.run_type,
+										self.feature_sets, self.fs_suffix, self.metric)
+
+	def create_input_data(self, samples, noVerbose=True):
+		return parser.create_input_data(samples, self.feature_sets, self.run_type, self.medians,
+										noVerbose or not self.verbose)[0]
+
+	def create_input_matrix(self, samples, noVerbose=True):
+		X, feature_columns = parser.create_input_matrix(samples, self.feature_sets, self.run_type, self.medians,
+														noVerbose or not self.verbose)
+		return list(samples.keys()), X
+
+	def create_input(self, samples, frame=False, noVerbose=True):
+		# the input data frame is only needed to write the parsed input,
+		# otherwise the samples are scored as NumPy matrix without pandas
+		if frame:
+			return self.create_input_data(samples, noVerbose)
+		return self.create_input_matrix(samples, noVerbose)
+
+	def score_input(self, scoring_input):
+		if isinstance(scoring_input, tuple):
+			sample_IDs, X = scoring_input
+			return list(zip(sample_IDs, self.predict(X)))
+		scores = self.score_input_data(scoring_input)
+		return list(zip(scores['sampleID'], scores['probability']))
+
+	def parse_samples(self, indir, sample_ID=None, errors=None, tasks=None, shard=None):
+		if not os.path.isdir(indir) and not parser.is_archive(indir):
+			raise myExceptions.WrongFeatureInputException(
+				'"%s" is neither a directory nor a tar or zip archive'%(indir))
+		if isinstance(shard, str):
+			shard = parser.parse_shard(shard)
+		if tasks == None and shard != None:
+			tasks = parser.get_feature_file_tasks(indir, self.feature_sets, sample_ID, shard)
+		return parser.parse_input_files(indir, self.feature_sets, sample_ID, self.workers, self.pool,
+										errors, tasks, self.verbose)
+
+	def parse_directory(self, indir, sample_ID=None, errors=None, tasks=None, noVerbose=True, shard=None):
+		return self.create_input_data(self.parse_samples(indir, sample_ID, errors, tasks, shard), noVerbose)
+
+	def parse_matrix(self, indir, sample_ID=None, errors=None, tasks=None, noVerbose=True, shard=None):
+		return self.create_input_matrix(self.parse_samples(indir, sample_ID, errors, tasks, shard), noVerbose)
+
+	def read_store(self, store, sample_ID=None, shard=None, sample_IDs=None):
+		if isinstance(shard, str):
+			shard = parser.parse_shard(shard)
+		return store.read(self.feature_sets, self.feature_columns, sample_IDs, sample_ID, shard)
+
+	def parse_store(self, store, sample_ID=None, shard=None, sample_IDs=None, noVerbose=True):
+		return self.create_input_data(self.read_store(store, sample_ID, shard, sample_IDs), noVerbose)
+
+	def parse_store_matrix(self, store, sample_ID=None, shard=None, sample_IDs=None, noVerbose=True):
+		return self.create_input_matrix(self.read_store(store, sample_ID, shard, sample_IDs), noVerbose)
+
+	def predict(self, X):
+		X = np.asarray(X, dtype=float)
+		model = self.get_prediction_model(X.shape[0])
+		if X.shape[0] == 0:
+			return np.zeros(0)
+		return scoring.predict_matrix(model, X, self.feature_columns, self.selection)
+
+	def score_input_data(self, input_data):
+		import pandas as pd
+		model = self.get_prediction_model(input_data.shape[0])
+		if input_data.shape[0] == 0:
+			return pd.DataFrame({'sampleID': [], 'probability': []})
+		fileID_score = scoring.predict_probabilities(model, input_data, self.feature_columns, self.selection)
+		return pd.DataFrame(fileID_score, columns=['sampleID', 'probability'])
+
+	def score_features(self, samples):
+		samples = dict( (sample, dict( (feature, np.nan if value == None else float(value))
+									for feature, value in features.items() ))
+						for sample, features in samples.items() )
+		return self.score_input_data(self.create_input_data(samples))
+
+	def score_dataframe(self, data):
+		if 'sampleID' in data.columns:
+			sample_IDs = list(data['sampleID'])
+		else:
+			sample_IDs = list(data.index)
+		columns = [column for column in data.columns if column != 'sampleID']
+		values = np.array(data[columns], dtype=float)
+		samples = dict( (sample_IDs[i], dict(zip(columns, values[i]))) for i in range(len(sample_IDs)) )
+		if len(samples) != len(sample_IDs):
+			raise myExceptions.WrongFeatureInputException(
+				'The sample IDs have to be unique.')
+		return self.score_input_data(self.create_input_data(samples))
+
+	def score_directory(self, indir, sample_ID=None, errors=None, shard=None):
+		return self.score_input_data(self.parse_directory(indir, sample_ID, errors, shard=shard))
+
+	def score_store(self, store, sample_ID=None, shard=None):
+		return self.score_input_data(self.parse_store(store, sample_ID, shard))
+
+	def score_directory_chunks(self, indir, chunk_size, sample_ID=None, errors=None, shard=None, tasks=None):
+		if isinstance(shard, str):
+			shard = parser.parse_shard(shard)
+		if tasks == None:
+			tasks = parser.get_feature_file_tasks(indir, self.feature_sets, sample_ID, shard)
+		for chunk in parser.get_sample_chunks(tasks, chunk_size):
+			input_data = self.parse_directory(indir, errors=errors, tasks=chunk)
+			yield input_data, self.score_input_data(input_data)
+
+	def score_files(self, file_paths, errors=None):
+		# the feature set files may be located in different directories
+		tasks = []
+		for file_path in file_paths:
+			feature_set = file_path[-3:]
+			if file_path[-4:-3] != '.' or not feature_set in ['RAW','MAP','LOC','TSS']:
+				raise myExceptions.WrongFeatureInputException(
+					'"%s" is not a feature set file (.RAW, .MAP, .LOC, or .TSS).'%(file_path))
+			if not os.path.isfile(file_path):
+				raise myExceptions.WrongFeatureInputException(
+					'"%s" does not exist.'%(file_path))
+			if feature_set in self.feature_sets:
+				tasks.append((file_path, feature_set))
+		tasks, failed = parser.split_duplicate_tasks(tasks)
+		samples = {}
+		for (file_path, feature_set), (features, error) in zip(tasks, parser.parse_feature_files(tasks, self.workers, self.pool)):
+			if error != None:
+				failed.append((file_path, error))
+				continue
+			sample_ID = os.path.basename(file_path)[:-4]
+			if not sample_ID in samples:
+				samples[sample_ID] = {}
+			samples[sample_ID].update(features)
+		if errors != None:
+			errors.extend(failed)
+		return self.score_input_data(self.create_input_data(samples))
+
+
+def score_combinations(scorers, parsed_input, noVerbose=True):
+	# the input data is created once for all feature sets per setting of the median
+	# values, the model of each combination takes its own feature columns from it
+	feature_sets = [fs for fs in ['RAW','MAP','LOC','TSS']
+					if any([fs in scorer.feature_sets for scorer in scorers.values()])]
+	import pandas as pd
+	input_frames = {}
+	probabilities = pd.DataFrame({'sampleID': list(parsed_input.keys())})
+	for name, scorer in scorers.items():
+		setting = (scorer.species, scorer.assay, scorer.run_type)
+		if not setting in input_frames:
+			input_frames[setting] = parser.create_input_data(parsed_input, feature_sets, scorer.run_type,
+															scorer.medians, noVerbose)[0]
+		probabilities[name] = list(scorer.score_input_data(input_frames[setting])['probability'])
+	return probabilities
+
+
+class ScoringRun:
+	"""Scores the samples of an input directory or feature store in the modes of seqQscorer."""
+
+	def __init__(self, indir=None, store=None, feature_sets=['RAW','MAP','LOC','TSS'], sample_ID=None, shard=None,
+				best_calib=False, no_fs=False, seed=1, base_dir=None, registry=None, workers=1, pool='thread',
+				cache=None, verbose=False, noVerbose=True, profiler=None):
+		if (indir == None) == (store == None):
+			raise myExceptions.WrongSettingException(
+				'Please specify either an input directory or a feature store.')
+		if indir != None and not os.path.isdir(indir) and not parser.is_archive(indir):
+			raise myExceptions.WrongFeatureInputException(
+				'"%s" is neither a directory nor a tar or zip archive'%(indir))
+		if store != None and cache != None:
+			raise myExceptions.WrongSettingException(
+				'A feature store cannot be combined with a score cache.')
+		if base_dir == None:
+			base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+		self.base_dir = os.path.abspath(base_dir) + '/'
+		self.utils_dir = '%sutils/'%(self.base_dir)
+		self.indir = indir
+		self.feature_sets = [fs for fs in ['RAW','MAP','LOC','TSS'] if fs in feature_sets]
+		self.sample_ID = sample_ID
+		self.shard = parser.parse_shard(shard) if isinstance(shard, str) else shard
+		self.best_calib = best_calib
+		self.no_fs = no_fs
+		self.seed = seed
+		self.workers = workers
+		self.pool = pool
+		self.cache_file_path = cache
+		self.cache = None
+		self.verbose = verbose
+		self.noVerbose = noVerbose
+		self.profiler = profiler if profiler != None else profiling.null_profiler
+		# models are loaded only once per process via the model registry
+		self.registry = registry
+		if self.registry == None:
+			self.registry = model_registry.get_registry('%smodels/'%(self.base_dir))
+		self.store = None
+		if store != None:
+			import utils.feature_store as feature_store
+			with self.profiler.stage('parsing'):
+				self.store = feature_store.FeatureStore(store)
+
+	def get_scorer(self, species='generic', assay='generic', runtype='generic', peaktype=None, model=None,
+					feature_sets=None):
+		if feature_sets == None:
+			feature_sets = self.feature_sets
+		return Scorer(species, assay, runtype, feature_sets, peaktype, self.best_calib, self.no_fs, self.seed,
+					model, self.base_dir, self.registry, self.workers, self.pool, verbose=self.verbose,
+					profiler=self.profiler)
+
+	def get_tasks(self):
+		return parser.get_feature_file_tasks(self.indir, self.feature_sets, self.sample_ID, self.shard)
+
+	def parse_input(self):
+		if self.store != None:
+			return self.store.read(self.feature_sets, restrict=self.sample_ID, shard=self.shard)
+		return parser.parse_input_files(self.indir, self.feature_sets, None, self.workers, self.pool,
+										tasks=self.get_tasks(), verbose=self.verbose)
+
+	def get_cache(self):
+		if self.cache == None:
+			with self.profiler.stage('cache'):
+				self.cache = score_cache.ScoreCache(self.cache_file_path)
+		return self.cache
+
+	def lookup_cache(self, scorer, tasks):
+		# the model has to be known to look up its scores, the samples not found are parsed
+		scorer.get_model()
+		model_identity = score_cache.get_scorer_model_identity(scorer)
+		if model_identity == None:
+			return None, [], tasks, None
+		cache = self.get_cache()
+		with self.profiler.stage('cache'):
+			cached_scores, tasks, sample_hashes = cache.lookup(model_identity, tasks)
+		return model_identity, cached_scores, tasks, sample_hashes
+
+	def lookup_run_cache(self, scorer):
+		# samples whose feature set files did not change since a previous run with the same
+		# model are taken from the score cache, only the remaining samples are parsed
+		if self.cache_file_path == None:
+			return None, [], None, None
+		with self.profiler.stage('cache'):
+			tasks = self.get_tasks()
+		model_identity, cached_scores, tasks, sample_hashes = self.lookup_cache(scorer, tasks)
+		if model_identity == None and self.verbose:
+			print('The model is not serialized (no seed is used), the score cache is not used.\n')
+		return model_identity, cached_scores, tasks, sample_hashes
+
+	def save_cache(self):
+		if self.cache == None:
+			return
+		with self.profiler.stage('cache'):
+			try:
+				self.cache.save()
+			except:
+				raise myExceptions.WrongOutputFileException(
+					'Unable to write the score cache to file!')
+		if self.verbose:
+			print(self.cache.get_summary())
+
+	def score(self, scorer, frame=False):
+		model_identity, cached_scores, tasks, sample_hashes = self.lookup_run_cache(scorer)
+		if self.verbose:
+			print('Parsing input data...')
+		with self.profiler.stage('parsing'):
+			if self.store != None:
+				samples = scorer.read_store(self.store, self.sample_ID, self.shard)
+			else:
+				samples = scorer.parse_samples(self.indir, self.sample_ID, tasks=tasks, shard=self.shard)
+			scoring_input = scorer.create_input(samples, frame, self.noVerbose)
+		if self.verbose:
+			print('... input data loaded.\n')
+		scorer.get_model()
+		with self.profiler.stage('prediction'):
+			fileID_score = scorer.score_input(scoring_input)
+		if model_identity != None:
+			with self.profiler.stage('cache'):
+				self.cache.add(model_identity, fileID_score, sample_hashes)
+			self.save_cache()
+			fileID_score = cached_scores + fileID_score
+		return fileID_score, scoring_input
+
+	def score_chunks(self, scorer, chunk_size, frame=False):
+		# only one chunk of samples is held in memory at a time, the chunks
+		# are in the order of the input directory
+		if chunk_size < 1:
+			raise myExceptions.WrongSettingException(
+				'The chunk size has to be at least 1, %d is given.'%(chunk_size))
+		model_identity, cached_scores, tasks, sample_hashes = self.lookup_run_cache(scorer)
+		with self.profiler.stage('parsing'):
+			if self.store != None:
+				# chunks of sample IDs are read from the store
+				sample_IDs = self.store.get_sample_IDs(self.feature_sets, self.sample_ID, self.shard)
+				chunks = [sample_IDs[i:i + chunk_size] for i in range(0, len(sample_IDs), chunk_size)]
+			else:
+				if tasks == None:
+					tasks = self.get_tasks()
+				chunks = parser.get_sample_chunks(tasks, chunk_size)
+		scorer.get_model()
+		return self.generate_chunk_scores(scorer, chunks, frame, model_identity, cached_scores, sample_hashes)
+
+	def generate_chunk_scores(self, scorer, chunks, frame, model_identity, cached_scores, sample_hashes):
+		yield None, cached_scores
+		for chunk in chunks:
+			with self.profiler.stage('parsing'):
+				if self.store != None:
+					samples = scorer.read_store(self.store, sample_IDs=chunk)
+				else:
+					samples = scorer.parse_samples(self.indir, tasks=chunk)
+				scoring_input = scorer.create_input(samples, frame, self.noVerbose)
+			with self.profiler.stage('prediction'):
+				chunk_scores = scorer.score_input(scoring_input)
+			if model_identity != None:
+				with self.profiler.stage('cache'):
+					self.cache.add(model_identity, chunk_scores, sample_hashes)
+			yield scoring_input, chunk_scores
+		self.save_cache()
+
+	def score_manifest(self, manifest_path, default_setting):
+		with self.profiler.stage('parsing'):
+			manifest = scoring.read_manifest(manifest_path)
+		
+		# the input directory is parsed only once for all settings, with the score cache
+		# only the samples not found in the cache are parsed, group by group
+		if self.cache_file_path != None:
+			self.get_cache()
+		if self.verbose:
+			print('Parsing input data...')
+		with self.profiler.stage('parsing'):
+			if self.cache_file_path == None:
+				parsed_input = self.parse_input()
+				sample_IDs = list(parsed_input.keys())
+			else:
+				parsed_input = {}
+				tasks = self.get_tasks()
+				sample_IDs = list(OrderedDict.fromkeys([score_cache.get_sample_ID(task[0]) for task in tasks]))
+		if self.verbose:
+			print('... input data loaded.\n')
+		
+		with self.profiler.stage('table lookups'):
+			groups = scoring.group_samples(self.utils_dir, sample_IDs, manifest, default_setting, self.feature_sets,
+										'_noFS' if self.no_fs else '', 'brier' if self.best_calib else 'auROC')
+		
+		results = []
+		for application_case, group in groups.items():
+			species, assay, run_type = group['setting']
+			if self.verbose:
+				print('Scoring %d sample(s) with the model for %s'%(len(group['samples']), application_case))
+				if len(group['fallback']) > 0:
+					print('\t(a specialized model is not available for %d of them, the generic model is used)'%(
+						len(group['fallback'])))
+			scorer = self.get_scorer(species, assay, run_type)
+			
+			model_identity = None
+			cached_scores = []
+			if self.cache_file_path != None:
+				group_samples = set(group['samples'])
+				group_tasks = [ task for task in tasks if score_cache.get_sample_ID(task[0]) in group_samples ]
+				model_identity, cached_scores, group_tasks, sample_hashes = self.lookup_cache(scorer, group_tasks)
+				with self.profiler.stage('parsing'):
+					parsed_input.update(parser.parse_input_files(self.indir, self.feature_sets, None, self.workers,
+																self.pool, tasks=group_tasks, verbose=self.verbose))
+			
+			group_input = dict( (sample, parsed_input[sample]) for sample in group['samples'] if sample in parsed_input )
+			with self.profiler.stage('parsing'):
+				input_data = scorer.create_input_data(group_input, self.noVerbose)
+			scorer.get_model()
+			
+			# all samples of a group are scored within one batch
+			with self.profiler.stage('prediction'):
+				group_scores = scorer.score_input(input_data)
+			if model_identity != None:
+				with self.profiler.stage('cache'):
+					self.cache.add(model_identity, group_scores, sample_hashes)
+				group_scores = cached_scores + group_scores
+			results.append((application_case, scorer, group, group_scores, input_data))
+		
+		self.save_cache()
+		return results
+
+	def score_ablation(self, species='generic', assay='generic', runtype='generic', peaktype=None):
+		scorers = OrderedDict()
+		for combination in scoring.get_feature_set_combinations(self.feature_sets):
+			scorers['-'.join(combination)] = self.get_scorer(species, assay, runtype, peaktype,
+															feature_sets=combination)
+		
+		# the files are parsed only once for all combinations
+		if self.verbose:
+			print('Parsing input data...')
+		with self.profiler.stage('parsing'):
+			parsed_input = self.parse_input()
+		if self.verbose:
+			print('... input data loaded.\n')
+		for scorer in scorers.values():
+			scorer.get_model()
+		with self.profiler.stage('prediction'):
+			probabilities = score_combinations(scorers, parsed_input, self.noVerbose)
+		
+		# samples are sorted by the probability of the model using all feature sets
+		probabilities = probabilities.iloc[scoring.get_score_order(list(probabilities['sampleID']),
+																	list(probabilities['-'.join(self.feature_sets)]))]
+		return scorers, probabilities, parsed_input
+
+	def watch(self, scorer, score, interval=2.0, idle_timeout=None, skip=[], frame=False):
+		# samples are scored as soon as their feature sets are complete, until the
+		# watch is idle for idle_timeout seconds or interrupted
+		import utils.watcher as watcher
+		watcher.check_setting(self.indir, interval)
+		if self.cache_file_path != None:
+			raise myExceptions.WrongSettingException(
+				'A watch cannot be combined with a score cache.')
+		scorer.get_model()
+		n_scored = [0]
+		def score_completed(samples):
+			with self.profiler.stage('parsing'):
+				scoring_input = scorer.create_input(samples, frame, self.noVerbose)
+			with self.profiler.stage('prediction'):
+				completed_scores = scorer.score_input(scoring_input)
+			score(scoring_input, completed_scores)
+			n_scored[0] += len(completed_scores)
+		
+		folder_watcher = watcher.PollingWatcher(self.indir, self.feature_sets, interval, self.sample_ID, self.shard)
+		folder_watcher.ignore_samples(skip)
+		tracker = watcher.SampleTracker(self.feature_sets, self.workers, self.pool, skip, self.verbose)
+		if self.verbose:
+			print('Watching %s for the feature sets %s (%d sample(s) scored before are skipped), stop with Ctrl+C...\n'%(
+				self.indir, '-'.join(self.feature_sets), len(skip)))
+		try:
+			watcher.watch(folder_watcher, tracker, score_completed, interval, idle_timeout)
+		except KeyboardInterrupt:
+			pass
+		return n_scored[0], tracker.get_incomplete()
@@ -0,0 +1,388 @@
+"""Scoring utils
+
+Functions shared by seqQscorer and the scoring server to resolve the
+classification model for a given setting and to apply it on parsed samples.
+
+Methods
+-------
+
+get_feature_sets(noRAW=False, noMAP=False, noLOC=False, noTSS=False)
+	returns the feature sets used according to the given restrictions
+get_feature_set_combinations(feature_sets)
+	returns all non-empty combinations of the feature sets, ordered by their
+	size, e.g. RAW, MAP, ..., RAW-MAP, ..., RAW-MAP-LOC-TSS
+get_application_case(species, assay, run_type, feature_sets, metric, fs_suffix)
+	returns the string identifying the model for a setting
+resolve_setting(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric, peaktype=None, external_model=False)
+	applies the peak-type specification and falls back to the generic setting
+	in case no specialized model is available
+load_all_medians(utils_dir)
+	loads the median values for all settings
+load_medians(utils_dir, species, assay, run_type)
+	loads the median values used to impute missing values for a setting
+parse_model_file_name(model_file_path)
+	returns the registry key of a model serialized in the model folder, or None
+get_model(registry, utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric, seed, feature_columns, verbose=False, profiler=None)
+	returns the model for a setting from the registry, the model is trained and
+	serialized if it was not used so far, under an inter-process lock so that
+	concurrent processes reuse the model instead of training it again
+read_manifest(manifest_path)
+	reads the setting (species, assay, run-type, peak-type) per sample from a table
+group_samples(utils_dir, sample_IDs, manifest, default_setting, feature_sets, fs_suffix, metric)
+	groups samples by the application case of the model used for them
+train_model(utils_dir, species, assay, run_type, feature_columns, best_clf, selection, parameters, seed)
+	trains the model for a setting on the ENCODE data provided in utils
+get_input_columns(model, feature_columns, selection, available_columns)
+	returns the columns the model is applied on, models of the pickle-free
+	format use their embedded feature columns and selection
+predict_probabilities(model, input_data, feature_columns, selection)
+	applies the model and returns (sampleID, probability) pairs
+predict_matrix(model, X, feature_columns, selection)
+	applies the model on a matrix of the feature columns and returns the
+	probabilities as array, without using pandas
+list_application_cases(utils_dir)
+	returns all settings of the best_algo_params tables (both metrics, with and without FS)
+write_model(model, model_file_path)
+	serializes a model atomically (temporary file and rename)
+build_model(task)
+	trains and serializes the model of one application case, used by buildModels.py.
+	A model serialized meanwhile by another process is kept unless force is set
+get_shard_file_path(file_path, shard)
+	returns the path of the output file of one shard, e.g. probabilities.tsv.shard-2-of-8
+get_shard_file_paths(file_path)
+	returns the output files of all shards found for an output file as
+	dictionary {shard: file path} and the number of shards
+get_score_key(sample_ID, score)
+	returns the key the scores are sorted by: the probability as written to the
+	outputs (six decimals) and the sample ID for ties
+sort_scores(scores)
+	returns the (sampleID, probability, ...) rows sorted by get_score_key
+get_score_order(sample_IDs, scores)
+	returns the indices of the samples sorted by get_score_key, e.g. to sort a data frame
+
+"""
+
+import os
+import re
+import copy
+import itertools
+import time
+import pickle
+import tempfile
+import numpy as np
+
+import utils.Exceptions as myExceptions
+import utils.utils as utils
+import utils.model_format as model_format
+import utils.model_registry as model_registry
+import utils.table_index as table_index
+import utils.file_lock as file_lock
+import utils.profiling as profiling
+
+
+def get_feature_sets(noRAW=False, noMAP=False, noLOC=False, noTSS=False):
+	feature_sets = ['RAW','MAP','LOC','TSS']
+
+	# restrict feature sets used according to given optional parameters
+	if noRAW:
+		feature_sets.remove('RAW')
+	if noMAP:
+		feature_sets.remove('MAP')
+	if noLOC:
+		feature_sets.remove('LOC')
+	if noTSS:
+		feature_sets.remove('TSS')
+	return feature_sets
+
+def get_feature_set_combinations(feature_sets):
+	combinations = []
+	for size in range(1, len(feature_sets) + 1):
+		combinations += [list(combination) for combination in itertools.combinations(feature_sets, size)]
+	return combinations
+
+def get_application_case(species, assay, run_type, feature_sets, metric, fs_suffix):
+	application_case = '%s_%s_%s_%s'%(species, assay, run_type, '-'.join(feature_sets))
+	application_case += '_%s%s'%(metric, fs_suffix)
+	return application_case
+
+def resolve_setting(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric,
+					peaktype=None, external_model=False):
+	if peaktype != None:
+		if assay != 'ChIP-seq' or run_type != 'single-end':
+			raise myExceptions.WrongSettingException(
+				'Peak-type specification can only be used for single-ended ChIP-seq.')
+		assay = peaktype + assay
+
+	best_clf = utils.get_best_classifier(utils_dir, species, assay, run_type,
+										feature_sets, fs_suffix, metric)[0]
+	fallback = best_clf == None and not external_model
+	if fallback:
+		species, assay, run_type = 'generic', 'generic', 'generic'
+	return species, assay, run_type, fallback
+
+def load_all_medians(utils_dir):
+	return pickle.load(open('%smedians.dict'%(utils_dir), 'rb'))
+
+def load_medians(utils_dir, species, assay, run_type):
+	return load_all_medians(utils_dir)[species][assay][run_type]
+
+def train_model(utils_dir, species, assay, run_type, feature_columns, best_clf, selection, parameters, seed):
+	clf = utils.get_clf_algo(best_clf)
+	parameters = copy.deepcopy(parameters)
+	if not best_clf in ['GNB','KNN']:
+		if seed != -1:
+			parameters['random_state'] = seed
+
+	clf_setup = clf.set_params(**parameters)
+
+	import pandas as pd
+	data_file_path = '%sdatasets/%s_%s_%s.tsv'%(utils_dir, assay, species, run_type)
+	train_data = pd.read_csv(data_file_path, sep='\t')
+
+	y = np.array(train_data['status'])
+	train_data = train_data[feature_columns]
+	if selection != None:
+		train_data = train_data.loc[:,selection]
+	X = np.array(train_data)
+
+	return clf_setup.fit(X,y)
+
+def get_input_columns(model, feature_columns, selection, available_columns):
+	if isinstance(model, model_format.StoredModel):
+		feature_columns, selection = model.feature_columns, model.selection
+		missing = [column for column in feature_columns if not column in available_columns]
+		if len(missing) > 0:
+			message = 'The model requires features that are not part of the input data: %s'%(', '.join(missing))
+			if model.header.get('setting', None) != None:
+				message += ' (the model was trained for %s)'%('_'.join(model.header['setting']))
+			raise myExceptions.WrongFeatureInputException(message)
+	
+	# the selection is a mask over the feature columns
+	if selection != None:
+		feature_columns = [column for column, selected in zip(feature_columns, selection) if selected]
+	return feature_columns
+
+def predict_probabilities(model, input_data, feature_columns, selection):
+	# prepare input data format
+	input_values = input_data[get_input_columns(model, feature_columns, selection, input_data.columns)]
+
+	# apply model on given samples to get the probabilities
+	probabilities = model.predict_proba(np.array(input_values))
+	fileIDs = list(input_data['sampleID'])
+	return list(zip(fileIDs, [prob[1] for prob in probabilities]))
+
+def predict_matrix(model, X, feature_columns, selection):
+	# the columns of X are the feature columns, as created by parser.create_input_matrix
+	column_index = dict( (column, i) for i, column in enumerate(feature_columns) )
+	input_columns = get_input_columns(model, feature_columns, selection, column_index)
+	probabilities = model.predict_proba(X[:, [column_index[column] for column in input_columns]])
+	return np.asarray(probabilities)[:,1]
+
+def parse_model_file_name(model_file_path):
+	# e.g. human_ChIP-seq_single-end_RAW-MAP-LOC-TSS_auROC_noFS_1.model
+	match = re.match(r'^(generic|human|mouse)_([A-Za-z-]+)_(generic|single-end|paired-end)_'
+					r'((?:RAW|MAP|LOC|TSS)(?:-(?:RAW|MAP|LOC|TSS))*)_(auROC|brier)(_noFS)?_(-?\d+)\.model$',
+					os.path.basename(model_file_path))
+	if match == None:
+		return None
+	species, assay, run_type, feature_sets, metric, fs_suffix, seed = match.groups()
+	return (species, assay, run_type, feature_sets, metric, '' if fs_suffix == None else fs_suffix, int(seed))
+
+def get_model(registry, utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric, seed,
+			feature_columns, verbose=False, profiler=None):
+	if profiler == None:
+		profiler = profiling.null_profiler
+	key = registry.get_key(species, assay, run_type, feature_sets, metric, fs_suffix, seed)
+	with profiler.stage('model loading'):
+		model = registry.get(key)
+	if model != None:
+		return model
+
+	# if the particular model is used for the very first time, it is trained and serialized
+	if verbose:
+		print('\nThe required model was not used so far.')
+		print('It needs to be trained and serialized...')
+	if seed == -1:
+		with profiler.stage('training'):
+			model = train_model_for_case(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric,
+										seed, feature_columns)
+		registry.put(key, model)
+		if verbose:
+			print('... training is done, but only reproducible models are serialized.')
+			print('Because no seed was used the model was not serialized.')
+		return model
+
+	# only one process trains the model, others wait and load the serialized model afterwards
+	lock = file_lock.FileLock(registry.get_lock_file_path(key))
+	if not lock.acquire(blocking=False):
+		if verbose:
+			print('... the model is currently trained by another process, waiting for it...')
+		with profiler.stage('waiting for model'):
+			lock.acquire()
+	try:
+		with profiler.stage('model loading'):
+			model = registry.get(key)
+		if model != None:
+			if verbose:
+				print('... the model was trained by another process and is loaded now!')
+			return model
+		with profiler.stage('training'):
+			model = train_model_for_case(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric,
+										seed, feature_columns)
+		with profiler.stage('model writing'):
+			model_file_path = registry.get_model_file_path(key)
+			write_model(model, model_file_path)
+			registry.put(key, model, model_file_path)
+	finally:
+		lock.release()
+	if verbose:
+		print('... training and serialization is done!')
+		print('The model is instantly available from now!')
+	return model
+
+def train_model_for_case(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric, seed, feature_columns):
+	best_clf, feature_selection, selection, parameters, auROC, brier = utils.get_best_classifier(utils_dir,
+															species, assay, run_type, feature_sets, fs_suffix, metric)
+	return train_model(utils_dir, species, assay, run_type, feature_columns,
+						best_clf, selection, parameters, seed)
+
+def read_manifest(manifest_path):
+	import pandas as pd
+	try:
+		table = pd.read_csv(manifest_path, sep='\t', dtype=str).fillna('')
+	except:
+		raise myExceptions.WrongFeatureInputException(
+			'Unable to read the manifest "%s"'%(manifest_path))
+	if not 'sampleID' in table.columns:
+		raise myExceptions.WrongFeatureInputException(
+			'The manifest has to contain a column "sampleID".')
+
+	choices = {'species': ['generic','human','mouse'],
+			'assay': ['generic','ChIP-seq','DNase-seq','RNA-seq'],
+			'runtype': ['generic','single-end','paired-end'],
+			'peaktype': ['', 'narrow','broad']}
+	manifest = {}
+	for index, row in table.iterrows():
+		setting = []
+		for column in ['species', 'assay', 'runtype', 'peaktype']:
+			value = row[column] if column in table.columns else ''
+			if value == '' and column != 'peaktype':
+				value = 'generic'
+			if not value in choices[column]:
+				raise myExceptions.WrongSettingException(
+					'Unknown %s "%s" for sample %s in the manifest.'%(column, value, row['sampleID']))
+			setting.append(value if value != '' else None)
+		manifest[row['sampleID']] = tuple(setting)
+	return manifest
+
+def group_samples(utils_dir, sample_IDs, manifest, default_setting, feature_sets, fs_suffix, metric):
+	groups = {}
+	resolved = {}
+	for sample_ID in sample_IDs:
+		setting = manifest.get(sample_ID, default_setting)
+		if not setting in resolved:
+			species, assay, run_type, peaktype = setting
+			resolved[setting] = resolve_setting(utils_dir, species, assay, run_type, feature_sets,
+												fs_suffix, metric, peaktype)
+		species, assay, run_type, fallback = resolved[setting]
+		application_case = get_application_case(species, assay, run_type, feature_sets, metric, fs_suffix)
+		if not application_case in groups:
+			groups[application_case] = {'setting': (species, assay, run_type), 'samples': [], 'fallback': []}
+		groups[application_case]['samples'].append(sample_ID)
+		if fallback:
+			groups[application_case]['fallback'].append(sample_ID)
+	return groups
+
+def list_application_cases(utils_dir):
+	cases = []
+	for metric in ['auROC', 'brier']:
+		for fs_suffix in ['', '_noFS']:
+			for case in table_index.get_index(utils_dir)['best_algo_params'][metric + fs_suffix]:
+				species, assay, run_type, feature_sets = case.split('_')
+				cases.append((species, assay, run_type, feature_sets.split('-'), metric, fs_suffix))
+	return cases
+
+def write_model(model, model_file_path):
+	# write to a temporary file first, so that readers never see a partial model
+	fd, tmp_file_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(model_file_path)),
+										prefix=os.path.basename(model_file_path) + '.', suffix='.tmp')
+	try:
+		with os.fdopen(fd, 'wb') as f:
+			pickle.dump(model, f)
+		os.replace(tmp_file_path, model_file_path)
+	finally:
+		if os.path.exists(tmp_file_path):
+			os.remove(tmp_file_path)
+
+def build_model(task):
+	utils_dir, models_dir, species, assay, run_type, feature_sets, metric, fs_suffix, seed, \
+		feature_columns, file_format, force = task
+	application_case = get_application_case(species, assay, run_type, feature_sets, metric, fs_suffix)
+	best_clf, feature_selection, selection, parameters, auROC, brier = utils.get_best_classifier(utils_dir,
+															species, assay, run_type, feature_sets, fs_suffix, metric)
+	result = {'application_case': application_case, 'classifier': best_clf, 'fit_seconds': None,
+			'write_seconds': None, 'model_file_path': None, 'skipped': None, 'error': None}
+	registry = model_registry.ModelRegistry(models_dir)
+	key = registry.get_key(species, assay, run_type, feature_sets, metric, fs_suffix, seed)
+	pickle_path = registry.get_model_file_path(key)
+	qmodel_path = registry.get_model_file_path(key, model_format.model_suffix)
+	# the lock is shared with the on-the-fly training of seqQscorer
+	lock = file_lock.FileLock(registry.get_lock_file_path(key))
+	lock.acquire()
+	try:
+		# the model may have been serialized by another process while waiting for the lock
+		if not force and (os.path.exists(pickle_path) or os.path.exists(qmodel_path)):
+			result['skipped'] = 'serialized by another process'
+			return result
+		
+		start = time.perf_counter()
+		model = train_model(utils_dir, species, assay, run_type, feature_columns,
+							best_clf, selection, parameters, seed)
+		result['fit_seconds'] = time.perf_counter() - start
+		
+		start = time.perf_counter()
+		convertible = model_format.is_convertible(model)
+		model_file_path = qmodel_path if file_format == 'qmodel' and convertible else pickle_path
+		# both formats are replaced atomically, an existing model of the other format is
+		# replaced as well, so that the registry never prefers an outdated model
+		if model_file_path == pickle_path or os.path.exists(pickle_path):
+			write_model(model, pickle_path)
+		if convertible and (model_file_path == qmodel_path or os.path.exists(qmodel_path)):
+			model_format.save_model(model, qmodel_path, feature_columns, selection,
+									(species, assay, run_type), feature_sets, application_case)
+		result['write_seconds'] = time.perf_counter() - start
+		result['model_file_path'] = model_file_path
+	except Exception as e:
+		result['error'] = '%s: %s'%(type(e).__name__, e)
+	finally:
+		lock.release()
+	return result
+
+def get_shard_file_path(file_path, shard):
+	return '%s.shard-%d-of-%d'%(file_path, shard[0], shard[1])
+
+def get_shard_file_paths(file_path):
+	shard_files = {}
+	n_shards = set()
+	directory = os.path.dirname(os.path.abspath(file_path))
+	for file_name in os.listdir(directory):
+		match = re.match(r'^%s\.shard-(\d+)-of-(\d+)$'%(re.escape(os.path.basename(file_path))), file_name)
+		if match != None:
+			shard_files[int(match.group(1))] = os.path.join(directory, file_name)
+			n_shards.add(int(match.group(2)))
+	if len(n_shards) > 1:
+		raise myExceptions.WrongFeatureInputException(
+			'The shards of "%s" were created with different numbers of shards: %s.'%(
+				file_path, ', '.join(map(str, sorted(n_shards)))))
+	return shard_files, n_shards.pop() if len(n_shards) == 1 else 0
+
+def get_score_key(sample_ID, score):
+	# sorting by the written probability and the sample ID gives the same order
+	# for a single run and for merged shards, whatever the order of the input
+	return (round(float(score), 6), sample_ID)
+
+def sort_scores(scores):
+	return sorted(scores, key=lambda row: get_score_key(row[0], row[1]))
+
+def get_score_order(sample_IDs, scores):
+	return sorted(range(len(sample_IDs)), key=lambda i: get_score_key(sample_IDs[i], scores[i]))
@@ -0,0 +1,122 @@
+"""Table index
+
+The tables in utils/tables describe the best classifier setting and the
+evaluation measures per decision threshold for each application case. This
+module compiles the eight tables once into a JSON index keyed by case, with
+the parameters already parsed and the feature selection masks decoded as
+boolean lists. The index is written next to the tables and compiled again
+as soon as one of the source tables is newer than the index.
+
+Methods
+-------
+
+get_index(utils_dir)
+	returns the compiled index, loading or (re-)compiling it if needed
+compile_index(utils_dir)
+	parses all tables and returns the index
+lookup_best_classifier(utils_dir, case, metric, fs_suffix)
+	returns the compiled entry of the best_algo_params table for a case
+lookup_measure_table(utils_dir, setting, feature_sets, metric, fs_suffix)
+	returns the compiled entry of the dec_threshold_tabs table for a case
+
+date:	2026-10-18
+
+"""
+
+import os
+import json
+import threading
+
+global table_variants
+table_variants = ['auROC', 'auROC_noFS', 'brier', 'brier_noFS']
+
+global index_file_name
+index_file_name = 'compiled_index.json'
+
+indices = {}
+indices_lock = threading.Lock()
+
+
+def get_table_paths(utils_dir):
+	table_paths = []
+	for variant in table_variants:
+		table_paths.append('%stables/best_algo_params_%s.tsv'%(utils_dir, variant))
+		table_paths.append('%stables/dec_threshold_tabs_%s.tsv'%(utils_dir, variant))
+	return table_paths
+
+def parse_best_algo_params(table_file_path):
+	entries = {}
+	with open(table_file_path, 'r') as f:
+		for line in f:
+			line = line.strip().split('\t')
+			if line[0] in entries:
+				continue
+			selection = None
+			if line[2] != 'No-100':
+				selection = [b == '1' for b in line[3].split(',')]
+			entries[line[0]] = {'classifier': line[1], 'feature_selection': line[2],
+								'selection': selection, 'params': json.loads(line[4]),
+								'auROC': line[5], 'brier': line[6]}
+	return entries
+
+def parse_dec_threshold_tabs(table_file_path):
+	entries = {}
+	with open(table_file_path, 'r') as f:
+		for line in f:
+			line = line.strip().split('\t')
+			case = '%s_%s'%(line[0], line[1])
+			if case in entries:
+				continue
+			entries[case] = [ list(row.split(',')) for row in line[2].split('|') ]
+	return entries
+
+def compile_index(utils_dir):
+	index = {'best_algo_params': {}, 'dec_threshold_tabs': {}}
+	for variant in table_variants:
+		index['best_algo_params'][variant] = parse_best_algo_params(
+				'%stables/best_algo_params_%s.tsv'%(utils_dir, variant))
+		index['dec_threshold_tabs'][variant] = parse_dec_threshold_tabs(
+				'%stables/dec_threshold_tabs_%s.tsv'%(utils_dir, variant))
+	return index
+
+def is_outdated(index_file_path, table_paths):
+	if not os.path.exists(index_file_path):
+		return True
+	index_mtime = os.path.getmtime(index_file_path)
+	return any([os.path.getmtime(table_path) > index_mtime for table_path in table_paths])
+
+def write_index(index, index_file_path):
+	# write to a temporary file first, so that readers never see a partial index
+	tmp_file_path = '%s.%d.tmp'%(index_file_path, os.getpid())
+	try:
+		with open(tmp_file_path, 'w') as f:
+			json.dump(index, f)
+		os.replace(tmp_file_path, index_file_path)
+	except OSError:
+		# the index is only an accelerator, a read-only installation works without it
+		if os.path.exists(tmp_file_path):
+			os.remove(tmp_file_path)
+
+def get_index(utils_dir):
+	index_key = os.path.abspath(utils_dir)
+	with indices_lock:
+		if not index_key in indices:
+			index_file_path = '%stables/%s'%(utils_dir, index_file_name)
+			index = None
+			if not is_outdated(index_file_path, get_table_paths(utils_dir)):
+				try:
+					index = json.load(open(index_file_path, 'r'))
+				except ValueError:
+					index = None
+			if index == None:
+				index = compile_index(utils_dir)
+				write_index(index, index_file_path)
+			indices[index_key] = index
+		return indices[index_key]
+
+def lookup_best_classifier(utils_dir, case, metric, fs_suffix):
+	return get_index(utils_dir)['best_algo_params'][metric + fs_suffix].get(case, None)
+
+def lookup_measure_table(utils_dir, setting, feature_sets, metric, fs_suffix):
+	case = '%s_%s'%(setting, '-'.join(feature_sets))
+	return get_index(utils_dir)['dec_threshold_tabs'][metric + fs_suffix].get(case, None)
@@ -0,0 +1,264 @@
+"""Table outputs
+
+Writes the tables of seqQscorer (probabilities, parsed input, and metric
+table) as tab-separated text, JSON Lines, Parquet, Feather, or Arrow IPC
+stream. The format is given explicitly (--outFormat) or inferred from the
+file extension (.jsonl, .parquet, .feather, .arrow), other files are written
+tab-separated as before. Tables are written in chunks: rows are appended to
+text files chunk by chunk, for the binary formats each chunk becomes a row
+group (Parquet) or a record batch (Feather, Arrow), hence a large table is
+never built as one string. The binary formats need pyarrow, it is imported
+only when one of them is used. pandas is imported only for data frames and
+the binary formats, rows of text files are written without it.
+
+Feather files are Arrow IPC files (Feather version 2), Arrow files are Arrow
+IPC streams. Both can be read with pyarrow, Feather files also with
+pandas.read_feather.
+
+Methods
+-------
+
+get_format(file_path, out_format=None)
+	returns the format given or the one of the file extension, tsv by default
+check_format(out_format)
+	raises a WrongSettingException if the format needs pyarrow and it is not
+	installed
+TableWriter(file_path, columns=None, out_format='tsv', header=True, float_format=None, append=False, description='the table', chunk_size=10000)
+	opens a table output. With append=True rows are added to an existing
+	file (only tsv and jsonl), the header of tsv files is written only once
+TableWriter.write_rows(rows)
+	adds rows (tuples in the order of the columns), they are written once
+	chunk_size rows are collected
+TableWriter.write_frame(frame)
+	writes a pandas DataFrame, in chunks of chunk_size rows
+TableWriter.flush()
+	writes the rows collected so far, e.g. to see them while watching
+TableWriter.close()
+	writes the remaining rows and closes the file, a table without rows is
+	written with its columns only
+write_table(file_path, frame, out_format='tsv', header=True, float_format=None, description='the table')
+	writes a pandas DataFrame in chunks
+read_table(file_path, out_format='tsv', header=True)
+	reads a table written by a TableWriter as pandas DataFrame
+get_metric_frame(table, keys=[])
+	converts the metric table of a model (as returned by
+	Scorer.get_measure_table) into one row per decision threshold, keys are
+	(column, value) pairs added in front, e.g. the application case
+
+date:	2026-10-18
+
+"""
+
+import os
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+import utils.Exceptions as myExceptions
+
+global out_formats
+out_formats = ['tsv', 'jsonl', 'parquet', 'feather', 'arrow']
+
+global format_extensions
+format_extensions = {'.jsonl': 'jsonl', '.parquet': 'parquet', '.feather': 'feather', '.arrow': 'arrow'}
+
+# rows per chunk written at a time
+global write_chunk_size
+write_chunk_size = 10000
+
+
+def get_format(file_path, out_format=None):
+	if out_format != None:
+		return out_format
+	return format_extensions.get(os.path.splitext(file_path)[1].lower(), 'tsv')
+
+def import_pyarrow(out_format):
+	try:
+		import pyarrow
+		import pyarrow.ipc
+		import pyarrow.parquet
+	except ImportError:
+		raise myExceptions.WrongSettingException(
+			'The output format %s needs the package pyarrow, please install it (e.g. pip install pyarrow).'%(out_format))
+	return pyarrow
+
+def check_format(out_format):
+	if not out_format in out_formats:
+		raise myExceptions.WrongSettingException(
+			'The output format %s is not supported, use one of %s.'%(out_format, ', '.join(out_formats)))
+	if out_format in ['parquet', 'feather', 'arrow']:
+		import_pyarrow(out_format)
+
+def format_value(value, float_format):
+	if isinstance(value, (float, np.floating)):
+		if value != value:
+			return ''
+		return str(value) if float_format == None else float_format%(value)
+	return str(value)
+
+def get_json_value(value):
+	if isinstance(value, (float, np.floating)):
+		return None if value != value else float(value)
+	if isinstance(value, np.integer):
+		return int(value)
+	if isinstance(value, np.bool_):
+		return bool(value)
+	return value
+
+
+class TableWriter:
+	"""Writes a table chunk by chunk in one of the output formats."""
+
+	def __init__(self, file_path, columns=None, out_format='tsv', header=True, float_format=None,
+				append=False, description='the table', chunk_size=write_chunk_size):
+		check_format(out_format)
+		if append and not out_format in ['tsv', 'jsonl']:
+			raise myExceptions.WrongSettingException(
+				'Only the output formats tsv and jsonl can be appended to, %s is given.'%(out_format))
+		self.file_path = file_path
+		self.columns = columns
+		self.out_format = out_format
+		self.header = header
+		self.float_format = float_format
+		self.description = description
+		self.chunk_size = chunk_size
+		self.rows = []
+		self.writer = None
+		self.schema = None
+		self.out_file = None
+		self.write_header = False
+		try:
+			if out_format in ['tsv', 'jsonl']:
+				self.out_file = open(file_path, 'a' if append else 'w')
+				# the header is written only once into a file that is appended to
+				self.write_header = header and out_format == 'tsv' and self.out_file.tell() == 0
+		except:
+			self.raise_error()
+
+	def raise_error(self):
+		raise myExceptions.WrongOutputFileException(
+			'Unable to write %s to file!'%(self.description))
+
+	def write_rows(self, rows):
+		self.rows += rows
+		n_written = len(self.rows) - len(self.rows) % self.chunk_size
+		for start in range(0, n_written, self.chunk_size):
+			self.flush_rows(self.rows[start:start + self.chunk_size])
+		self.rows = self.rows[n_written:]
+
+	def flush_rows(self, rows):
+		if self.out_format == 'tsv':
+			text = ''
+			if self.write_header:
+				text += '\t'.join(self.columns) + '\n'
+				self.write_header = False
+			text += ''.join(['\t'.join([format_value(value, self.float_format) for value in row]) + '\n'
+							for row in rows])
+			self.write_text(text)
+		elif self.out_format == 'jsonl':
+			self.write_text(self.get_json_lines(rows))
+		else:
+			import pandas as pd
+			self.write_arrow(pd.DataFrame(rows, columns=self.columns))
+
+	def get_json_lines(self, rows):
+		# rows and data frames are serialized the same way, one JSON object per row
+		return ''.join([json.dumps(OrderedDict(zip(self.columns, [get_json_value(value) for value in row]))) + '\n'
+						for row in rows])
+
+	def write_text(self, text):
+		try:
+			self.out_file.write(text)
+		except:
+			self.raise_error()
+
+	def write_frame(self, frame):
+		if self.columns == None:
+			self.columns = list(frame.columns)
+		for start in range(0, max(frame.shape[0], 1), self.chunk_size):
+			chunk = frame.iloc[start:start + self.chunk_size]
+			if self.out_format == 'tsv':
+				self.write_text(chunk.to_csv(sep='\t', index=False, header=self.write_header,
+											float_format=self.float_format))
+				self.write_header = False
+			elif self.out_format == 'jsonl':
+				self.write_text(self.get_json_lines(chunk.itertuples(index=False, name=None)))
+			else:
+				self.write_arrow(chunk)
+
+	def write_arrow(self, frame):
+		pyarrow = import_pyarrow(self.out_format)
+		try:
+			table = pyarrow.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+			if self.writer == None:
+				# the schema is defined by the first chunk
+				self.schema = table.schema
+				if self.out_format == 'parquet':
+					self.writer = pyarrow.parquet.ParquetWriter(self.file_path, self.schema)
+				elif self.out_format == 'feather':
+					self.writer = pyarrow.ipc.new_file(self.file_path, self.schema)
+				else:
+					self.writer = pyarrow.ipc.new_stream(self.file_path, self.schema)
+			if table.num_rows > 0:
+				self.writer.write_table(table)
+		except myExceptions.WrongSettingException:
+			raise
+		except:
+			self.raise_error()
+
+	def flush(self):
+		if len(self.rows) > 0:
+			self.flush_rows(self.rows)
+			self.rows = []
+		if self.out_file != None:
+			try:
+				self.out_file.flush()
+			except:
+				self.raise_error()
+
+	def close(self):
+		self.flush()
+		if self.out_format == 'tsv' and self.write_header and self.columns != None:
+			self.flush_rows([])
+		elif not self.out_format in ['tsv', 'jsonl'] and self.writer == None:
+			# a table without rows still gets its columns
+			import pandas as pd
+			self.write_arrow(pd.DataFrame([], columns=[] if self.columns == None else self.columns))
+		try:
+			if self.out_file != None:
+				self.out_file.close()
+			if self.writer != None:
+				self.writer.close()
+		except:
+			self.raise_error()
+
+
+def write_table(file_path, frame, out_format='tsv', header=True, float_format=None, description='the table'):
+	writer = TableWriter(file_path, None, out_format, header, float_format, description=description)
+	writer.write_frame(frame)
+	writer.close()
+
+def read_table(file_path, out_format='tsv', header=True):
+	import pandas as pd
+	if out_format == 'tsv':
+		return pd.read_csv(file_path, sep='\t', header=0 if header else None)
+	if out_format == 'jsonl':
+		if os.path.getsize(file_path) == 0:
+			return pd.DataFrame()
+		return pd.read_json(file_path, orient='records', lines=True, dtype=False)
+	pyarrow = import_pyarrow(out_format)
+	if out_format == 'parquet':
+		return pyarrow.parquet.read_table(file_path).to_pandas()
+	if out_format == 'feather':
+		return pyarrow.ipc.open_file(file_path).read_pandas()
+	return pyarrow.ipc.open_stream(file_path).read_pandas()
+
+def get_metric_frame(table, keys=[]):
+	import pandas as pd
+	thresholds = [float(value) for value in table[0][1:]]
+	frame = pd.DataFrame(OrderedDict([('threshold', thresholds)] +
+						[(row[0], [float(value) for value in row[1:]]) for row in table[1:]]))
+	for i, (column, value) in enumerate(keys):
+		frame.insert(i, column, value)
+	return frame
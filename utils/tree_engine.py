@@ -0,0 +1,276 @@
+"""Tree engine
+
+Inference engine for the tree ensembles trained by seqQscorer (Random Forest,
+Randomized Decision Tree, Adaboost with Decision Tree, and Gradient Boosting).
+The trees of a trained model are flattened into contiguous arrays (feature,
+threshold, children, leaf values) and all trees are traversed at once for a
+batch of samples. Predictions need NumPy only (and scipy for Gradient Boosting,
+if available) and reproduce the arithmetic of scikit-learn, hence the
+probabilities are identical.
+
+Methods
+-------
+
+compile_model(model)
+	flattens a trained scikit-learn tree ensemble into a CompiledEnsemble,
+	raises an IncorrectModelException for models that are not tree based
+is_compilable(model)
+	returns True if the model can be compiled
+CompiledEnsemble.predict_proba(X)
+	returns the class probabilities for the samples in X
+CompiledEnsemble.get_header() and CompiledEnsemble.get_arrays()
+	describe the compiled model by a JSON-serializable header and NumPy arrays,
+	CompiledEnsemble.from_arrays(header, arrays) restores it
+
+date:	2026-10-18
+
+"""
+
+import numpy as np
+
+import utils.Exceptions as myExceptions
+
+def numpy_expit(x, out=None):
+	positive = x >= 0
+	exp_x = np.exp(np.where(positive, -x, x))
+	result = np.where(positive, 1.0 / (1.0 + exp_x), exp_x / (1.0 + exp_x))
+	if out is None:
+		return result
+	out[...] = result
+	return out
+
+def expit(x, out=None):
+	# scikit-learn uses the logistic function from scipy for Gradient Boosting,
+	# without scipy the probabilities may differ in the last digit. scipy is
+	# imported on the first call only, as forests do not need it.
+	global scipy_expit
+	if scipy_expit is None:
+		try:
+			from scipy.special import expit as scipy_expit
+		except ImportError:
+			scipy_expit = numpy_expit
+	return scipy_expit(x) if out is None else scipy_expit(x, out=out)
+
+scipy_expit = None
+
+global compilable_models
+compilable_models = ['RandomForestClassifier', 'ExtraTreesClassifier', 'DecisionTreeClassifier',
+					'ExtraTreeClassifier', 'AdaBoostClassifier', 'GradientBoostingClassifier']
+
+global array_names
+array_names = ['feature', 'threshold', 'left', 'right', 'value', 'weights', 'classes',
+			'is_leaf', 'children', 'roots']
+
+# number of (tree, sample) pairs traversed at once, limits the memory used
+global traversal_block
+traversal_block = 1 << 20
+
+
+class CompiledEnsemble:
+	"""Tree ensemble flattened into contiguous arrays."""
+
+	def __init__(self, kind, classes, n_features, feature, threshold, left, right, value,
+				max_depth, weights=None, learning_rate=1.0, init_raw=0.0, derived=None):
+		self.kind = kind
+		self.classes_ = np.asarray(classes)
+		self.n_classes_ = len(self.classes_)
+		self.n_features_in_ = int(n_features)
+		self.feature = np.asarray(feature, dtype=np.intp)
+		self.threshold = np.asarray(threshold, dtype=np.float64)
+		self.left = np.asarray(left, dtype=np.intp)
+		self.right = np.asarray(right, dtype=np.intp)
+		self.value = np.asarray(value, dtype=np.float64)
+		self.max_depth = int(max_depth)
+		self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+		self.learning_rate = float(learning_rate)
+		self.init_raw = float(init_raw)
+		if derived != None:
+			# arrays restored from disk (e.g. memory-mapped) are used as they are
+			self.is_leaf = np.asarray(derived['is_leaf'], dtype=bool)
+			self.children = np.asarray(derived['children'], dtype=np.intp)
+			self.roots = np.asarray(derived['roots'], dtype=np.intp)
+			return
+		node_index = np.arange(len(self.feature))
+		self.is_leaf = self.left == node_index
+		self.children = np.stack([self.left, self.right], axis=1).ravel()
+		# the roots are the nodes that are no child of another node
+		is_child = np.zeros(len(self.feature), dtype=bool)
+		is_child[self.left[~self.is_leaf]] = True
+		is_child[self.right[~self.is_leaf]] = True
+		self.roots = np.nonzero(~is_child)[0]
+
+	def get_header(self):
+		return {'kind': self.kind, 'n_features': self.n_features_in_, 'max_depth': self.max_depth,
+				'learning_rate': self.learning_rate, 'init_raw': self.init_raw,
+				'n_trees': len(self.roots), 'n_nodes': len(self.feature)}
+
+	def get_arrays(self):
+		arrays = {'feature': self.feature, 'threshold': self.threshold, 'left': self.left,
+				'right': self.right, 'value': self.value, 'classes': self.classes_,
+				'is_leaf': self.is_leaf, 'children': self.children, 'roots': self.roots}
+		if self.weights is not None:
+			arrays['weights'] = self.weights
+		return arrays
+
+	@classmethod
+	def from_arrays(cls, header, arrays):
+		derived = None
+		if all([name in arrays for name in ['is_leaf', 'children', 'roots']]):
+			derived = arrays
+		return cls(header['kind'], arrays['classes'], header['n_features'], arrays['feature'],
+				arrays['threshold'], arrays['left'], arrays['right'], arrays['value'],
+				header['max_depth'], arrays.get('weights', None), header['learning_rate'],
+				header['init_raw'], derived)
+
+	def apply(self, X):
+		"""Returns the leaf reached in every tree for every sample of X."""
+		n_samples, n_features = X.shape
+		n_trees = len(self.roots)
+		n_pairs = n_samples * n_trees
+		X_flat = np.ascontiguousarray(X).ravel()
+		leaves = np.empty(n_pairs, dtype=np.intp)
+
+		# (tree, sample) pairs are traversed in blocks, in tree-major order for locality
+		for start in range(0, n_pairs, traversal_block):
+			pairs = np.arange(start, min(n_pairs, start + traversal_block))
+			nodes = self.roots[pairs // n_samples]
+			offsets = (pairs % n_samples) * n_features
+			active = np.arange(len(pairs))
+			block = np.empty(len(pairs), dtype=np.intp)
+			# pairs that reached a leaf are removed, so the work follows the actual path lengths
+			while nodes.size > 0:
+				# as in scikit-learn, a sample goes left if its value is <= the threshold, hence NaN goes right
+				go_right = ~(X_flat.take(offsets + self.feature.take(nodes)) <= self.threshold.take(nodes))
+				nodes = self.children.take(2 * nodes + go_right)
+				at_leaf = self.is_leaf.take(nodes)
+				if at_leaf.any():
+					block[active[at_leaf]] = nodes[at_leaf]
+					inner = ~at_leaf
+					active, nodes, offsets = active[inner], nodes[inner], offsets[inner]
+			leaves[start:start + len(pairs)] = block
+		return leaves.reshape(n_trees, n_samples).T
+
+	def predict_proba(self, X):
+		# scikit-learn compares the features as float32 against float64 thresholds
+		X = np.asarray(X, dtype=np.float32).astype(np.float64)
+		if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+			raise myExceptions.WrongFeatureInputException(
+				'The compiled model expects %d features.'%(self.n_features_in_))
+		leaves = self.apply(X)
+		n_trees = leaves.shape[1]
+
+		if self.kind in ['forest', 'tree']:
+			proba = np.zeros((X.shape[0], self.n_classes_), dtype=np.float64)
+			for t in range(n_trees):
+				proba += self.value[leaves[:, t]]
+			if self.kind == 'forest':
+				proba /= n_trees
+			return proba
+
+		if self.kind == 'gradient_boosting':
+			raw = np.full(X.shape[0], self.init_raw, dtype=np.float64)
+			for t in range(n_trees):
+				raw += self.learning_rate * self.value[leaves[:, t], 0]
+			proba = np.empty((X.shape[0], 2), dtype=np.float64)
+			proba[:, 1] = expit(raw)
+			proba[:, 0] = 1.0 - proba[:, 1]
+			return proba
+
+		n_classes = self.n_classes_
+		pred = 0
+		for t in range(n_trees):
+			tree_proba = self.value[leaves[:, t]]
+			if self.kind == 'adaboost_samme_r':
+				tree_proba = np.clip(tree_proba, np.finfo(tree_proba.dtype).eps, None)
+				log_proba = np.log(tree_proba)
+				pred = pred + (n_classes - 1) * (log_proba - (1.0 / n_classes) * log_proba.sum(axis=1)[:, np.newaxis])
+			else:
+				votes = (np.argmax(tree_proba, axis=1)[:, np.newaxis] == np.arange(n_classes)[np.newaxis, :])
+				pred = pred + votes * self.weights[t]
+		pred /= self.weights.sum()
+		if n_classes == 2:
+			pred[:, 0] *= -1
+			decision = pred.sum(axis=1)
+			decision = np.vstack([-decision, decision]).T / 2
+		else:
+			decision = pred / (n_classes - 1)
+		decision = np.exp(decision - np.amax(decision, axis=1, keepdims=True))
+		return decision / np.sum(decision, axis=1, keepdims=True)
+
+
+def is_compilable(model):
+	return type(model).__name__ in compilable_models
+
+def get_tree_arrays(tree, offset, normalize):
+	tree_ = tree.tree_
+	n_nodes = tree_.node_count
+	node_index = np.arange(n_nodes)
+	is_leaf = tree_.children_left == -1
+
+	# leaves point to themselves, the traversal stops as soon as a leaf is reached
+	feature = np.where(is_leaf, 0, tree_.feature)
+	threshold = np.where(is_leaf, np.inf, tree_.threshold)
+	left = np.where(is_leaf, node_index, tree_.children_left) + offset
+	right = np.where(is_leaf, node_index, tree_.children_right) + offset
+
+	value = np.array(tree_.value[:, 0, :], dtype=np.float64)
+	if normalize:
+		normalizer = value.sum(axis=1)[:, np.newaxis]
+		normalizer[normalizer == 0.0] = 1.0
+		value /= normalizer
+	return feature, threshold, left, right, value, tree_.max_depth
+
+def flatten_trees(trees, normalize):
+	arrays = [[], [], [], [], []]
+	max_depth = 0
+	offset = 0
+	for tree in trees:
+		tree_arrays = get_tree_arrays(tree, offset, normalize)
+		for i in range(5):
+			arrays[i].append(tree_arrays[i])
+		max_depth = max(max_depth, tree_arrays[5])
+		offset += tree.tree_.node_count
+	feature, threshold, left, right, value = [np.concatenate(a) for a in arrays]
+	return feature, threshold, left, right, value, max_depth
+
+def compile_model(model):
+	model_type = type(model).__name__
+	if not is_compilable(model):
+		raise myExceptions.IncorrectModelException(
+			'Models of type %s cannot be compiled, only tree ensembles are supported.'%(model_type))
+	if getattr(model, 'n_outputs_', 1) != 1:
+		raise myExceptions.IncorrectModelException(
+			'Only models with a single output can be compiled.')
+
+	classes = model.classes_
+	n_features = model.n_features_in_
+	weights, learning_rate, init_raw = None, 1.0, 0.0
+
+	if model_type in ['RandomForestClassifier', 'ExtraTreesClassifier']:
+		kind = 'forest'
+		flat = flatten_trees(model.estimators_, True)
+	elif model_type in ['DecisionTreeClassifier', 'ExtraTreeClassifier']:
+		kind = 'tree'
+		flat = flatten_trees([model], True)
+	elif model_type == 'AdaBoostClassifier':
+		algorithm = getattr(model, 'algorithm', 'SAMME')
+		kind = 'adaboost_samme_r' if algorithm == 'SAMME.R' else 'adaboost_samme'
+		flat = flatten_trees(model.estimators_, True)
+		# the normalization in scikit-learn uses the weights of all boosting iterations
+		weights = np.array(model.estimator_weights_, dtype=np.float64)
+	else:
+		if len(classes) != 2:
+			raise myExceptions.IncorrectModelException(
+				'Only binary Gradient Boosting models can be compiled.')
+		if model.init_ != 'zero' and type(model.init_).__name__ != 'DummyClassifier':
+			raise myExceptions.IncorrectModelException(
+				'Gradient Boosting models with a custom init estimator cannot be compiled.')
+		kind = 'gradient_boosting'
+		flat = flatten_trees(model.estimators_[:, 0], False)
+		learning_rate = model.learning_rate
+		# the initial raw prediction of the prior (or zero) estimator is constant
+		init_raw = float(model._raw_predict_init(np.zeros((1, n_features)))[0, 0])
+
+	feature, threshold, left, right, value, max_depth = flat
+	return CompiledEnsemble(kind, classes, n_features, feature, threshold, left, right, value,
+							max_depth, weights, learning_rate, init_raw)
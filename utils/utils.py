@@ -14,12 +14,15 @@ clf_full_names(abbr)
 	given one of the abbreviations, this function returns the full name of
 	the algorithm. Used to clarify the terminal output
 get_best_classifier(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric)
-	given the user specifications from seqQscorer, this function parses a text table
-	in order to return the classifier and feature selection specifications that are most 
-	recommendable for the application
+	given the user specifications from seqQscorer, this function looks up the compiled
+	text tables in order to return the classifier and feature selection specifications 
+	that are most recommendable for the application
 read_in_measure_table(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric)
 	seqQscorer prints a table with machine learning evaluation measures for different decision 
-	thresholds. The source file with this information is parsed by this function
+	thresholds. This function looks up this information from the compiled text tables
+get_clf_algo(abbr)
+	this function creates the default classifier configuration for one abbreviation,
+	scikit-learn is imported only for this classifier
 def get_clf_algos()
 	this function creates and returns a dictionary of default classifier configuratons
 
@@ -28,21 +31,12 @@ author:	Steffen Albrecht
 
 """
 
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.naive_bayes import GaussianNB
-from sklearn.neural_network import MLPClassifier
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.ensemble import AdaBoostClassifier
-from sklearn.tree import ExtraTreeClassifier
+import copy
 
-import json
-from terminaltables import AsciiTable
+import utils.table_index as table_index
 
 def print_nice_table(table):
+	from terminaltables import AsciiTable
 	print_table = AsciiTable(table)
 	print(print_table.table)
 
@@ -66,58 +60,62 @@ def clf_full_names(abbr):
 def get_best_classifier(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric):
 	case = '%s_%s_%s_%s'%(species, assay, run_type, '-'.join(feature_sets))
 	
-	classifier = None
-	feature_selection = None
-	selection_str = ''
-	selection = None
-	params = None
-	auROC = None
-	brier = None
-	table_file_path = '%stables/best_algo_params_%s%s.tsv'%(utils_dir, metric, fs_suffix)
-	with open(table_file_path, 'r') as f:
-		for line in f:
-			line = line.strip().split('\t')
-			if line[0] == case:
-				classifier = line[1]
-				feature_selection = line[2]
-				selection_str = line[3]
-				params = json.loads(line[4])
-				auROC = line[5]
-				brier = line[6]
-				break
+	# the tables are looked up in the compiled index, see utils/table_index.py
+	entry = table_index.lookup_best_classifier(utils_dir, case, metric, fs_suffix)
+	if entry == None:
+		return None, None, None, None, None, None
 	
-	if feature_selection != 'No-100':
-		selection = [True if b == '1' else False for b in selection_str.split(',')]
+	selection = None
+	if entry['selection'] != None:
+		selection = list(entry['selection'])
+	params = copy.deepcopy(entry['params'])
 	
-	return classifier, feature_selection, selection, params, auROC, brier
+	return entry['classifier'], entry['feature_selection'], selection, params, entry['auROC'], entry['brier']
 
 def read_in_measure_table(utils_dir, species, assay, run_type, feature_sets, fs_suffix, metric):
 	setting = '%s_%s_%s'%(species, assay, run_type)
 	
-	table_str = None
-	table_file_path = '%stables/dec_threshold_tabs_%s%s.tsv'%(utils_dir, metric, fs_suffix)
-	with open(table_file_path, 'r') as f:
-		for line in f:
-			line = line.strip().split('\t')
-			if line[0] == setting and line[1] == '-'.join(feature_sets):
-				table_str = line[2]
-				break
-	table = []
-	for row in table_str.split('|'):
-		table.append( list(row.split(',')) )
-	return table
+	table = table_index.lookup_measure_table(utils_dir, setting, feature_sets, metric, fs_suffix)
+	return [ list(row) for row in table ]
+
+def get_clf_algo(abbr):
+	# scikit-learn is imported only for the classifier requested, which keeps
+	# the start-up of seqQscorer fast if no model has to be trained
+	if abbr == 'RFC':
+		from sklearn.ensemble import RandomForestClassifier
+		return RandomForestClassifier(random_state=1)
+	if abbr == 'GBC':
+		from sklearn.ensemble import GradientBoostingClassifier
+		return GradientBoostingClassifier(random_state=1)
+	if abbr == 'LRN':
+		from sklearn.linear_model import LogisticRegression
+		return LogisticRegression(random_state=1)
+	if abbr == 'SVC':
+		from sklearn.svm import SVC
+		return SVC(kernel='rbf', probability=True, random_state=1)
+	if abbr == 'GNB':
+		from sklearn.naive_bayes import GaussianNB
+		return GaussianNB()
+	if abbr == 'KNN':
+		from sklearn.neighbors import KNeighborsClassifier
+		return KNeighborsClassifier()
+	if abbr == 'MLP':
+		from sklearn.neural_network import MLPClassifier
+		return MLPClassifier(random_state=1)
+	if abbr == 'ADT':
+		from sklearn.tree import DecisionTreeClassifier
+		from sklearn.ensemble import AdaBoostClassifier
+		DTC = DecisionTreeClassifier(random_state = 1, max_features = "auto", class_weight = "balanced",max_depth = None)
+		return AdaBoostClassifier(base_estimator = DTC)
+	if abbr == 'ETC':
+		from sklearn.tree import ExtraTreeClassifier
+		return ExtraTreeClassifier(random_state=1)
+	raise KeyError(abbr)
 
 def get_clf_algos():
 	algorithms = {}
-	algorithms['RFC'] = RandomForestClassifier(random_state=1)
-	algorithms['GBC'] = GradientBoostingClassifier(random_state=1)
-	algorithms['LRN'] = LogisticRegression(random_state=1)
-	algorithms['SVC'] = SVC(kernel='rbf', probability=True, random_state=1)
-	algorithms['GNB'] = GaussianNB()
-	algorithms['MLP'] = MLPClassifier(random_state=1)
-	DTC = DecisionTreeClassifier(random_state = 1, max_features = "auto", class_weight = "balanced",max_depth = None)
-	algorithms['ADT'] = AdaBoostClassifier(base_estimator = DTC)
-	algorithms['ETC'] = ExtraTreeClassifier(random_state=1)
+	for abbr in ['RFC', 'GBC', 'LRN', 'SVC', 'GNB', 'KNN', 'MLP', 'ADT', 'ETC']:
+		algorithms[abbr] = get_clf_algo(abbr)
 	return algorithms
 
 
@@ -143,5 +141,6 @@ def get_clf_algos():
 
 
 
+
 
 
@@ -0,0 +1,178 @@
+"""Watcher utils
+
+Used by seqQscorer with --watch to score samples while their feature set
+files are written, e.g. by deriveFeatureSets.py. A watcher reports the
+feature set files that are ready to be parsed, the sample tracker parses
+each of them once and keeps the features until all feature sets of a sample
+are available, then the sample is scored. The watcher is pluggable: any
+object with the methods poll(), has_pending(), and ignore_samples(sample_IDs)
+can be used instead of the PollingWatcher, e.g. a stub replaying a list of
+files or a watcher based on file system notifications.
+
+Methods
+-------
+
+PollingWatcher(indir, feature_sets, settle=1.0, restrict=None, shard=None)
+	watches the input directory and all its subdirectories by listing them
+	with parser.get_feature_file_index. Only files of samples not scored so
+	far are checked, a file is ready once it was not modified for settle
+	seconds
+PollingWatcher.poll()
+	returns the paths of the files that became ready since the last call,
+	files that change afterwards are reported again
+PollingWatcher.has_pending()
+	returns True if files were found that are not ready yet
+PollingWatcher.ignore_samples(sample_IDs)
+	stops checking the files of the given samples
+SampleTracker(feature_sets, workers=1, pool='thread', skip=[], verbose=False)
+	keeps the features per sample until the sample is complete, samples in
+	skip (e.g. scored by a previous run) are ignored
+SampleTracker.add_files(file_paths)
+	parses the files and returns the features of the samples completed by
+	them, files that cannot be parsed are kept in errors (and reported if
+	verbose) and ignored until they change
+SampleTracker.get_incomplete()
+	returns the IDs of the samples that miss feature sets
+check_setting(indir, interval)
+	raises an exception if indir is not a directory or interval is not positive
+watch(watcher, tracker, score, interval=2.0, idle_timeout=None, sleep=time.sleep, clock=time.monotonic)
+	polls the watcher every interval seconds and calls score with the
+	features of the completed samples, until no file was found for
+	idle_timeout seconds (never by default)
+
+date:	2026-10-18
+
+"""
+
+import os
+import time
+from collections import OrderedDict
+
+import utils.Exceptions as myExceptions
+import utils.parser as parser
+
+
+def get_sample_ID(file_path):
+	return parser.get_sample_ID(file_path)
+
+
+class PollingWatcher:
+	"""Reports feature set files of a directory once they are completely written."""
+
+	def __init__(self, indir, feature_sets, settle=1.0, restrict=None, shard=None):
+		self.indir = indir if indir[-1] == '/' else indir + '/'
+		self.feature_sets = feature_sets
+		self.settle = settle
+		self.restrict = restrict
+		self.shard = shard
+		self.reported = {}
+		self.pending = set()
+		self.ignored = set()
+
+	def poll(self):
+		ready = []
+		self.pending = set()
+		now = time.time()
+		# the files in the input directory and all its subdirectories, as scored without --watch
+		try:
+			index = parser.get_feature_file_index(self.indir, self.feature_sets, self.restrict, self.shard)
+		except FileNotFoundError:
+			# a subdirectory was removed while listing, it is listed again with the next poll
+			return ready
+		for sample_ID, sample_files in index.items():
+			if sample_ID in self.ignored:
+				continue
+			for file_path in sample_files.values():
+				try:
+					stat = os.stat(file_path)
+				except FileNotFoundError:
+					continue
+				signature = (stat.st_size, stat.st_mtime_ns)
+				if self.reported.get(file_path, None) == signature:
+					continue
+				# files still written by another process are reported once they were not modified for a while
+				if now - stat.st_mtime < self.settle:
+					self.pending.add(file_path)
+					continue
+				self.reported[file_path] = signature
+				ready.append(file_path)
+		return sorted(ready)
+
+	def has_pending(self):
+		return len(self.pending) > 0
+
+	def ignore_samples(self, sample_IDs):
+		for sample_ID in sample_IDs:
+			self.ignored.add(sample_ID)
+		self.reported = dict( (file_path, signature) for file_path, signature in self.reported.items()
+							if not get_sample_ID(file_path) in self.ignored )
+
+
+class SampleTracker:
+	"""Collects the features of the samples until all feature sets are parsed."""
+
+	def __init__(self, feature_sets, workers=1, pool='thread', skip=[], verbose=False):
+		self.feature_sets = feature_sets
+		self.workers = workers
+		self.pool = pool
+		self.verbose = verbose
+		self.done = set(skip)
+		self.features = OrderedDict()
+		self.errors = []
+
+	def add_files(self, file_paths):
+		tasks = []
+		for file_path in file_paths:
+			sample_ID, feature_set = parser.split_feature_file_name(os.path.basename(file_path), self.feature_sets)
+			if sample_ID != None and not sample_ID in self.done:
+				tasks.append((file_path, feature_set))
+		for (file_path, feature_set), (features, error) in zip(tasks, parser.parse_feature_files(tasks, self.workers, self.pool)):
+			sample_ID = get_sample_ID(file_path)
+			if not sample_ID in self.features:
+				self.features[sample_ID] = {}
+			if error != None:
+				# the file is parsed again only if it changes
+				self.errors.append((file_path, error))
+				self.features[sample_ID].pop(feature_set, None)
+				if self.verbose:
+					print('\nWarning! The feature file could not be parsed, it is parsed again when it changes:')
+					print('\t%s\t%s\n'%(file_path, error))
+				continue
+			self.features[sample_ID][feature_set] = features
+
+		completed = OrderedDict()
+		for sample_ID in OrderedDict.fromkeys([get_sample_ID(file_path) for file_path, feature_set in tasks]):
+			sample_features = self.features.get(sample_ID, {})
+			if len(sample_features) == len(self.feature_sets):
+				completed[sample_ID] = {}
+				for feature_set in self.feature_sets:
+					completed[sample_ID].update(sample_features[feature_set])
+				del self.features[sample_ID]
+				self.done.add(sample_ID)
+		return completed
+
+	def get_incomplete(self):
+		return list(self.features.keys())
+
+
+def check_setting(indir, interval):
+	if indir == None or not os.path.isdir(indir):
+		raise myExceptions.WrongSettingException(
+			'Only a directory can be watched, not an archive.')
+	if interval <= 0:
+		raise myExceptions.WrongSettingException(
+			'The watch interval has to be positive, %s is given.'%(interval))
+
+def watch(watcher, tracker, score, interval=2.0, idle_timeout=None, sleep=time.sleep, clock=time.monotonic):
+	last_activity = clock()
+	while True:
+		file_paths = watcher.poll()
+		completed = tracker.add_files(file_paths)
+		if len(completed) > 0:
+			score(completed)
+			watcher.ignore_samples(completed.keys())
+		if len(file_paths) > 0 or watcher.has_pending():
+			last_activity = clock()
+		elif idle_timeout != None and clock() - last_activity >= idle_timeout:
+			return
+		sleep(interval)